@@ -0,0 +1,19 @@
+"""
+ASGI entry point of the OSLC API, serving the same routes of aras_oslc_api.py
+
+    pip install aras-oslc-api[asgi]
+    ARAS_ASYNC_ENABLED=true uvicorn aras_oslc_asgi:app --workers 4
+
+A deployment shim for the ASGI servers: the Flask views are synchronous and run on a pool
+of ASGI_WORKERS threads, the same concurrency of the threaded workers of a WSGI server. Only
+the queries sent to Aras by each view are awaited concurrently by the asynchronous client.
+"""
+from os import environ
+
+from a2wsgi import WSGIMiddleware
+
+from oslc_api import create_app
+
+flask_app = create_app(app_config=environ.get('FLASK_ENV'))
+
+app = WSGIMiddleware(flask_app, workers=flask_app.config.get('ASGI_WORKERS', 32))
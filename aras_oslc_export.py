@@ -0,0 +1,72 @@
+"""
+Export all the items of an ItemType as N-Triples or as N-Quads, with each item in the
+graph named with its URL, the file is gzip compressed when its name ends with .gz
+
+    python aras_oslc_export.py Part --output Part.nq.gz --username admin --password ...
+    python aras_oslc_export.py Part --format nt --access-token eyJhbGciOiJSUzI1NiIsImtpZCI6... > Part.nt
+"""
+import argparse
+import sys
+from os import environ
+
+from oslc_api import create_app
+from oslc_api.aras.resources import OSLCResource
+from oslc_api.auth import aras_api
+from oslc_api.rest_api.writers import EXPORT_REPRESENTATIONS
+
+
+def get_representation(output: str, representation: str = None) -> str:
+    if representation:
+        return representation
+
+    # Read it from the extension of the output file, N-Quads by default
+    name = output[:-3] if output.endswith('.gz') else output
+    return 'nt' if name.endswith('.nt') else 'nquads'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('item_type', help='the name of the ItemType, e.g. Part')
+    parser.add_argument('--output', default='-', help='the file to write, the standard output by default')
+    parser.add_argument('--format', choices=EXPORT_REPRESENTATIONS, default=None,
+                        help='nquads or nt, read from the extension of the output by default')
+    parser.add_argument('--base-url', default=environ.get('OSLC_BASE_URL', 'http://127.0.0.1:5000/api/oslc'),
+                        help='the URL of the OSLC API used in the IRIs of the items')
+    parser.add_argument('--page-size', type=int, default=None, help='the number of items of each request')
+    parser.add_argument('--workers', type=int, default=None, help='the number of pages read at the same time')
+    parser.add_argument('--access-token', default=environ.get('ARAS_ACCESS_TOKEN'))
+    parser.add_argument('--username', default=environ.get('ARAS_USERNAME'))
+    parser.add_argument('--password', default=environ.get('ARAS_PASSWORD'))
+    args = parser.parse_args()
+
+    app = create_app(app_config=environ.get('FLASK_ENV') or 'production')
+
+    with app.app_context():
+        if args.access_token:
+            aras_api.token = {'access_token': args.access_token}
+        elif args.username and args.password:
+            aras_api.token = aras_api.get_token(args.username, args.password)
+        else:
+            parser.error('an access token or the username and password of Aras are required')
+
+        representation = get_representation(args.output, args.format)
+        oslc_resource = OSLCResource(app.config['SOURCE_BASE_URI'], aras_api.token['access_token'])
+        chunks = oslc_resource.stream_export(args.item_type, args.base_url.rstrip('/'), representation,
+                                             page_size=args.page_size or app.config.get('EXPORT_PAGE_SIZE', 100),
+                                             workers=args.workers or app.config.get('EXPORT_CONCURRENT_PAGES'),
+                                             compress=args.output.endswith('.gz'))
+        if not chunks:
+            print(f'The Item Type {args.item_type} does not exist or it has no properties', file=sys.stderr)
+            exit(1)
+
+        output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Time to send bursts of independent queries to a local stub of the Aras OData API,
+with the pool of threads of the fan-out and with the asynchronous client, which
+keeps all the queries of a burst in flight at the same time.
+
+The stub server answers each request after --latency seconds, emulating the
+round trip and the processing time of a remote Aras instance.
+
+    python -m benchmarks.bench_async --queries 300 --latency 0.05
+"""
+import argparse
+import functools
+import logging
+import time
+
+from oslc_api.aras import concurrency
+from oslc_api.aras.client import query_relation_properties
+from oslc_api.auth.client import ArasAPI
+from oslc_api.rest_api.aras import send_queries
+from tests.stub_server import StubODataServer
+
+
+def burst(aras_api, queries: int) -> list:
+    return send_queries([functools.partial(query_relation_properties, aras_api.source_base_uri, 'Part BOM', str(i))
+                         for i in range(queries)])
+
+
+def measure(name: str, stub, run, bursts: int):
+    stub.reset_counters()
+
+    start = time.perf_counter()
+    for _ in range(bursts):
+        responses = run()
+    elapsed = time.perf_counter() - start
+
+    assert all(response.status_code == 200 for response in responses)
+    print(f'{name:<28} time={elapsed:7.2f}s  requests={stub.requests:<6} '
+          f'requests/s={stub.requests / elapsed:9.1f}  connections={stub.connections}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=300, help='number of queries of each burst')
+    parser.add_argument('--bursts', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05, help='server processing time in seconds')
+    parser.add_argument('--workers', type=int, default=8, help='threads of the fan-out')
+    args = parser.parse_args()
+
+    logging.disable(logging.DEBUG)
+
+    with StubODataServer(latency=args.latency) as stub:
+        aras_api = ArasAPI()
+        aras_api.init_app(None, stub.base_api_uri, 'Innovator', 'IOMApp', 'InnovatorSample')
+        aras_api.token = {'access_token': 'benchmark'}
+        concurrency.configure(workers=args.workers)
+
+        measure(f'fan-out, {args.workers} threads', stub, lambda: burst(aras_api, args.queries), args.bursts)
+
+        aras_api.async_enabled = True
+        try:
+            measure('asynchronous client', stub, lambda: burst(aras_api, args.queries), args.bursts)
+        finally:
+            aras_api.async_enabled = False
+            aras_api.async_sender.close()
+
+
+if __name__ == '__main__':
+    main()
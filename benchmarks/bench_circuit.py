@@ -0,0 +1,68 @@
+"""
+Time spent by the requests to a local stub of the Aras OData API while it is
+down, closing every connection, when each request is retried with backoff and
+when the circuit breaker fails them at once after a few consecutive failures.
+
+    python -m benchmarks.bench_circuit --requests 50 --retries 2 --latency 0.05
+"""
+import argparse
+import logging
+import time
+
+from werkzeug.exceptions import HTTPException
+
+from oslc_api.aras.client import query_item_types_list
+from oslc_api.auth.client import ArasAPI
+from tests.stub_server import StubODataServer
+
+
+def measure(name: str, aras_api, stub, requests: int):
+    stub.reset_counters()
+    stub.failures = requests * (aras_api.retry.retries + 1)
+
+    failed = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        try:
+            query_item_types_list(aras_api.source_base_uri)
+        except HTTPException:
+            failed += 1
+    elapsed = time.perf_counter() - start
+
+    print(f'{name:<24} time={elapsed:7.2f}s  failed={failed:<5} sent={stub.requests:<5} '
+          f'ms/request={elapsed / requests * 1000:8.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--retries', type=int, default=2)
+    parser.add_argument('--backoff-factor', type=float, default=0.1)
+    parser.add_argument('--failures', type=int, default=5, help='consecutive failures opening the circuit')
+    parser.add_argument('--latency', type=float, default=0.05, help='server processing time in seconds')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    with StubODataServer(latency=args.latency) as stub:
+        stub.failure_status = None
+
+        aras_api = ArasAPI()
+        aras_api.init_app(None, stub.base_api_uri, 'Innovator', 'IOMApp', 'InnovatorSample')
+        aras_api.token = {'access_token': 'benchmark'}
+        aras_api.retry.configure(retries=args.retries, backoff_factor=args.backoff_factor)
+
+        try:
+            aras_api.circuit.configure(failures=0)
+            measure('retries', aras_api, stub, args.requests)
+
+            aras_api.circuit.configure(failures=args.failures, reset_timeout=60)
+            measure('retries, circuit breaker', aras_api, stub, args.requests)
+        finally:
+            aras_api.retry.configure(retries=0)
+            aras_api.circuit.configure(failures=0)
+            aras_api.circuit.reset()
+
+
+if __name__ == '__main__':
+    main()
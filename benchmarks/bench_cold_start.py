@@ -0,0 +1,77 @@
+"""
+Latency of the first read of an item by a new process, with empty caches and
+with the caches preloaded from the metadata snapshot written by a previous run.
+
+The stub server answers each request after --latency seconds, emulating the
+round trip and the processing time of a remote Aras instance.
+
+    python -m benchmarks.bench_cold_start --latency 0.02
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from rdflib import Graph
+
+from oslc_api.aras import snapshot
+from oslc_api.aras.resources import OSLCResource, item_types_cache
+from oslc_api.auth.client import ArasAPI
+from oslc_api.rest_api.aras import get_item_rdf, shape_cache, versionable_cache, validated_versions_cache
+from tests.stub_server import StubODataServer, write_item_type_fixtures
+
+URL_SP = 'http://127.0.0.1:5000/api/oslc'
+
+
+def clear_caches():
+    for cache in (item_types_cache, shape_cache, versionable_cache, validated_versions_cache):
+        cache.clear()
+
+
+def first_read(stub, config_id: str):
+    # The catalogue of the ServiceProvider and the item, what a client reads first
+    OSLCResource(stub.source_base_uri, 'benchmark').get_service_provider(URL_SP)
+    get_item_rdf(Graph(), 'Part', stub.source_base_uri, None, config_id, f'{URL_SP}/Part/{config_id}', URL_SP)
+
+
+def measure(name: str, stub, run):
+    stub.reset_counters()
+
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    print(f'{name:<28} time={elapsed * 1000:8.1f}ms  requests={stub.requests}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.02, help='server processing time in seconds')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as data_dir, StubODataServer(latency=args.latency, data_dir=data_dir) as stub:
+        items = write_item_type_fixtures(data_dir, count=10)
+        config_id = items[0]['id']
+        path = os.path.join(data_dir, 'metadata_snapshot.json.gz')
+
+        aras_api = ArasAPI()
+        aras_api.init_app(None, stub.base_api_uri, 'Innovator', 'IOMApp', 'InnovatorSample')
+        aras_api.token = {'access_token': 'benchmark'}
+
+        clear_caches()
+        measure('cold start, empty caches', stub, lambda: first_read(stub, config_id))
+        snapshot.write_snapshot(path)
+
+        clear_caches()
+        snapshot.load_snapshot(path)
+        measure('cold start, snapshot', stub, lambda: first_read(stub, config_id))
+
+        # Let the background reloads of the preloaded entries end before the stub stops
+        time.sleep(args.latency * 10)
+
+
+if __name__ == '__main__':
+    main()
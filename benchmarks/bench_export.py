@@ -0,0 +1,94 @@
+"""
+Items per second exported from a local stub of the Aras OData API, with the
+export (one ResourceShape, pages of expanded items read concurrently) and
+with the crawl of the QueryResource of every item that the export replaces.
+
+The stub server answers each request after --latency seconds, emulating the
+round trip and the processing time of a remote Aras instance.
+
+    python -m benchmarks.bench_export --items 2000 --latency 0.02
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+from rdflib import Graph
+
+from oslc_api.aras import concurrency
+from oslc_api.aras.resources import OSLCResource, item_types_cache
+from oslc_api.auth.client import ArasAPI
+from oslc_api.rest_api.aras import get_item_rdf, shape_cache, versionable_cache
+from tests.stub_server import StubODataServer, write_item_type_fixtures
+
+URL_SP = 'http://127.0.0.1:5000/api/oslc'
+
+
+def clear_caches():
+    for cache in (item_types_cache, shape_cache, versionable_cache):
+        cache.clear()
+
+
+def export(stub, representation: str, page_size: int, workers: int, compress: bool) -> int:
+    resource = OSLCResource(stub.source_base_uri, 'benchmark')
+    chunks = resource.stream_export('Part', URL_SP, representation, page_size=page_size,
+                                    workers=workers, compress=compress)
+    return sum(len(chunk) for chunk in chunks)
+
+
+def crawl(stub, items: list) -> int:
+    # What a crawler of the QueryResources costs: a graph with its shape, item and relationship queries by item
+    size = 0
+    for item in items:
+        graph = Graph()
+        get_item_rdf(graph, 'Part', stub.source_base_uri, item['id'], item['config_id']['id'],
+                     f'{URL_SP}/Part/{item["config_id"]["id"]}', URL_SP)
+        size += len(graph.serialize(format='nt'))
+
+    return size
+
+
+def measure(name: str, stub, run, count: int):
+    clear_caches()
+    stub.reset_counters()
+
+    start = time.perf_counter()
+    size = run()
+    elapsed = time.perf_counter() - start
+
+    print(f'{name:<28} items={count:<6} time={elapsed:7.2f}s  items/s={count / elapsed:9.1f}  '
+          f'requests={stub.requests:<6} size={size / 1024:9.1f}KiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02, help='server processing time in seconds')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--crawl', type=int, default=200, help='number of items fetched one by one, 0 to skip it')
+    args = parser.parse_args()
+
+    logging.disable(logging.DEBUG)
+
+    with tempfile.TemporaryDirectory() as data_dir, StubODataServer(latency=args.latency, data_dir=data_dir) as stub:
+        items = write_item_type_fixtures(data_dir, count=args.items)
+
+        aras_api = ArasAPI()
+        aras_api.init_app(None, stub.base_api_uri, 'Innovator', 'IOMApp', 'InnovatorSample')
+        aras_api.token = {'access_token': 'benchmark'}
+        concurrency.configure(workers=args.workers)
+
+        if args.crawl:
+            measure('crawl of the QueryResources', stub, lambda: crawl(stub, items[:args.crawl]), args.crawl)
+
+        measure('export nt, 1 worker', stub,
+                lambda: export(stub, 'nt', args.page_size, 1, False), args.items)
+        measure(f'export nt, {args.workers} workers', stub,
+                lambda: export(stub, 'nt', args.page_size, args.workers, False), args.items)
+        measure(f'export nquads.gz, {args.workers} workers', stub,
+                lambda: export(stub, 'nquads', args.page_size, args.workers, True), args.items)
+
+
+if __name__ == '__main__':
+    main()
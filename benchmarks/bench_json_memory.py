@@ -0,0 +1,78 @@
+"""
+Peak memory and time spent reading an OData response with response.json()
+and with the incremental parser that only keeps the fields used by the loaders.
+
+The value array of the fixtures is repeated --copies times to emulate the
+responses of a large Aras instance, the body is built before the measure
+starts, so only the memory allocated while parsing it is reported.
+
+    python -m benchmarks.bench_json_memory --copies 200
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+from oslc_api.aras.data import iter_values, CHUNK_SIZE
+
+FIXTURES = [
+    ('sourceItemTypes.json', ('@odata.id', 'name')),
+    ('Part_Items.json', ('id', 'keyed_name', 'config_id/id')),
+]
+
+
+def build_body(file_name: str, copies: int) -> bytes:
+    with open(os.path.join('data', file_name)) as json_file:
+        data = json.load(json_file)
+
+    data['value'] = data['value'] * copies
+
+    return json.dumps(data).encode('utf-8')
+
+
+def chunks_of(body: bytes):
+    for i in range(0, len(body), CHUNK_SIZE):
+        yield body[i:i + CHUNK_SIZE]
+
+
+def parse_whole(body: bytes, fields) -> int:
+    # What response.json() does: decode the whole body and build every object of it
+    data = json.loads(body.decode('utf-8'))
+    return len(data['value'])
+
+
+def parse_incremental(body: bytes, fields) -> int:
+    return sum(1 for _ in iter_values(chunks_of(body), fields))
+
+
+def measure(parse, body: bytes, fields) -> tuple:
+    # The time is measured without tracing the allocations, which slows down the pure Python code
+    start = time.perf_counter()
+    count = parse(body, fields)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    parse(body, fields)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return count, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--copies', type=int, default=100, help='times the value array of the fixtures is repeated')
+    args = parser.parse_args()
+
+    for file_name, fields in FIXTURES:
+        body = build_body(file_name, args.copies)
+        print(f'{file_name} x{args.copies} ({len(body) / 1024 / 1024:.1f} MiB)')
+
+        for name, parse in (('response.json()', parse_whole), ('iter_values', parse_incremental)):
+            count, peak, elapsed = measure(parse, body, fields)
+            print(f'  {name:<16} entries={count:<7} peak={peak / 1024 / 1024:8.2f} MiB  time={elapsed * 1000:8.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Time spent reading the properties of a ResourceShape when building an item,
+running the SPARQL queries on the graph against reading its property index.
+
+    python -m benchmarks.bench_property_index --iterations 200
+"""
+import argparse
+import statistics
+import time
+
+from rdflib import Graph
+
+from oslc_api.aras.properties import PropertyIndex, get_property_index
+
+QUERIES = [
+    """SELECT ?prop
+       WHERE {
+          ?s oslc:name ?prop.
+          ?s oslc:occurs ?occurs.
+          ?s oslc:propertyDefinition ?def.
+          FILTER(?occurs IN (oslc:Exactly-one, oslc:Zero-or-one))
+       }""",
+    """SELECT ?prop ?type ?def
+        WHERE {
+            ?s oslc:name ?prop.
+            ?s oslc:occurs ?occurs.
+            FILTER(?occurs IN (oslc:Exactly-one, oslc:Zero-or-one))
+            OPTIONAL {
+                ?s ?type ?def.
+                FILTER(?type IN (oslc:valueType, oslc:propertyDefinition))
+            }
+        }""",
+    """SELECT ?prop ?def
+       WHERE {
+          ?s oslc:name ?prop.
+          ?s oslc:occurs oslc:Zero-or-many.
+          ?s oslc:propertyDefinition ?def.
+       }""",
+]
+
+
+def sparql(graph: Graph) -> int:
+    return sum(len(list(graph.query(query))) for query in QUERIES)
+
+
+def build_index(graph: Graph) -> int:
+    index = PropertyIndex(graph)
+    return len(index.expandable) + len(index.single) + len(index.relationships)
+
+
+def cached_index(graph: Graph) -> int:
+    index = get_property_index(graph)
+    return len(index.expandable) + len(index.single) + len(index.relationships)
+
+
+def measure(function, graph: Graph, iterations: int) -> list:
+    timings = list()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function(graph)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--shape', default='data/Part_ResourceShape.ttl')
+    args = parser.parse_args()
+
+    graph = Graph()
+    graph.parse(args.shape, format='turtle')
+
+    for name, function in (('SPARQL queries', sparql), ('build the index', build_index),
+                           ('cached index', cached_index)):
+        timings = measure(function, graph, args.iterations)
+        print(f'{name:<16} mean={statistics.mean(timings):8.3f}ms  p50={statistics.median(timings):8.3f}ms')
+
+
+if __name__ == '__main__':
+    main()
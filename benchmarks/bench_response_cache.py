@@ -0,0 +1,80 @@
+"""
+Latency of the requests of a version of an item, built from the Aras
+responses on the first read and served from the response cache afterwards.
+
+The adaptor reads a local stub of the Aras OData API answering each request
+after --latency seconds: the cached document of the current version is served
+after probing its generation and modified_on, the one of a version that is not
+the current one (frozen) is served without asking Aras. --backend selects the cache.
+
+    python -m benchmarks.bench_response_cache --requests 500 --latency 0.02 --backend memory://
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from oslc_api import create_app
+from oslc_api.aras.cache import create_cache
+from oslc_api.auth import aras_api
+from tests.stub_server import StubODataServer, write_item_type_fixtures
+
+
+def measure(name: str, client, stub, config_id: str, item_id: str, requests: int):
+    config_context = f'http://127.0.0.1:5000/api/oslc/config/Part/component/{config_id}/stream/{item_id}'
+
+    timings = list()
+    for number in range(requests):
+        if number == 1:
+            stub.reset_counters()
+
+        start = time.perf_counter()
+        res = client.get(f'/api/oslc/Part/{config_id}', query_string={'oslc_config.context': config_context},
+                         headers={'Accept': 'text/turtle', 'X-ARAS-ACCESS-TOKEN': 'benchmark'})
+        timings.append((time.perf_counter() - start) * 1000)
+        assert res.status_code == 200, res.data
+
+    hits = sorted(timings[1:])
+    print(f'{name:<16} first read (built) {timings[0]:8.3f}ms  cached reads mean={statistics.mean(hits):.3f}ms  '
+          f'p50={statistics.median(hits):.3f}ms  p95={hits[int(len(hits) * 0.95) - 1]:.3f}ms  '
+          f'aras requests/read={stub.requests / len(hits):.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.02, help='server processing time in seconds')
+    parser.add_argument('--backend', default='memory://', help='memory://, file:///tmp/oslc-cache or redis://...')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    # The testing configuration logs every request, which would be measured as well
+    logging.disable(logging.WARNING)
+    app.extensions['response_cache'] = create_cache('responses', url=args.backend,
+                                                    maxsize=app.config.get('RESPONSE_CACHE_SIZE', 1024),
+                                                    ttl=app.config.get('RESPONSE_CACHE_TTL'))
+    app.extensions['response_cache'].clear()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        items = write_item_type_fixtures(data_dir, count=10)
+
+        # The first item is an older version of its config_id
+        items[0]['is_current'] = '0'
+        with open(os.path.join(data_dir, 'Part_Items.json'), 'w') as json_file:
+            json.dump({'value': items}, json_file)
+
+        with StubODataServer(latency=args.latency, data_dir=data_dir) as stub:
+            app.config['SOURCE_BASE_URI'] = stub.source_base_uri
+            aras_api.init_app(None, stub.base_api_uri, 'Innovator', 'IOMApp', 'InnovatorSample')
+            aras_api.tokens.add('admin', {'access_token': 'benchmark'})
+
+            with app.test_client() as client:
+                measure('current version', client, stub, items[1]['config_id']['id'], items[1]['id'], args.requests)
+                measure('frozen version', client, stub, items[0]['config_id']['id'], items[0]['id'], args.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Round-trip latency of the Aras OData calls with and without the pooled session.
+
+The stub server emulates the cost of opening a connection against a remote
+Aras instance (TCP + TLS handshake) with --connect-delay, every request sent
+with the module level requests.get pays it, the pooled session only pays it
+once per connection kept in the pool.
+
+    python -m benchmarks.bench_session --requests 200 --connect-delay 0.01
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+from oslc_api.auth.client import ArasAPI
+from tests.stub_server import StubODataServer
+
+
+def measure(call, url: str, headers: dict, count: int) -> list:
+    timings = list()
+    for _ in range(count):
+        start = time.perf_counter()
+        res = call(url, headers=headers)
+        res.content
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def report(name: str, timings: list, connections: int):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f'{name:<20} mean={statistics.mean(timings):7.2f}ms  p50={statistics.median(timings):7.2f}ms  '
+          f'p95={p95:7.2f}ms  connections={connections}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0, help='server processing time in seconds')
+    parser.add_argument('--connect-delay', type=float, default=0.01, help='handshake cost in seconds')
+    args = parser.parse_args()
+
+    with StubODataServer(latency=args.latency, connect_delay=args.connect_delay) as stub:
+        aras_api = ArasAPI()
+        aras_api.init_app(None, stub.base_api_uri, 'Innovator', 'IOMApp', 'InnovatorSample')
+        aras_api.token = {'access_token': 'benchmark'}
+
+        url = stub.source_base_uri + 'ItemType?$select=name'
+        headers = {'Authorization': 'Bearer benchmark', 'Accept': 'application/json'}
+
+        timings = measure(requests.get, url, headers, args.requests)
+        report('requests.get', timings, stub.connections)
+
+        stub.reset_counters()
+        timings = measure(lambda u, headers: aras_api.get_resource(u), url, headers, args.requests)
+        report('pooled session', timings, stub.connections)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Throughput of the components container written by the triple writers
+against building the rdflib graph and serializing it, for pages of
+1k, 10k and 100k members in Turtle, N-Triples and JSON-LD.
+
+    python -m benchmarks.bench_writers --sizes 1000 10000 100000
+"""
+import argparse
+import logging
+import time
+from unittest import mock
+
+from oslc_api.aras.resources import OSLCResource
+
+URL = 'http://127.0.0.1:5000/api/oslc/config/Part/components'
+
+
+def build_items(size: int) -> dict:
+    return {f'{i:032X}': {'id': f'{i:032X}', 'keyed_name': f'Part {i}', 'config_id': {'id': f'{i:032X}'}}
+            for i in range(size)}
+
+
+def with_rdflib(representation: str) -> int:
+    resource = OSLCResource('http://aras/', 'benchmark')
+    resource.get_components('Part', URL)
+    return len(resource.to_rdf(representation))
+
+
+def with_writer(representation: str) -> int:
+    resource = OSLCResource('http://aras/', 'benchmark')
+    return sum(len(chunk) for chunk in resource.stream_components('Part', URL, representation))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--representations', nargs='+', default=['turtle', 'nt', 'json-ld'])
+    args = parser.parse_args()
+
+    logging.disable(logging.DEBUG)
+
+    for size in args.sizes:
+        items = build_items(size)
+        with mock.patch('oslc_api.aras.resources.load_item_types', return_value={'1': 'Part'}), \
+                mock.patch('oslc_api.aras.resources.load_items', return_value=items):
+
+            for representation in args.representations:
+                results = list()
+                for name, write in (('rdflib', with_rdflib), ('writer', with_writer)):
+                    start = time.perf_counter()
+                    length = write(representation)
+                    elapsed = time.perf_counter() - start
+                    results.append(elapsed)
+                    print(f'{size:>7} members  {representation:<8} {name:<7} {elapsed * 1000:10.1f}ms  '
+                          f'{size / elapsed:12.0f} members/s  {length / 1024:10.0f} KiB')
+
+                print(f'{"":>16} {representation:<8} speed-up x{results[0] / results[1]:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,14 @@ base_dir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(base_dir, '.env'))
 
 
+def env_bool(name: str, default: bool = False) -> bool:
+    value = environ.get(name)
+    if value is None:
+        return default
+
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
 class BaseConfig:
     DEBUG = False
     TESTING = False
@@ -20,6 +28,13 @@ class BaseConfig:
     OAUTH_CLIENT_NAME = environ.get('OAUTH_CLIENT_NAME') or 'oauth_client'
     OAUTH_CLIENT_ID = environ.get('OAUTH_CLIENT_ID') or 'IOMApp'
     OAUTH_CLIENT_SECRET = environ.get('OAUTH_CLIENT_SECRET') or None
+    # Scopes requested on login, 'Innovator offline_access' for the refresh tokens if the OAuth server of Aras allows it
+    OAUTH_SCOPE = environ.get('OAUTH_SCOPE') or 'Innovator'
+    # Seconds before the discovery of the OAuth server of Aras (its OpenID configuration) is repeated
+    OPENID_CONFIGURATION_TTL = int(environ.get('OPENID_CONFIGURATION_TTL', 3600))
+    # Discover the OAuth server when the application starts, and the file where it is shared with the other workers
+    OAUTH_EAGER_DISCOVERY = env_bool('OAUTH_EAGER_DISCOVERY', True)
+    OPENID_CONFIGURATION_FILE = environ.get('OPENID_CONFIGURATION_FILE', os.path.join('data', 'openid_configuration.json'))
 
     SWAGGER_UI_OAUTH_CLIENT_ID = OAUTH_CLIENT_ID
 
@@ -28,6 +43,80 @@ class BaseConfig:
 
     SOURCE_DATABASE = environ.get('SOURCE_DATABASE')
 
+    # HTTP connection pool shared by all the requests sent to Aras
+    # ARAS_POOL_CONNECTIONS: number of per-host pools to cache
+    # ARAS_POOL_MAXSIZE: maximum number of connections kept alive for each host
+    # ARAS_POOL_BLOCK: wait for a free connection instead of opening a new one when the pool is full
+    ARAS_POOL_CONNECTIONS = int(environ.get('ARAS_POOL_CONNECTIONS', 10))
+    ARAS_POOL_MAXSIZE = int(environ.get('ARAS_POOL_MAXSIZE', 20))
+    ARAS_POOL_BLOCK = env_bool('ARAS_POOL_BLOCK', False)
+    ARAS_KEEP_ALIVE = env_bool('ARAS_KEEP_ALIVE', True)
+    # Maximum number of requests sent at the same time to Aras when expanding the relationships of an item
+    ARAS_MAX_CONCURRENT_REQUESTS = int(environ.get('ARAS_MAX_CONCURRENT_REQUESTS', 8))
+    # Send the independent queries (shape metadata, relationships) as a single OData $batch request
+    ARAS_BATCH_ENABLED = env_bool('ARAS_BATCH_ENABLED', False)
+    # Retries of the requests reading Aras after a connection error or a 502, 503 or 504, waiting a random
+    #  time up to ARAS_BACKOFF_FACTOR seconds doubled on each retry, and at most ARAS_BACKOFF_MAX seconds
+    ARAS_RETRIES = int(environ.get('ARAS_RETRIES', 2))
+    ARAS_BACKOFF_FACTOR = float(environ.get('ARAS_BACKOFF_FACTOR', 0.5))
+    ARAS_BACKOFF_MAX = float(environ.get('ARAS_BACKOFF_MAX', 10))
+    # Fail the requests at once for ARAS_CIRCUIT_RESET_TIMEOUT seconds after ARAS_CIRCUIT_FAILURES
+    #  consecutive failures of Aras (0 to disable it), the cached documents of the items are served meanwhile
+    ARAS_CIRCUIT_FAILURES = int(environ.get('ARAS_CIRCUIT_FAILURES', 5))
+    ARAS_CIRCUIT_RESET_TIMEOUT = float(environ.get('ARAS_CIRCUIT_RESET_TIMEOUT', 30))
+    # Seconds to open a connection to Aras and to wait for each read of a response, the requests
+    #  timing out are retried and count as failures of the circuit
+    ARAS_CONNECT_TIMEOUT = float(environ.get('ARAS_CONNECT_TIMEOUT', 5))
+    ARAS_READ_TIMEOUT = float(environ.get('ARAS_READ_TIMEOUT', 60))
+    # Maximum number of users logged in at the same time, the least recently used is logged out first
+    ARAS_TOKEN_STORE_SIZE = int(environ.get('ARAS_TOKEN_STORE_SIZE', 1024))
+    # Seconds before the expiry of a token when it is refreshed in the background with the refresh token of its user
+    ARAS_TOKEN_REFRESH_MARGIN = int(environ.get('ARAS_TOKEN_REFRESH_MARGIN', 60))
+    # Send the independent queries concurrently from an asyncio event loop (pip install aras-oslc-api[async]),
+    #  with up to ARAS_ASYNC_MAX_REQUESTS requests in flight by process
+    ARAS_ASYNC_ENABLED = env_bool('ARAS_ASYNC_ENABLED', False)
+    ARAS_ASYNC_MAX_REQUESTS = int(environ.get('ARAS_ASYNC_MAX_REQUESTS', 200))
+    # Threads running the views when the API is served by an ASGI server (aras_oslc_asgi.py)
+    ASGI_WORKERS = int(environ.get('ASGI_WORKERS', 32))
+
+    # Write the Turtle and N-Triples responses of the containers while the items are read from Aras
+    STREAMING_RESPONSES = env_bool('STREAMING_RESPONSES', True)
+
+    # Generated ResourceShapes cache, maximum number of shapes and seconds before rebuilding them
+    SHAPE_CACHE_SIZE = int(environ.get('SHAPE_CACHE_SIZE', 256))
+    SHAPE_CACHE_TTL = int(environ.get('SHAPE_CACHE_TTL', 600))
+    # Seconds before an ItemType that was not found on Aras is looked up again
+    SHAPE_CACHE_NEGATIVE_TTL = int(environ.get('SHAPE_CACHE_NEGATIVE_TTL', 30))
+
+    # Index of the versionable ItemTypes, seconds between background refreshes and before discarding it
+    VERSIONABLE_REFRESH_INTERVAL = int(environ.get('VERSIONABLE_REFRESH_INTERVAL', 300))
+    VERSIONABLE_TTL = int(environ.get('VERSIONABLE_TTL', 3600))
+    # Seconds before an ItemType missing from the index (created since, or unknown) is looked up again
+    VERSIONABLE_LOOKUP_TTL = int(environ.get('VERSIONABLE_LOOKUP_TTL', 60))
+
+    # ItemTypes catalogue and ServiceProvider documents, seconds between background refreshes and before discarding them
+    ITEM_TYPES_REFRESH_INTERVAL = int(environ.get('ITEM_TYPES_REFRESH_INTERVAL', 60))
+    ITEM_TYPES_TTL = int(environ.get('ITEM_TYPES_TTL', 3600))
+
+    # Versions of the components shared by their configurations and streams, seconds before reading them again
+    VERSION_HISTORY_TTL = int(environ.get('VERSION_HISTORY_TTL', 60))
+
+    # Snapshot on disk of the ItemTypes and ResourceShapes loaded at start, and seconds between its updates
+    METADATA_SNAPSHOT = environ.get('METADATA_SNAPSHOT', os.path.join('data', 'metadata_snapshot.json.gz'))
+    METADATA_SNAPSHOT_INTERVAL = int(environ.get('METADATA_SNAPSHOT_INTERVAL', 300))
+
+    # Probe the generation of the items to answer with ETag and Last-Modified and to support the conditional requests
+    CONDITIONAL_REQUESTS = env_bool('CONDITIONAL_REQUESTS', True)
+
+    # Serialized versions of the items (memory://, file:///path/to/directory or redis://host:port/db)
+    RESPONSE_CACHE_URL = environ.get('RESPONSE_CACHE_URL', 'memory://')
+    RESPONSE_CACHE_SIZE = int(environ.get('RESPONSE_CACHE_SIZE', 1024))
+    RESPONSE_CACHE_TTL = int(environ.get('RESPONSE_CACHE_TTL', 86400))
+
+    # Export of all the items of an ItemType, number of items of each page and pages read at the same time from Aras
+    EXPORT_PAGE_SIZE = int(environ.get('EXPORT_PAGE_SIZE', 100))
+    EXPORT_CONCURRENT_PAGES = int(environ.get('EXPORT_CONCURRENT_PAGES', 4))
+
 
 class ProductionConfig(BaseConfig):
     FLASK_ENV = 'production'
@@ -41,6 +130,11 @@ class DevelopmentConfig(BaseConfig):
 class TestingConfig(BaseConfig):
     DEBUG = True
     TESTING = True
+    METADATA_SNAPSHOT = environ.get('METADATA_SNAPSHOT')
+    OAUTH_EAGER_DISCOVERY = env_bool('OAUTH_EAGER_DISCOVERY', False)
+    OPENID_CONFIGURATION_FILE = environ.get('OPENID_CONFIGURATION_FILE')
+    ARAS_RETRIES = int(environ.get('ARAS_RETRIES', 0))
+    ARAS_CIRCUIT_FAILURES = int(environ.get('ARAS_CIRCUIT_FAILURES', 0))
 
 
 environments = {
@@ -0,0 +1,455 @@
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Registry of the named caches, used by the cache administration endpoints
+caches = OrderedDict()
+
+# Value stored by get_or_load when its loader found nothing, kept for the negative_ttl of the cache
+_NOT_FOUND = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a time to live.
+
+    :param name: name used to register the cache and to report its statistics
+    :param maxsize: maximum number of entries, the least recently used is evicted first
+    :param ttl: seconds an entry is kept before it is considered expired
+    :param refresh: seconds after which get_or_load keeps serving an entry
+                    while it is reloaded in the background, None to disable it
+    :param negative_ttl: seconds get_or_load keeps returning None for a key its loader
+                         did not find, None to call the loader on every access
+    :param timer: clock used to expire the entries
+    """
+
+    def __init__(self, name: str, maxsize: int = 128, ttl: float = 300, refresh: float = None,
+                 negative_ttl: float = None, timer=time.monotonic):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.refresh = refresh
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+        self.__timer = timer
+        self.__data = OrderedDict()
+        self.__lock = threading.RLock()
+        self.__loading = dict()
+        self.__refreshing = set()
+        self.__stale = set()
+
+        caches[name] = self
+
+    def configure(self, maxsize: int = None, ttl: float = None, refresh: float = None, negative_ttl: float = None):
+        with self.__lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            if refresh is not None:
+                self.refresh = refresh
+            if negative_ttl is not None:
+                self.negative_ttl = negative_ttl
+
+            self.__evict()
+
+    def __lookup(self, key, count: bool = True) -> tuple:
+        """Return a tuple (found, value, age) for the key."""
+        with self.__lock:
+            entry = self.__data.get(key)
+            if entry is not None:
+                stored_at, value, ttl = entry
+                age = self.__timer() - stored_at
+                if age < self.__ttl(ttl):
+                    self.__data.move_to_end(key)
+                    if count:
+                        self.hits += 1
+                    return True, value, age
+
+                del self.__data[key]
+                self.__stale.discard(key)
+
+            if count:
+                self.misses += 1
+
+            return False, None, None
+
+    def __ttl(self, ttl: float) -> float:
+        # The entries stored with their own ttl never outlive the ones of the cache
+        return self.ttl if ttl is None else min(ttl, self.ttl)
+
+    def __evict(self):
+        while len(self.__data) > max(self.maxsize, 0):
+            key, _ = self.__data.popitem(last=False)
+            self.__stale.discard(key)
+            logger.debug(f'Evicting from the {self.name} cache: {key}')
+
+    def get(self, key, default=None):
+        found, value, _ = self.__lookup(key)
+        return value if found and value is not _NOT_FOUND else default
+
+    def set(self, key, value, ttl: float = None):
+        """Store the value of the key, kept for the given ttl instead of the one of the cache (e.g. a shorter one)."""
+        with self.__lock:
+            self.__data[key] = (self.__timer(), value, ttl)
+            self.__data.move_to_end(key)
+            self.__stale.discard(key)
+            self.__evict()
+
+    def preload(self, key, value):
+        """
+        Add an entry read from elsewhere (e.g. a snapshot on disk) unless the key is cached,
+        get_or_load serves it and loads it again in the background on its first access.
+        """
+        with self.__lock:
+            if key in self.__data:
+                return
+
+            self.__data[key] = (self.__timer(), value, None)
+            self.__stale.add(key)
+            self.__evict()
+
+    def items(self) -> list:
+        """Return the pairs (key, value) of the entries that have not expired."""
+        with self.__lock:
+            now = self.__timer()
+            return [(key, value) for key, (stored_at, value, ttl) in self.__data.items()
+                    if value is not _NOT_FOUND and now - stored_at < self.__ttl(ttl)]
+
+    def get_or_load(self, key, loader, ttl: float = None):
+        """
+        Return the cached value of the key or load it with the loader,
+        concurrent misses on the same key only call the loader once.
+        None is returned and cached for the negative_ttl of the cache only,
+        the values loaded are kept for the given ttl or for the one of the cache.
+
+        When the refresh interval of the cache has passed, the cached value
+        is still returned and the loader is called from a background thread.
+        """
+        found, value, age = self.__lookup(key)
+        if found:
+            if value is _NOT_FOUND:
+                return None
+            if key in self.__stale or (self.refresh is not None and age >= self.refresh):
+                self.__refresh_in_background(key, loader, ttl)
+            return value
+
+        with self.__lock:
+            key_lock = self.__loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                found, value, _ = self.__lookup(key, count=False)
+                if found:
+                    return None if value is _NOT_FOUND else value
+
+                value = loader()
+                if value is not None:
+                    self.set(key, value, ttl)
+                elif self.negative_ttl:
+                    self.set(key, _NOT_FOUND, self.negative_ttl)
+
+                return value
+            finally:
+                with self.__lock:
+                    self.__loading.pop(key, None)
+
+    def __refresh_in_background(self, key, loader, ttl: float = None):
+        with self.__lock:
+            if key in self.__refreshing:
+                return
+            self.__refreshing.add(key)
+
+        def refresh():
+            try:
+                value = loader()
+                if value is not None:
+                    self.set(key, value, ttl)
+                    with self.__lock:
+                        self.refreshes += 1
+            except Exception as e:
+                # Keep serving the cached value, the refresh is retried on the next access
+                logger.warning(f'Could not refresh the {self.name} cache entry {key}: {e}')
+            finally:
+                with self.__lock:
+                    self.__refreshing.discard(key)
+
+        logger.debug(f'Refreshing in background the {self.name} cache entry: {key}')
+        # The loader runs with the context of the access that triggered it, e.g. the token of its user
+        threading.Thread(target=contextvars.copy_context().run, args=(refresh,), name=f'{self.name}-refresh',
+                         daemon=True).start()
+
+    def invalidate(self, key=None, predicate=None) -> int:
+        """
+        Remove the given key, the keys matching the predicate or
+        every entry when neither is passed.
+
+        :return: the number of removed entries
+        """
+        with self.__lock:
+            if key is not None:
+                keys = [key] if key in self.__data else []
+            elif predicate is not None:
+                keys = [k for k in self.__data if predicate(k)]
+            else:
+                keys = list(self.__data)
+
+            for k in keys:
+                del self.__data[k]
+                self.__stale.discard(k)
+
+            return len(keys)
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+            self.__stale.clear()
+            self.hits = 0
+            self.misses = 0
+            self.refreshes = 0
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                'name': self.name,
+                'size': len(self.__data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'refresh': self.refresh,
+                'negative_ttl': self.negative_ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+            }
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__data)
+
+    def __contains__(self, key):
+        found, value, _ = self.__lookup(key, count=False)
+        return found and value is not _NOT_FOUND
+
+
+class DiskCache:
+    """
+    Cache of bytes stored as files of a local directory, shared by the
+    workers of the same host and kept between restarts.
+
+    Each file starts with a line containing the key as JSON, so the keys
+    are tuples of strings and the entries can be invalidated by predicate.
+    """
+
+    def __init__(self, name: str, directory: str, ttl: float = None, timer=time.time):
+        self.name = name
+        self.directory = directory
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self.__timer = timer
+        self.__lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        caches[name] = self
+
+    def __path(self, key) -> str:
+        return os.path.join(self.directory, hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest())
+
+    def __count(self, hit: bool):
+        with self.__lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        path = self.__path(key)
+        try:
+            if self.ttl is not None and self.__timer() - os.path.getmtime(path) >= self.ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+
+            with open(path, 'rb') as file:
+                file.readline()
+                value = file.read()
+        except OSError:
+            self.__count(False)
+            return default
+
+        self.__count(True)
+        return value
+
+    def set(self, key, value: bytes):
+        # Write to a temporary file first, so the readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(json.dumps(key).encode('utf-8') + b'\n')
+            file.write(value)
+        os.replace(tmp_path, self.__path(key))
+
+    def __entries(self):
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith('.tmp'):
+                continue
+            path = os.path.join(self.directory, file_name)
+            try:
+                with open(path, 'rb') as file:
+                    yield tuple(json.loads(file.readline())), path
+            except (OSError, ValueError):
+                continue
+
+    def invalidate(self, key=None, predicate=None) -> int:
+        if key is not None:
+            paths = [self.__path(key)]
+        else:
+            paths = [path for k, path in self.__entries() if predicate is None or predicate(k)]
+
+        invalidated = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                invalidated += 1
+            except OSError:
+                pass
+
+        return invalidated
+
+    def clear(self):
+        self.invalidate()
+        with self.__lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                'name': self.name,
+                'size': sum(1 for _ in self.__entries()),
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'backend': 'disk',
+            }
+
+
+class RedisCache:
+    """
+    Cache of bytes stored on a Redis compatible server, shared by all the workers.
+
+    :param client: client with the get, set, delete and scan_iter methods of redis.Redis
+    :param prefix: prefix of the Redis keys, followed by the key as JSON
+    """
+
+    def __init__(self, name: str, client, ttl: float = None, prefix: str = 'aras-oslc:'):
+        self.name = name
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix + name + ':'
+        self.hits = 0
+        self.misses = 0
+
+        self.__lock = threading.Lock()
+
+        caches[name] = self
+
+    def __key(self, key) -> str:
+        return self.prefix + json.dumps(key)
+
+    def get(self, key, default=None):
+        value = self.client.get(self.__key(key))
+        with self.__lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return default if value is None else value
+
+    def set(self, key, value: bytes):
+        self.client.set(self.__key(key), value, ex=int(self.ttl) if self.ttl else None)
+
+    def __keys(self):
+        for redis_key in self.client.scan_iter(match=self.prefix + '*'):
+            if isinstance(redis_key, bytes):
+                redis_key = redis_key.decode('utf-8')
+            yield redis_key
+
+    def invalidate(self, key=None, predicate=None) -> int:
+        if key is not None:
+            redis_keys = [self.__key(key)]
+        else:
+            redis_keys = [k for k in self.__keys()
+                          if predicate is None or predicate(tuple(json.loads(k[len(self.prefix):])))]
+
+        return self.client.delete(*redis_keys) if redis_keys else 0
+
+    def clear(self):
+        self.invalidate()
+        with self.__lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {
+                'name': self.name,
+                'size': sum(1 for _ in self.__keys()),
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'backend': 'redis',
+            }
+
+
+def create_cache(name: str, url: str = None, maxsize: int = 128, ttl: float = None):
+    """
+    Create the cache of the backend given by the URL:
+    memory:// (default) for an in-process LRU, file:///path/to/directory
+    for a local directory, or redis://host:port/db for a Redis server.
+    """
+    parsed = urlparse(url or 'memory://')
+
+    if parsed.scheme == 'memory':
+        return TTLCache(name, maxsize=maxsize, ttl=ttl if ttl is not None else float('inf'))
+    elif parsed.scheme == 'file':
+        return DiskCache(name, parsed.path, ttl=ttl)
+    elif parsed.scheme in ('redis', 'rediss', 'unix'):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError(f'The redis package is required for the {name} cache at {url}: '
+                              f'pip install aras-oslc-api[redis]')
+
+        return RedisCache(name, redis.Redis.from_url(url), ttl=ttl)
+
+    raise ValueError(f'Unknown backend for the {name} cache: {url}')
+
+
+def normalize_item_type(item_type: str) -> str:
+    # ItemTypes are received either with whitespaces or with dots on the URLs
+    return re.sub(' ', '.', unquote(item_type))
+
+
+def matches_item_type(item_type: str):
+    """Return a predicate that matches the cache keys (tuples) that contain the given ItemType."""
+    item_type = normalize_item_type(item_type)
+
+    def predicate(key) -> bool:
+        parts = key if isinstance(key, tuple) else (key,)
+        return any(isinstance(part, str) and normalize_item_type(part) == item_type for part in parts)
+
+    return predicate
@@ -1,10 +1,33 @@
 import re
-from urllib.parse import unquote
+from urllib.parse import quote, unquote
 
 from rdflib import Graph
 
+from oslc_api.aras.properties import get_property_index
 from oslc_api.auth import aras_api
 
+# IIS rejects the query strings longer than 2048 characters with its default request filtering
+MAX_URL_LENGTH = 2000
+
+
+def batch():
+    # Queries issued inside the with block are sent together as an OData $batch or concurrently (when enabled)
+    return aras_api.batch()
+
+
+def batch_enabled() -> bool:
+    return aras_api.batch_enabled or aras_api.async_enabled
+
+
+def get_expand_options(resource_shapes_graph: Graph, config_id: bool = False) -> list:
+    # The references to other items are expanded with their config_id, the config_id itself only once
+    expandable = get_property_index(resource_shapes_graph).expandable
+    options = [prop + '($expand=config_id)' for prop in expandable]
+    if config_id and 'config_id' not in expandable:
+        options.insert(0, 'config_id')
+
+    return options
+
 
 def query_expanded_item(source_base_url: str, item_type: str,
                         item_id: str, config_id: str, resource_shapes_graph: Graph):
@@ -13,32 +36,15 @@ def query_expanded_item(source_base_url: str, item_type: str,
     if item_id:
         query_url += '(\'' + item_id + '\')'
 
-    # Query and iterate through the direct relationships of an item and set the query_url to expand all of them
-    qres = resource_shapes_graph.query(
-        """SELECT ?prop
-           WHERE {
-              ?s oslc:name ?prop.
-              ?s oslc:occurs ?occurs.
-              ?s oslc:propertyDefinition ?def.
-              FILTER(?occurs IN (oslc:Exactly-one, oslc:Zero-or-one))
-           }""")
-
-    if len(qres):
-        query_url += '?$expand='
-
-    i = 0
-    for row in qres:
-        # Remove OSLC Specific Properties
-        prop = row['prop']
-        if str(prop) != ('oslc_component' or 'oslc_version_id' or 'dcterms_is_version_of'):
-            query_url += prop + '($expand=config_id)'
-            if i != len(qres) - 1:
-                query_url += ', '
-
-        i += 1
+    # Expand the direct relationships of the item, read from the properties of the resource shape, and
+    #  the config_id of a version requested by its id to check that it belongs to the config_id
+    expandable = get_expand_options(resource_shapes_graph, config_id=bool(item_id))
+    if expandable:
+        query_url += '?$expand=' + ', '.join(expandable)
 
     if not item_id:
-        query_url += '&$filter=config_id eq \'' + config_id + '\''
+        query_url += '&' if expandable else '?'
+        query_url += '$filter=config_id eq \'' + config_id + '\''
 
     # Request Item from the API and save it as JSON
     item_request = aras_api.get_resource(query_url)
@@ -46,6 +52,18 @@ def query_expanded_item(source_base_url: str, item_type: str,
     return item_request
 
 
+def query_expanded_items(source_base_url: str, item_type: str, resource_shapes_graph: Graph,
+                         page_size: int, page_no: int, stream: bool = False):
+    # A page of the items with the same expansion of query_expanded_item, ordered by id so the pages are stable
+    expandable = get_expand_options(resource_shapes_graph, config_id=True)
+    query_url = source_base_url + unquote(re.sub('\\.', ' ', item_type)) + '?$expand=' + ', '.join(expandable)
+    query_url += '&$orderby=id&$top=' + str(page_size) + '&$skip=' + str(page_size * (page_no - 1))
+
+    items_request = aras_api.get_resource(query_url, stream=stream)
+
+    return items_request
+
+
 def query_relation_properties(source_base_url: str, prop: str, item_id: str):
     # Query the API to get the related items and then add them as OSLC properties for the item resource
     query = source_base_url + unquote(
@@ -56,26 +74,76 @@ def query_relation_properties(source_base_url: str, prop: str, item_id: str):
     return item_request
 
 
-def query_item_types_list(source_base_url: str):
+def query_items_relation_properties(source_base_url: str, prop: str, item_ids: list, stream: bool = False):
+    # The related items of a page of items at once, the source_id tells which item they belong to
+    query = source_base_url + unquote(re.sub('\\.', ' ', prop)) + '?$filter=' + ' or '.join(
+        'source_id/id eq \'' + item_id + '\'' for item_id in item_ids) + '&$expand=config_id, source_id($select=id)'
+
+    item_request = aras_api.get_resource(query, stream=stream)
+
+    return item_request
+
+
+def chunk_relation_item_ids(source_base_url: str, prop: str, item_ids: list, max_url_length: int = MAX_URL_LENGTH):
+    """
+    Split the ids of the items in the fewest chunks whose query_items_relation_properties URL,
+    once percent-encoded, stays under max_url_length.
+    """
+    def encoded_length(text: str) -> int:
+        return len(quote(text, safe="/:?&=$(),'"))
+
+    length = encoded_length(source_base_url + unquote(re.sub('\\.', ' ', prop)) +
+                            '?$filter=&$expand=config_id, source_id($select=id)')
+    chunk = list()
+    chunk_length = length
+    for item_id in item_ids:
+        id_length = encoded_length(' or source_id/id eq \'' + item_id + '\'')
+        if chunk and chunk_length + id_length > max_url_length:
+            yield chunk
+            chunk = list()
+            chunk_length = length
+        chunk.append(item_id)
+        chunk_length += id_length
+
+    if chunk:
+        yield chunk
+
+
+def query_item_types_list(source_base_url: str, stream: bool = False):
     # Request the Item Types from the API and save it as JSON
 
-    item_types_request = aras_api.get_resource(source_base_url + 'ItemType?$select=name')
+    item_types_request = aras_api.get_resource(source_base_url + 'ItemType?$select=name', stream=stream)
 
     return item_types_request
 
 
-def query_item_instances(source_base_url: str, item_type: str, page_size=None, page_no=None):
+def query_item_instances(source_base_url: str, item_type: str, page_size=None, page_no=None, stream: bool = False,
+                         after: str = None):
+    # The number of rows matching the query tells whether a page is the last one
     query_string = source_base_url + unquote(
-        re.sub('\\.', ' ', item_type)) + '?$select=keyed_name, id&$expand=config_id'
-
-    if page_size:
-        query_string += '&$top=' + str(page_size)
-        skip = page_size * (page_no - 1)
-        query_string += '&$skip=' + str(skip)
+        re.sub('\\.', ' ', item_type)) + '?$select=keyed_name, id&$expand=config_id&$count=true'
+
+    if page_size or after:
+        # The pages are ordered by id, the page after a given id is found by the index instead of skipping the rows
+        query_string += '&$orderby=id'
+        if page_size:
+            query_string += '&$top=' + str(page_size)
+        if after:
+            query_string += '&$filter=id gt \'' + after + '\''
+        else:
+            skip = page_size * (page_no - 1)
+            query_string += '&$skip=' + str(skip)
 
     # Request the Item Instance from the API and save it as JSON
 
-    items_request = aras_api.get_resource(query_string)
+    items_request = aras_api.get_resource(query_string, stream=stream)
+
+    return items_request
+
+
+def query_next_link(next_link: str, stream: bool = False):
+    # Follow the @odata.nextLink returned by Aras for the next page of a query
+    items_request = aras_api.get_resource(next_link, stream=stream)
 
     return items_request
 
@@ -84,27 +152,28 @@ def query_item_generations(source_base_url: str, item_type: str, config_id: str)
     body = '{ \"config_id\" : \"' + config_id + '\" }'
     # Request the Item Instance from the API and save it as JSON
 
-    items_request = aras_api.get_resource(source_base_url + unquote(re.sub('\\.', ' ',
-                                                                            item_type)) +
-                                          '?$select=keyed_name, id&$filter=generation gt \'0\'', data=body)
+    items_request = aras_api.get_resource(source_base_url + unquote(re.sub('\\.', ' ', item_type)) +
+                                          '?$select=keyed_name, id, generation, modified_on, created_on, is_current'
+                                          '&$filter=generation gt \'0\'', data=body)
 
     return items_request
 
 
-def query_item_type_properties(source_base_url: str, item_type: str):
+def query_item_type_properties(source_base_url: str, item_type: str, stream: bool = False):
     # Request the ItemTypes PROPERTIES from the API and save it as JSON
 
     properties_request = aras_api.get_resource(
-        source_base_url + 'Property?$filter=source_id/name eq \'' + unquote(re.sub('\\.', ' ', item_type)) + '\'')
+        source_base_url + 'Property?$filter=source_id/name eq \'' + unquote(re.sub('\\.', ' ', item_type)) + '\'',
+        stream=stream)
 
     return properties_request
 
 
-def query_item_type_relationships(source_base_url: str, item_type: str):
+def query_item_type_relationships(source_base_url: str, item_type: str, stream: bool = False):
     # Request the ItemTypes RelationshipType from the API and save it as JSON
     relationships_request = aras_api.get_resource(
         source_base_url + 'RelationshipType?$filter=source_id/name eq \'' + unquote(
-            re.sub('\\.', ' ', item_type)) + '\'')
+            re.sub('\\.', ' ', item_type)) + '\'', stream=stream)
 
     return relationships_request
 
@@ -117,6 +186,13 @@ def get_is_versionable(source_base_url: str, item_type: str):
     return request
 
 
+def query_item_types_versionable(source_base_url: str, stream: bool = False):
+    # Request the versionable flag of all the ItemTypes at once
+    request = aras_api.get_resource(source_base_url + 'ItemType?$select=name, is_versionable', stream=stream)
+
+    return request
+
+
 def get_current_item_id(source_base_url: str, item_type: str, config_id: str):
     body = '{ \"config_id\" : \"' + config_id + '\" }'
     request = aras_api.get_resource(
@@ -137,3 +213,16 @@ def get_validate_config_id(source_base_url: str, item_type: str, config_id: str)
     request = aras_api.get_resource(source_base_url + unquote(re.sub('\\.', ' ', item_type)) + '?$select=id, keyed_name', data=body)
 
     return request
+
+
+def query_item_version(source_base_url: str, item_type: str, item_id: str = None, config_id: str = None):
+    # Request only the fields that change with each edit of the item, the given version or the current one
+    query_url = source_base_url + unquote(re.sub('\\.', ' ', item_type))
+    if item_id:
+        query_url += '(\'' + item_id + '\')?$select=id, generation, modified_on, created_on'
+    else:
+        query_url += '?$select=id, generation, modified_on, created_on&$filter=config_id eq \'' + config_id + '\''
+
+    request = aras_api.get_resource(query_url)
+
+    return request
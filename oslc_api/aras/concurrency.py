@@ -0,0 +1,80 @@
+import contextvars
+import itertools
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of requests sent at the same time to Aras by a single fan-out
+max_workers = 8
+
+
+def configure(workers: int = None):
+    global max_workers
+    if workers:
+        max_workers = workers
+
+
+def in_context(function):
+    """
+    Wrap the function called from the threads of a pool so it sees the context
+    variables of the caller, e.g. the access token of the user being served.
+    """
+    context = contextvars.copy_context()
+
+    def call(*args, **kwargs):
+        return context.copy().run(function, *args, **kwargs)
+
+    return call
+
+
+def fan_out(function, items: list) -> list:
+    """
+    Call the function for each item using a bounded pool of threads.
+
+    The results are returned in the same order of the items, so they can be
+    merged deterministically by the caller, and the first exception raised
+    by a call is raised again.
+    """
+    items = list(items)
+    if len(items) <= 1 or max_workers <= 1:
+        return [function(item) for item in items]
+
+    workers = min(max_workers, len(items))
+    logger.debug(f'Fan-out of {len(items)} calls on {workers} workers')
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='aras-fan-out') as executor:
+        return list(executor.map(in_context(function), items))
+
+
+def prefetch(function, items, workers: int = None):
+    """
+    Call the function for each item of a (possibly endless) iterable using a bounded
+    pool of threads, keeping up to workers calls in flight ahead of the consumer.
+
+    The results are yielded in the same order of the items, the calls not started
+    yet are cancelled once the consumer stops iterating.
+    """
+    workers = workers or max_workers
+    items = iter(items)
+    function = in_context(function)
+    if workers <= 1:
+        for item in items:
+            yield function(item)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='aras-prefetch')
+    pending = deque(executor.submit(function, item) for item in itertools.islice(items, workers))
+    try:
+        while pending:
+            result = pending.popleft().result()
+            # Keep the pool busy while the consumer handles the result
+            for item in itertools.islice(items, 1):
+                pending.append(executor.submit(function, item))
+
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
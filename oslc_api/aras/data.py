@@ -1,5 +1,12 @@
+import codecs
 import json
 import os
+import re
+
+# Size of the chunks read from the responses when parsing them incrementally
+CHUNK_SIZE = 16 * 1024
+
+NOT_WHITESPACE = re.compile(r'[^ \t\n\r]')
 
 
 def load_from_json_file(file_name: str) -> dict:
@@ -9,3 +16,133 @@ def load_from_json_file(file_name: str) -> dict:
             data = json.load(json_file)
 
     return data
+
+
+class _JSONReader:
+    """Reads the JSON values of a document received in chunks of bytes, keeping only the unread part in memory."""
+
+    def __init__(self, chunks):
+        self.__chunks = iter(chunks)
+        self.__decoder = codecs.getincrementaldecoder('utf-8')()
+        self.__json = json.JSONDecoder()
+        self.__buffer = ''
+        self.__pos = 0
+        self.__eof = False
+
+    def __read(self) -> bool:
+        if self.__eof:
+            return False
+
+        for chunk in self.__chunks:
+            if chunk:
+                self.__buffer = self.__buffer[self.__pos:] + self.__decoder.decode(chunk)
+                self.__pos = 0
+                return True
+
+        self.__eof = True
+        self.__buffer = self.__buffer[self.__pos:] + self.__decoder.decode(b'', final=True)
+        self.__pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next character that is not a whitespace, or an empty string at the end of the document."""
+        while True:
+            match = NOT_WHITESPACE.search(self.__buffer, self.__pos)
+            if match:
+                self.__pos = match.start()
+                return self.__buffer[self.__pos]
+            self.__pos = len(self.__buffer)
+            if not self.__read():
+                return ''
+
+    def expect(self, characters: str) -> str:
+        char = self.peek()
+        if not char or char not in characters:
+            raise ValueError(f'Expecting one of {characters!r} at the position {self.__pos}, found {char!r}')
+
+        self.__pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.__json.raw_decode(self.__buffer, self.__pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.__buffer) or self.__eof:
+                    self.__pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.__eof:
+                    raise
+
+            if not self.__read():
+                raise ValueError('Unexpected end of the JSON document')
+
+
+def select_fields(entry: dict, fields) -> dict:
+    """Keep only the given fields of the entry, the nested fields are passed as OData paths (e.g. config_id/id)."""
+    selected = dict()
+    for field in fields:
+        source, target = entry, selected
+        *parents, name = field.split('/')
+        for parent in parents:
+            source = source.get(parent) if isinstance(source, dict) else None
+            target = target.setdefault(parent, dict())
+        if isinstance(source, dict) and name in source:
+            target[name] = source[name]
+
+    return selected
+
+
+def iter_values(chunks, fields=None, annotations: dict = None):
+    """
+    Parse incrementally an OData response received in chunks of bytes and yield
+    the entries of its value array one by one, so that the whole response is
+    never held in memory.
+
+    :param chunks: iterable with the bytes of the response
+    :param fields: when passed, only these fields of each entry are kept
+    :param annotations: dict filled with the other members of the response (e.g. @odata.count)
+    """
+    reader = _JSONReader(chunks)
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    while True:
+        name = reader.value()
+        reader.expect(':')
+
+        if name == 'value' and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    entry = reader.value()
+                    yield select_fields(entry, fields) if fields else entry
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            value = reader.value()
+            if annotations is not None:
+                annotations[name] = value
+
+        if reader.expect(',}') == '}':
+            break
+
+
+def iter_response_values(response, fields=None, annotations: dict = None):
+    """
+    Yield the entries of the value array of a successful response of the
+    ARAS API while its body is being read, the response is closed at the end.
+    """
+    if not response or response.status_code != 200:
+        return
+
+    try:
+        yield from iter_values(response.iter_content(CHUNK_SIZE), fields, annotations)
+    finally:
+        response.close()
@@ -0,0 +1,41 @@
+import base64
+import binascii
+import json
+
+from werkzeug.exceptions import BadRequest
+
+
+def encode_page_token(after: str = None, link: str = None) -> str:
+    """
+    Return the opaque continuation token of the next page: the OData nextLink returned
+    by Aras (server-driven paging) or the id of the last item of the page (keyset paging).
+    """
+    token = {'link': link} if link else {'after': after}
+    return base64.urlsafe_b64encode(json.dumps(token, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_page_token(token: str, source_base_uri: str) -> dict:
+    """
+    Read a continuation token returned by encode_page_token.
+
+    :return: a dict with the key 'after' or 'link'
+    :raise BadRequest: if the token is not valid or the link does not point to the Aras OData API
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise BadRequest(f'The page token {token} is not valid')
+
+    if not isinstance(data, dict):
+        raise BadRequest(f'The page token {token} is not valid')
+
+    # Only follow the links to the same OData API, the token is sent back by the clients
+    link = data.get('link')
+    if isinstance(link, str) and link.startswith(source_base_uri):
+        return {'link': link}
+
+    after = data.get('after')
+    if isinstance(after, str) and after and "'" not in after:
+        return {'after': after}
+
+    raise BadRequest(f'The page token {token} is not valid')
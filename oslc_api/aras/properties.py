@@ -1,3 +1,16 @@
+import re
+import threading
+import weakref
+
+from rdflib import Graph
+
+from oslc_api.aras.namespaces import OSLC
+
+# Properties added to every ResourceShape by the adaptor, they are not stored on Aras
+OSLC_PROPERTIES = ('oslc_component', 'oslc_version_id', 'dcterms_is_version_of')
+
+SINGLE_OCCURS = (OSLC['Exactly-one'], OSLC['Zero-or-one'])
+
 
 # Create a Class for RDF Properties
 class RDFProperty:
@@ -6,3 +19,75 @@ class RDFProperty:
         self.dataType = datatype
         self.dataSource = datasource
         self.required = required
+
+
+# Property of a ResourceShape graph
+class ShapeProperty:
+    def __init__(self, name, occurs, value_type=None, property_definition=None):
+        self.name = name
+        self.occurs = occurs
+        self.value_type = value_type
+        self.property_definition = property_definition
+
+        # ItemType of the related items, taken from the URL of the ResourceShape of the definition
+        self.target = None
+        if property_definition:
+            target_search = re.search('(.*?)api/oslc/(.*?)/resourceShape', property_definition, re.IGNORECASE)
+            if target_search:
+                self.target = target_search.group(2)
+
+    def __repr__(self):
+        return f'<ShapeProperty {self.name} {self.occurs}>'
+
+
+class PropertyIndex:
+    """
+    Properties of a ResourceShape graph by name, read once from the graph
+    so that the items are built without querying it.
+    """
+
+    def __init__(self, graph: Graph):
+        properties = dict()
+        for s, name in graph.subject_objects(OSLC.name):
+            properties[str(name)] = ShapeProperty(str(name),
+                                                  graph.value(s, OSLC.occurs),
+                                                  graph.value(s, OSLC.valueType),
+                                                  graph.value(s, OSLC.propertyDefinition))
+
+        self.__by_name = properties
+        self.properties = tuple(properties[name] for name in sorted(properties))
+
+        # Exactly-one and Zero-or-one properties, with a value on the item or a reference to another item
+        self.single = tuple(p for p in self.properties if p.occurs in SINGLE_OCCURS)
+
+        # References to other items that are expanded when the item is queried
+        self.expandable = tuple(p.name for p in self.single
+                                if p.property_definition and p.name not in OSLC_PROPERTIES)
+
+        # Zero-or-many relationships, queried apart for each item
+        self.relationships = tuple(p for p in self.properties
+                                   if p.occurs == OSLC['Zero-or-many'] and p.property_definition and
+                                   p.name not in OSLC_PROPERTIES)
+
+    def get(self, name: str) -> ShapeProperty:
+        return self.__by_name.get(name)
+
+    def __len__(self):
+        return len(self.properties)
+
+
+property_indexes = weakref.WeakKeyDictionary()
+property_indexes_lock = threading.Lock()
+
+
+def get_property_index(graph: Graph) -> PropertyIndex:
+    """Return the PropertyIndex of the ResourceShape graph, it is built once for each graph."""
+    with property_indexes_lock:
+        index = property_indexes.get(graph)
+
+    if index is None:
+        index = PropertyIndex(graph)
+        with property_indexes_lock:
+            property_indexes[graph] = index
+
+    return index
@@ -1,128 +1,149 @@
+import hashlib
 import logging
 import re
-from collections import OrderedDict
-from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse, unquote
+from collections.abc import Mapping
+from types import MappingProxyType
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse, unquote, urljoin
 
 from rdflib import Graph, DCTERMS, URIRef, RDF, BNode, Literal, RDFS
 from rdflib.resource import Resource
 
-from oslc_api.rest_api.aras import validate_item_id, validate_config_id
+from oslc_api.aras.cache import TTLCache
 from oslc_api.aras.namespaces import OSLC, ARAS, OSLC_CONFIG, LDP
+from oslc_api.aras.paging import encode_page_token
 from oslc_api.rest_api.aras import load_item_types, load_items, load_resource_shape, get_item_rdf, \
-    load_streams
+    load_version_history, iter_export_graphs, VERSION_FIELDS
+from oslc_api.rest_api.writers import serialize, chunked, gzipped
 
 logger = logging.getLogger(__name__)
 
+# ItemTypes catalogue by source base URI, shared by all the requests as a read-only mapping
+#  and reloaded in background once the refresh interval passed
+item_types_cache = TTLCache('item_types', maxsize=16, ttl=3600, refresh=60)
 
-class OSLCResource:
-    __instance = None
-    __graph = None
-    __item_types = OrderedDict()
-
-    __source_base_uri = None
-    __access_token = None
-
-    def __new__(cls, source_base_uri: str = None, access_token: str = None, *args, **kwargs):
-        if not cls.__instance:
-            cls.__instance = super(OSLCResource, cls).__new__(cls, *args, **kwargs)
-            cls.__init_graph()
+# Serialized ServiceProvider documents by (source base URI, url, representation),
+#  stored with the catalogue they were built from so they are rebuilt when it is reloaded
+service_provider_cache = TTLCache('service_provider', maxsize=64, ttl=3600)
 
-            cls.__source_base_uri = source_base_uri
-            cls.__access_token = access_token
 
-        return cls.__instance
-
-    @classmethod
-    def __init_graph(cls):
-        cls.__graph = Graph()
-        cls.__graph.bind('oslc', OSLC)
-        cls.__graph.bind('oslc_config', OSLC_CONFIG)
-        cls.__graph.bind('aras', ARAS)
-        cls.__graph.bind('dcterms', DCTERMS)
-        cls.__graph.bind('ldp', LDP)
+class OSLCResource:
+    """
+    Builder of the RDF representation of the OSLC resources.
 
-    @classmethod
-    def get_service_provider(cls, url: str):
-        if not cls.__instance:
-            cls()
+    An instance is created for each request and owns the graph of
+    its response, so concurrent requests never share mutable state.
+    """
 
-        cls.__init_graph()
+    def __init__(self, source_base_uri: str = None, access_token: str = None):
+        self.__source_base_uri = source_base_uri
+        self.__access_token = access_token
+        self.__graph = self.__init_graph()
+        self.__version = dict()
 
+    @staticmethod
+    def __init_graph() -> Graph:
+        graph = Graph()
+        graph.bind('oslc', OSLC)
+        graph.bind('oslc_config', OSLC_CONFIG)
+        graph.bind('aras', ARAS)
+        graph.bind('dcterms', DCTERMS)
+        graph.bind('ldp', LDP)
+
+        return graph
+
+    @property
+    def graph(self) -> Graph:
+        return self.__graph
+
+    @property
+    def version(self) -> dict:
+        """The id, generation, modified_on, created_on and is_current of the version read, None if none was read."""
+        return self.__version or None
+
+    def __set_version(self, item: dict):
+        self.__version.update((field, item.get(field)) for field in VERSION_FIELDS)
+
+    def __set_current_version(self, streams: dict):
+        # The component and its configurations change with the current version of the item
+        for stream in streams.values():
+            if stream.get('is_current') == '1':
+                self.__set_version(stream)
+
+    def get_service_provider(self, url: str):
+        return self.__add_service_provider(url, self.__get_item_types())
+
+    def __add_service_provider(self, url: str, item_types: Mapping):
         service_provider = None
 
-        service = cls.__get_service(url=url)
+        service = self.__get_service(url, item_types)
         if service:
-            service_provider = Resource(cls.__graph, URIRef(url))
+            service_provider = Resource(self.__graph, URIRef(url))
             service_provider.add(RDF.type, OSLC.ServiceProvider)
             service_provider.add(OSLC.service, service)
             return service_provider
         else:
             return False
 
-    @classmethod
-    def get_query_capabilities(cls, item_type: str, url: str, url_sp: str,
-                               paging: bool = False, page_size: int = 0, page_no: int = 1):
-        if not cls.__instance:
-            cls()
+    def get_service_provider_document(self, url: str, representation: str):
+        """
+        Return the serialized ServiceProvider in the given representation, it is
+        only built again when the ItemTypes catalogue has been reloaded.
+
+        :return: a tuple (etag, data) or None if the catalogue could not be loaded
+        """
+        item_types = self.__get_item_types()
+        if not item_types:
+            return None
+
+        key = (self.__source_base_uri, url, representation)
+        document = service_provider_cache.get(key)
+        if document is None or document[0] is not item_types:
+            # The ETag only depends on the catalogue, a reload without changes keeps the document
+            etag = hashlib.sha1(repr((url, representation, sorted(item_types.items()))).encode('utf-8')).hexdigest()
+            if document is None or document[1] != etag:
+                resource = OSLCResource(self.__source_base_uri, self.__access_token)
+                resource.__add_service_provider(url, item_types)
+                document = (item_types, etag, resource.to_rdf(representation, graph=url))
+            else:
+                document = (item_types,) + document[1:]
 
-        cls.__init_graph()
+            service_provider_cache.set(key, document)
 
-        if not cls.__item_types:
-            cls.__item_types = cls.__get_item_types()
+        return document[1:]
 
-        if re.sub('\\.', ' ', item_type) in cls.__item_types.values():
+    def get_query_capabilities(self, item_type: str, url: str, url_sp: str,
+                               paging: bool = False, page_size: int = 0, page_no: int = 1, page_token: str = None):
+        if re.sub('\\.', ' ', item_type) in self.__get_item_types().values():
             item_type = re.sub(' ', '.', item_type)
             url = unquote(url)
             url = re.sub(' ', '.', url)
             logger.debug(f'{page_no}-{page_size}-{paging}')
-            response_info = cls.__get_response_info(item_type, url, url_sp, paging, page_size, page_no)
+            response_info = self.__get_response_info(item_type, url, url_sp, paging, page_size, page_no, page_token)
             return response_info
         else:
             return False
 
-    @classmethod
-    def get_query_resource(cls, item_type: str, config_id: str, url: str, url_sp: str, config_context: str = None):
-        if not cls.__instance:
-            cls()
-
-        cls.__init_graph()
-
-        # If the config_context exists, extract the item_id and validate it + config_id
+    def get_query_resource(self, item_type: str, config_id: str, url: str, url_sp: str, config_context: str = None):
+        # If the config_context exists, extract the item_id of the version, otherwise the current one is read
+        item_id = None
         if config_context:
             item_id = urlparse(config_context, allow_fragments=True).path.split('/')[-1]
-            validated_config_id_from_item_id = validate_item_id(cls.__source_base_uri, item_type, item_id)
-            if validated_config_id_from_item_id:
-                val_config_id = validated_config_id_from_item_id['config_id']['id']
-                if config_id == val_config_id:
-                    resource = cls.__get_resource(item_type, item_id, config_id, url, url_sp)
-                    return resource
-                else:
-                    return False
-        # Else, only validate the conifg_id
-        else:
-            validated_config_id = validate_config_id(cls.__source_base_uri, item_type, config_id)
-            if validated_config_id:
-                resource = cls.__get_resource(item_type, None, config_id, url, url_sp)
-                return resource
-            else:
-                return False
 
-    @classmethod
-    def get_resource_shape(cls, item_type: str, url: str, url_sp: str):
-        if not cls.__instance:
-            cls()
+        # The query of the item validates the config_id and its pairing with the item_id
+        resource = self.__get_resource(item_type, item_id, config_id, url, url_sp)
 
-        cls.__init_graph()
+        return resource if resource else False
 
-        resource_shape = Resource(cls.__graph, URIRef(url))
+    def get_resource_shape(self, item_type: str, url: str, url_sp: str):
+        resource_shape = Resource(self.__graph, URIRef(url))
         resource_shape.add(RDF.type, OSLC.ResourceShape)
 
-        rs = cls.__get_resource_shape(item_type, url_sp, cls.__source_base_uri)
+        rs = self.__get_resource_shape(item_type, url_sp, self.__source_base_uri)
 
         if rs:
             for subject in rs.subjects(RDF.type, OSLC.Property):
 
-                prop = Resource(cls.__graph, subject)
+                prop = Resource(self.__graph, subject)
                 prop.add(RDF.type, OSLC.Property)
 
                 for p, o in rs.predicate_objects(subject):
@@ -134,31 +155,28 @@ class OSLCResource:
         else:
             return False
 
-    @classmethod
-    def __get_service(cls, url: str) -> Resource:
+    def __get_service(self, url: str, item_types: Mapping) -> Resource:
         service = None
-        cls.__item_types = cls.__get_item_types()
 
-        if cls.__item_types:
+        if item_types:
 
-            service = Resource(cls.__graph, BNode())
+            service = Resource(self.__graph, BNode())
             service.add(RDF.type, OSLC.Service)
             service.add(OSLC.domain, URIRef(ARAS))
 
             qc_url = url + '/{itemType}'
-            for item_type in cls.__item_types:
-                item_type_name = cls.__item_types.get(item_type)
+            for item_type in item_types:
+                item_type_name = item_types.get(item_type)
                 item_type_name_url = re.sub(' ', '.', item_type_name)
                 uri = urlparse(qc_url.format(**{'itemType': item_type_name_url}))
-                qc = cls.__get_query_capability(item_type_name, item_type_name_url, uri.geturl())
+                qc = self.__get_query_capability(item_type_name, item_type_name_url, uri.geturl())
                 service.add(OSLC.queryCapability, qc)
 
         return service
 
-    @classmethod
-    def __get_query_capability(cls, item_type_name: str, item_type_name_url: str, uri: str) -> Resource:
+    def __get_query_capability(self, item_type_name: str, item_type_name_url: str, uri: str) -> Resource:
 
-        qc = Resource(cls.__graph, BNode())
+        qc = Resource(self.__graph, BNode())
         qc.add(RDF.type, OSLC.QueryCapability)
         qc.add(DCTERMS.title, Literal(f'Query Capability for ItemType: {item_type_name}'))
         qc.add(OSLC.queryBase, URIRef(uri))
@@ -167,28 +185,78 @@ class OSLCResource:
 
         return qc
 
-    @classmethod
-    def __get_response_info(cls, item_type: str, url: str, url_sp: str, paging: bool, page_size: int, page_no: int) -> Resource:
+    def __get_response_info(self, item_type: str, url: str, url_sp: str, paging: bool, page_size: int, page_no: int,
+                            page_token: str = None) -> Resource:
+        annotations = dict()
+        items = load_items(self.__source_base_uri, item_type, page_size, page_no,
+                           page_token=page_token, annotations=annotations)
+
+        for triple in self.__iter_response_info(item_type, url, items, paging, page_size, page_no, annotations):
+            self.__graph.add(triple)
 
-        items = load_items(cls.__source_base_uri, item_type, page_size, page_no)
+        return Resource(self.__graph, URIRef(url))
 
-        resource = Resource(cls.__graph, URIRef(url))
-        ri, items = cls.__get_paging(item_type, items, url, paging, page_size, page_no)
-        if ri:
-            resource.add(OSLC.responseInfo, ri)
+    def __iter_response_info(self, item_type: str, url: str, items, paging: bool, page_size: int, page_no: int,
+                             annotations: dict):
+        resource = URIRef(url)
 
-        for item in items:
+        for item, _ in iter_pairs(items):
             item_url = url + '/' + re.sub(' ', '.', item)
-            member = Resource(cls.__graph, URIRef(item_url))
-            resource.add(RDFS.member, member)
+            yield resource, RDFS.member, URIRef(item_url)
+
+        # The next page starts after the last item read, so the paging is written after the members
+        yield from self.__iter_paging(item_type, resource, paging, page_size, page_no,
+                                      self.__get_next_page_token(page_size, annotations),
+                                      annotations.get('total_count'))
+
+    def stream_query_capabilities(self, item_type: str, url: str, url_sp: str, representation: str,
+                                  paging: bool = False, page_size: int = 0, page_no: int = 1, page_token: str = None):
+        """
+        Serialize the members of the QueryCapability while the items are read from Aras,
+        without building the graph of the response.
+
+        :return: an iterator of chunks of bytes, or False if the ItemType does not exist
+        """
+        if re.sub('\\.', ' ', item_type) in self.__get_item_types().values():
+            item_type = re.sub(' ', '.', item_type)
+            url = unquote(url)
+            url = re.sub(' ', '.', url)
 
-        return resource
+            annotations = dict()
+            items = load_items(self.__source_base_uri, item_type, page_size, page_no, stream=True,
+                               page_token=page_token, annotations=annotations)
+            triples = self.__iter_response_info(item_type, url, items, paging, page_size, page_no, annotations)
 
-    @classmethod
-    def __get_resource(cls, item_type: str, item_id, config_id: str, url: str, url_sp: str) -> Resource:
-        resource = get_item_rdf(cls.__graph, item_type,
-                                cls.__source_base_uri,
-                                item_id, config_id, url, url_sp)
+            return chunked(serialize(triples, representation, graph=url))
+        else:
+            return False
+
+    def stream_export(self, item_type: str, url_sp: str, representation: str = 'nquads',
+                      page_size: int = 100, workers: int = None, compress: bool = False):
+        """
+        Serialize every item of the ItemType as N-Triples or as N-Quads, with each item
+        in the graph named with its URL, while the pages of items are read from Aras.
+
+        :return: an iterator of chunks of bytes (gzip compressed with compress), or False if
+                 the ItemType does not exist
+        """
+        if re.sub('\\.', ' ', item_type) not in self.__get_item_types().values():
+            return False
+
+        graphs = iter_export_graphs(self.__source_base_uri, re.sub(' ', '.', item_type), url_sp,
+                                    page_size=page_size, workers=workers)
+        if graphs is None:
+            return False
+
+        lines = (line for item_url, graph in graphs for line in serialize(graph, representation, graph=item_url))
+        chunks = chunked(lines)
+
+        return gzipped(chunks) if compress else chunks
+
+    def __get_resource(self, item_type: str, item_id, config_id: str, url: str, url_sp: str) -> Resource:
+        resource = get_item_rdf(self.__graph, item_type,
+                                self.__source_base_uri,
+                                item_id, config_id, url, url_sp, version=self.__version)
         return resource
 
     @staticmethod
@@ -196,15 +264,21 @@ class OSLCResource:
         return load_resource_shape(item_type, url_sp=url_sp,
                                    source_base_url=source_base_uri)
 
-    @classmethod
-    def __get_item_types(cls) -> dict:
-        return load_item_types(cls.__source_base_uri)
+    def __get_item_types(self) -> MappingProxyType:
+        return item_types_cache.get_or_load(self.__source_base_uri, self.__load_item_types) or MappingProxyType({})
+
+    def __load_item_types(self):
+        item_types = load_item_types(self.__source_base_uri)
+        return MappingProxyType(item_types) if item_types else None
 
-    @classmethod
-    def to_rdf(cls, representation: str = 'xml'):
+    def to_rdf(self, representation: str = 'xml', graph: str = None):
         data = None
-        if len(cls.__graph):
-            data = cls.__graph.serialize(format=representation)
+        if len(self.__graph):
+            if representation == 'nquads':
+                # rdflib only writes N-Quads from a context aware store
+                data = ''.join(serialize(self.__graph, representation, graph=graph)).encode('utf-8')
+            else:
+                data = self.__graph.serialize(format=representation)
         return data
 
     @staticmethod
@@ -219,66 +293,84 @@ class OSLCResource:
 
         return urlunparse(new_url)
 
-    @classmethod
-    def get_components(cls, item_type: str, url: str,
-                       paging: bool = False, page_size: int = 0, page_no: int = 0):
-        if not cls.__instance:
-            cls()
-
-        cls.__init_graph()
-
-        if not cls.__item_types:
-            cls.__item_types = cls.__get_item_types()
-
-        if re.sub('\\.', ' ', item_type) in cls.__item_types.values():
+    def get_components(self, item_type: str, url: str,
+                       paging: bool = False, page_size: int = 0, page_no: int = 0, page_token: str = None):
+        if re.sub('\\.', ' ', item_type) in self.__get_item_types().values():
             item_type = unquote(item_type)
             item_type = re.sub(' ', '.', item_type)
             url = unquote(url)
             url = re.sub(' ', '.', url)
 
-            container = Resource(cls.__graph, URIRef(url))
-            container.add(RDF.type, LDP.BasicContainer)
+            annotations = dict()
+            config_ids = load_items(self.__source_base_uri, item_type, page_size, page_no,
+                                    page_token=page_token, annotations=annotations)
 
-            config_ids = load_items(cls.__source_base_uri, item_type, page_size, page_no)
+            for triple in self.__iter_components(item_type, url, config_ids, paging, page_size, page_no, annotations):
+                self.__graph.add(triple)
 
-            ri, config_ids = cls.__get_paging(item_type, config_ids, url, paging, page_size, page_no)
-            if ri:
-                container.add(OSLC.responseInfo, ri)
-
-            for config_id in config_ids:
-                member_url = url + f'/{config_id}'
-                member = Resource(cls.__graph, URIRef(member_url))
-                member.add(RDF.type, OSLC_CONFIG.Component)
-                member.add(DCTERMS.title, Literal(config_ids[config_id]['keyed_name']))
-
-                container.add(LDP.contains, member)
-
-            return container
+            return Resource(self.__graph, URIRef(url))
 
         else:
             return False
 
-    @classmethod
-    def get_component(cls, item_type: str, config_id: str, url: str):
-        if not cls.__instance:
-            cls()
+    def __iter_components(self, item_type: str, url: str, config_ids, paging: bool, page_size: int, page_no: int,
+                          annotations: dict):
+        container = URIRef(url)
+        yield container, RDF.type, LDP.BasicContainer
+
+        for config_id, item in iter_pairs(config_ids):
+            member = URIRef(url + f'/{config_id}')
+            yield member, RDF.type, OSLC_CONFIG.Component
+            yield member, DCTERMS.title, Literal(item['keyed_name'])
 
-        cls.__init_graph()
+            yield container, LDP.contains, member
 
-        validated_item = validate_config_id(cls.__source_base_uri, item_type, config_id)
+        yield from self.__iter_paging(item_type, container, paging, page_size, page_no,
+                                      self.__get_next_page_token(page_size, annotations),
+                                      annotations.get('total_count'))
 
-        if validated_item:
+    def stream_components(self, item_type: str, url: str, representation: str,
+                          paging: bool = False, page_size: int = 0, page_no: int = 0, page_token: str = None):
+        """
+        Serialize the components container while the items are read from Aras,
+        without building the graph of the response.
+
+        :return: an iterator of chunks of bytes, or False if the ItemType does not exist
+        """
+        if re.sub('\\.', ' ', item_type) in self.__get_item_types().values():
             item_type = unquote(item_type)
             item_type = re.sub(' ', '.', item_type)
             url = unquote(url)
             url = re.sub(' ', '.', url)
 
-            component = Resource(cls.__graph, URIRef(url))
+            annotations = dict()
+            config_ids = load_items(self.__source_base_uri, item_type, page_size, page_no, stream=True,
+                                    page_token=page_token, annotations=annotations)
+            triples = self.__iter_components(item_type, url, config_ids, paging, page_size, page_no, annotations)
+
+            return chunked(serialize(triples, representation, graph=url))
+
+        else:
+            return False
+
+    def get_component(self, item_type: str, config_id: str, url: str):
+        item_type = unquote(item_type)
+        item_type = re.sub(' ', '.', item_type)
+
+        # The versions of the config_id are shared with its configurations and streams
+        streams = load_version_history(self.__source_base_uri, item_type, config_id)
+
+        if streams:
+            self.__set_current_version(streams)
+            url = unquote(url)
+            url = re.sub(' ', '.', url)
+
+            component = Resource(self.__graph, URIRef(url))
             component.add(RDF.type, OSLC_CONFIG.Component)
 
             keyed_name = None
 
-            for item in validated_item['value']:
+            for item in streams.values():
                 keyed_name = item['keyed_name']
 
             if keyed_name:
@@ -291,66 +383,94 @@ class OSLCResource:
         else:
             return False
 
-    @classmethod
-    def get_configurations(cls, item_type: str, config_id: str, url: str):
-        if not cls.__instance:
-            cls()
+    def get_configurations(self, item_type: str, config_id: str, url: str):
+        item_type = unquote(item_type)
+        item_type = re.sub(' ', '.', item_type)
 
-        cls.__init_graph()
+        streams = load_version_history(self.__source_base_uri, item_type, config_id)
 
-        validated_item = validate_config_id(cls.__source_base_uri, item_type, config_id)
-
-        if validated_item:
-            item_type = unquote(item_type)
-            item_type = re.sub(' ', '.', item_type)
+        if streams:
+            self.__set_current_version(streams)
             url = unquote(url)
             url = re.sub(' ', '.', url)
 
-            container = Resource(cls.__graph, URIRef(url))
-
-            streams = load_streams(cls.__source_base_uri, item_type, config_id)
-            for stream in streams.keys():
-                member = Resource(cls.__graph, URIRef(url.replace('configurations', 'stream') + f'/{stream}'))
-                container.add(RDFS.member, member)
+            for triple in self.__iter_configurations(url, streams):
+                self.__graph.add(triple)
 
-            return container
+            return Resource(self.__graph, URIRef(url))
 
         else:
             return False
 
-    @classmethod
-    def get_stream(cls, item_type: str, config_id: str, stream_id: str, url: str):
-        if not cls.__instance:
-            cls()
+    @staticmethod
+    def __iter_configurations(url: str, streams):
+        container = URIRef(url)
+        for stream in streams.keys():
+            yield container, RDFS.member, URIRef(url.replace('configurations', 'stream') + f'/{stream}')
 
-        cls.__init_graph()
+    def stream_configurations(self, item_type: str, config_id: str, url: str, representation: str):
+        """
+        Serialize the configurations container from the streams loaded from Aras,
+        without building the graph of the response.
 
-        validated_item = validate_config_id(cls.__source_base_uri, item_type, config_id)
+        :return: an iterator of chunks of bytes, or False if the component does not exist
+        """
+        item_type = unquote(item_type)
+        item_type = re.sub(' ', '.', item_type)
 
-        if validated_item:
-            item_type = unquote(item_type)
-            item_type = re.sub(' ', '.', item_type)
+        streams = load_version_history(self.__source_base_uri, item_type, config_id)
+
+        if streams:
+            self.__set_current_version(streams)
             url = unquote(url)
             url = re.sub(' ', '.', url)
 
-            streams = load_streams(cls.__source_base_uri, item_type,
-                                   config_id)
-            if stream_id in streams.keys():
-                stream = streams[stream_id]
-                configuration = Resource(cls.__graph, URIRef(url))
-                configuration.add(RDF.type, OSLC_CONFIG.Stream)
-                configuration.add(DCTERMS.identifier, Literal(stream['id']))
-                configuration.add(DCTERMS.title, Literal(stream['keyed_name']))
+            triples = self.__iter_configurations(url, streams)
+
+            return chunked(serialize(triples, representation, graph=url))
 
-                return configuration
-            else:
-                return False
         else:
             return False
 
-    @classmethod
-    def __get_paging(cls, item_type: str, items: dict, url: str, paging: bool, page_size: int, page_no: int) -> tuple:
-        ri = None
+    def get_stream(self, item_type: str, config_id: str, stream_id: str, url: str):
+        item_type = unquote(item_type)
+        item_type = re.sub(' ', '.', item_type)
+
+        # A stream missing from the history read before may be a newer generation, it is read again
+        streams = load_version_history(self.__source_base_uri, item_type, config_id, version_id=stream_id)
+
+        if stream_id in streams.keys():
+            url = unquote(url)
+            url = re.sub(' ', '.', url)
+
+            stream = streams[stream_id]
+            self.__set_version(stream)
+            configuration = Resource(self.__graph, URIRef(url))
+            configuration.add(RDF.type, OSLC_CONFIG.Stream)
+            configuration.add(DCTERMS.identifier, Literal(stream['id']))
+            configuration.add(DCTERMS.title, Literal(stream['keyed_name']))
+
+            return configuration
+        else:
+            return False
+
+    def __get_next_page_token(self, page_size: int, annotations: dict):
+        # Follow the server-driven paging of Aras when it is returned, otherwise continue after the last id
+        next_link = annotations.get('@odata.nextLink') if annotations else None
+        if next_link:
+            return encode_page_token(link=urljoin(self.__source_base_uri, next_link))
+
+        # No row remains after the page, or it is shorter than the page size: it is the last one
+        if annotations and annotations.get('remaining', 1) <= 0:
+            return None
+
+        if page_size and annotations and annotations.get('rows', 0) >= page_size and annotations.get('last_id'):
+            return encode_page_token(after=annotations['last_id'])
+
+        return None
+
+    def __iter_paging(self, item_type: str, resource: URIRef, paging: bool, page_size: int, page_no: int,
+                      next_page_token: str = None, total_count: int = None):
         paging = paging if paging else page_size > 0
         if paging:
             page_size = page_size if page_size else 50
@@ -363,15 +483,21 @@ class OSLCResource:
             if page_no:
                 params['oslc.pageNo'] = page_no
 
-            ri_url = cls.__get_url(url, params)
+            ri = URIRef(self.__get_url(resource, params))
 
-            ri = Resource(cls.__graph, URIRef(ri_url))
-            ri.add(RDF.type, OSLC.ResponseInfo)
+            yield resource, OSLC.responseInfo, ri
+            yield ri, RDF.type, OSLC.ResponseInfo
+            yield ri, DCTERMS.title, Literal(f'Query Results for {item_type}')
+            if total_count is not None:
+                yield ri, OSLC.totalCount, Literal(total_count)
 
-            ri.add(DCTERMS.title, Literal(f'Query Results for {item_type}'))
+            # The token of the next page lets Aras seek it by id instead of skipping all the previous rows
+            if next_page_token:
+                params['oslc.pageNo'] = page_no + 1
+                params['pageToken'] = next_page_token
+                yield ri, OSLC.nextPage, URIRef(self.__get_url(resource, params))
 
-            params['oslc.pageNo'] = page_no + 1
-            ri_url = cls.__get_url(url, params)
-            ri.add(OSLC.nextPage, URIRef(ri_url))
 
-        return ri, items
+def iter_pairs(items):
+    # The items are loaded as a dict with the whole page or as an iterator of pairs while streaming
+    return iter(items.items()) if isinstance(items, Mapping) else iter(items)
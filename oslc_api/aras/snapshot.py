@@ -0,0 +1,161 @@
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from types import MappingProxyType
+
+from rdflib import Graph
+
+from oslc_api.aras.resources import item_types_cache
+from oslc_api.rest_api.aras import shape_cache, versionable_cache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Digest of the last snapshot written or loaded by this process, the same snapshot is not written again
+last_digest = None
+
+_lock = threading.Lock()
+_writer = None
+
+
+def dump_graph(graph: Graph) -> str:
+    return graph.serialize(format='nt').decode('utf-8') if len(graph) else ''
+
+
+def load_graph(data: str) -> Graph:
+    graph = Graph()
+    if data:
+        graph.parse(data=data, format='nt')
+    return graph
+
+
+def copy_versionable(value):
+    # The indexes of the ItemTypes, or the is_versionable of an ItemType missing from them
+    return dict(value) if isinstance(value, dict) else value
+
+
+# Caches of the metadata read from Aras, with the functions converting their values to JSON and back
+snapshot_caches = {
+    'item_types': (item_types_cache, dict, MappingProxyType),
+    'versionable': (versionable_cache, copy_versionable, copy_versionable),
+    'shapes': (shape_cache, dump_graph, load_graph),
+}
+
+
+def dump_key(key):
+    return list(key) if isinstance(key, tuple) else key
+
+
+def load_key(key):
+    return tuple(key) if isinstance(key, list) else key
+
+
+def write_snapshot(path: str) -> bool:
+    """
+    Write the ItemTypes, their versionability and the generated ResourceShapes cached
+    by the process to a gzip compressed JSON file, replaced at once so that the other
+    processes never read it partially written.
+
+    :return: True if the snapshot was written, False if it did not change
+    """
+    global last_digest
+
+    snapshot = {'version': SNAPSHOT_VERSION}
+    for name, (cache, dump, _) in snapshot_caches.items():
+        snapshot[name] = [[dump_key(key), dump(value)] for key, value in cache.items()]
+
+    data = json.dumps(snapshot, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    digest = hashlib.sha1(data).hexdigest()
+    if digest == last_digest or not any(snapshot[name] for name in snapshot_caches):
+        return False
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as snapshot_file:
+            snapshot_file.write(gzip.compress(data))
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    last_digest = digest
+    logger.debug(f'Metadata snapshot written to {path}')
+    return True
+
+
+def load_snapshot(path: str) -> int:
+    """
+    Preload the caches with the snapshot, each entry is served as soon as it is requested
+    and loaded again from Aras in the background on its first access.
+
+    :return: the number of entries preloaded
+    """
+    global last_digest
+
+    if not path or not os.path.isfile(path):
+        return 0
+
+    try:
+        with open(path, 'rb') as snapshot_file:
+            data = gzip.decompress(snapshot_file.read())
+        snapshot = json.loads(data.decode('utf-8'))
+    except (OSError, ValueError) as e:
+        logger.warning(f'Could not read the metadata snapshot {path}: {e}')
+        return 0
+
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        logger.warning(f'Ignoring the metadata snapshot {path} written by another version')
+        return 0
+
+    count = 0
+    for name, (cache, _, load) in snapshot_caches.items():
+        for key, value in snapshot.get(name, []):
+            cache.preload(load_key(key), load(value))
+            count += 1
+
+    last_digest = hashlib.sha1(data).hexdigest()
+    logger.info(f'Loaded {count} entries from the metadata snapshot {path}')
+    return count
+
+
+def configure(path: str = None, interval: float = None):
+    """
+    Load the snapshot of the given path and write it again every interval seconds,
+    and when the process exits, with the metadata read since then.
+    """
+    global _writer
+
+    if not path:
+        return
+
+    load_snapshot(path)
+
+    with _lock:
+        if _writer is not None or not interval:
+            return
+
+        def write():
+            try:
+                write_snapshot(path)
+            except OSError as e:
+                logger.warning(f'Could not write the metadata snapshot {path}: {e}')
+
+        def run():
+            while True:
+                time.sleep(interval)
+                write()
+
+        _writer = threading.Thread(target=run, name='metadata-snapshot', daemon=True)
+        _writer.start()
+        atexit.register(write)
@@ -1,7 +1,7 @@
 import logging
 
 from flask import make_response, request, g
-from flask_login import LoginManager, user_loaded_from_request, user_loaded_from_header
+from flask_login import LoginManager, current_user, user_loaded_from_request, user_loaded_from_header
 
 from oslc_api.auth.client import ArasAPI
 from oslc_api.rest_api.custom_session import CustomSessionInterface
@@ -19,8 +19,8 @@ def load_user_from_request(request):
     user = None
     access_token = request.headers.get('X-ARAS-ACCESS-TOKEN')
     if access_token:
-        if aras_api.user and aras_api.user.access_token == access_token:
-            user = aras_api.user
+        # Any user logged in whose token has not expired
+        user = aras_api.tokens.get(access_token)
 
     logger.debug(f'X-ARAS-ACCESS-TOKEN: {user}')
 
@@ -39,6 +39,15 @@ def user_loaded_from_header(self, user=None):
     g.login_via_header = True
 
 
+def set_access_token():
+    # The requests sent to Aras while serving the request use the token of its user
+    aras_api.access_token = getattr(current_user, 'access_token', None)
+
+
+def clear_access_token(exception=None):
+    aras_api.access_token = None
+
+
 @login.unauthorized_handler
 def unauthorized():
     data = {
@@ -59,6 +68,14 @@ def init_app(app):
 
     login.init_app(app)
 
-    aras_api.init_app(app, aras_base_api_uri, 'Innovator', client_id, aras_database)
+    aras_api.init_app(app, aras_base_api_uri, app.config.get('OAUTH_SCOPE', 'Innovator'), client_id, aras_database)
+
+    # The OAuth server is discovered while the application starts, the first login is a single request
+    from oslc_api.auth import discovery
+    discovery.configure(aras_api, path=app.config.get('OPENID_CONFIGURATION_FILE'),
+                        ttl=app.config.get('OPENID_CONFIGURATION_TTL'), eager=app.config.get('OAUTH_EAGER_DISCOVERY', True))
+
+    app.before_request(set_access_token)
+    app.teardown_request(clear_access_token)
 
     app.session_interface = CustomSessionInterface()
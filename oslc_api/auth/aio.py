@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import threading
+
+from requests.utils import requote_uri
+from werkzeug.exceptions import GatewayTimeout, InternalServerError
+
+from oslc_api.auth.batch import BatchResponse
+from oslc_api.auth.resilience import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSender:
+    """
+    Send the GET requests of the ARAS API from an asyncio event loop running on its own thread.
+
+    The requests of all the threads share the connections of a single aiohttp.ClientSession and
+    up to max_requests of them are in flight at the same time, a group of requests is awaited
+    concurrently instead of holding a thread of the pool for each of them.
+
+    The requests are retried with the backoff of the retry policy, awaited without holding the loop,
+    after a connection error or when they time out (timeout is a tuple of the seconds to connect
+    and to wait for each read of a response).
+    """
+
+    def __init__(self, max_requests: int = 200, keep_alive: bool = True, retry: RetryPolicy = None,
+                 timeout: tuple = (5, 60)):
+        try:
+            import aiohttp
+            import yarl
+        except ImportError:
+            raise ImportError('The aiohttp package is required to send the requests to Aras asynchronously: '
+                              'pip install aras-oslc-api[async]')
+
+        self.__aiohttp = aiohttp
+        self.__yarl = yarl
+        self.__max_requests = max_requests
+        self.__keep_alive = keep_alive
+        self.__retry = retry or RetryPolicy()
+        self.__timeout = timeout
+
+        self.__lock = threading.Lock()
+        self.__loop = None
+        self.__thread = None
+        self.__session = None
+
+    @property
+    def max_requests(self) -> int:
+        return self.__max_requests
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self.__lock:
+            if self.__loop is None:
+                loop = asyncio.new_event_loop()
+                self.__thread = threading.Thread(target=loop.run_forever, name='aras-async', daemon=True)
+                self.__thread.start()
+                asyncio.run_coroutine_threadsafe(self.__open(), loop).result()
+                self.__loop = loop
+
+            return self.__loop
+
+    async def __open(self):
+        # The session belongs to the event loop of the sender, the requests beyond the limit wait for a connection
+        logger.debug(f'Creating the asynchronous ARAS API client: max_requests={self.__max_requests} '
+                     f'keep_alive={self.__keep_alive}')
+
+        connector = self.__aiohttp.TCPConnector(limit=self.__max_requests, limit_per_host=self.__max_requests,
+                                                force_close=not self.__keep_alive)
+        self.__session = self.__aiohttp.ClientSession(connector=connector,
+                                                      timeout=self.__aiohttp.ClientTimeout(
+                                                          total=None, sock_connect=self.__timeout[0],
+                                                          sock_read=self.__timeout[1]))
+
+    async def __get(self, response: BatchResponse, headers: dict = None):
+        # The URLs are quoted as requests does, the query builders leave the whitespaces of the OData queries
+        url = response.url
+        attempt = 0
+        while True:
+            try:
+                async with self.__session.get(self.__yarl.URL(requote_uri(url), encoded=True),
+                                              headers=headers, data=response.data) as res:
+                    status_code, res_headers, content = res.status, dict(res.headers), await res.read()
+            except (self.__aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < self.__retry.retries:
+                    await asyncio.sleep(self.__retry.backoff(attempt))
+                    attempt += 1
+                    continue
+
+                logger.debug(f'{e.__class__.__name__} when connecting to: {url}')
+                if isinstance(e, asyncio.TimeoutError):
+                    raise GatewayTimeout(f'ARAS API did not answer in time: {e.__class__.__name__}')
+                raise InternalServerError(str(e) or e.__class__.__name__)
+
+            if status_code in self.__retry.statuses and attempt < self.__retry.retries:
+                await asyncio.sleep(self.__retry.backoff(attempt))
+                attempt += 1
+                continue
+
+            break
+
+        response.resolve(status_code, res_headers, content)
+
+        return response
+
+    def send(self, responses: list, headers: dict = None):
+        """Send the requests of the responses at the same time and fill them, blocking until all of them end."""
+        if not responses:
+            return
+
+        async def gather():
+            await asyncio.gather(*(self.__get(response, headers) for response in responses))
+
+        logger.debug(f'Requesting {len(responses)} requests concurrently')
+        asyncio.run_coroutine_threadsafe(gather(), self.loop).result()
+
+    def close(self):
+        with self.__lock:
+            loop, self.__loop = self.__loop, None
+            if loop is None:
+                return
+
+            asyncio.run_coroutine_threadsafe(self.__session.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self.__thread.join()
+            loop.close()
@@ -0,0 +1,146 @@
+import json
+import re
+import uuid
+from http.client import responses
+
+from requests.utils import requote_uri
+
+
+class BatchResponse:
+    """
+    Response of a request sent inside an OData $batch.
+
+    It is returned by get_resource while the batch is being collected and it
+    is filled once the batch has been sent, exposing the same attributes of
+    a requests.Response used by the query layer.
+    """
+
+    def __init__(self, url: str, data: str = None):
+        self.url = url
+        self.data = data
+        self.status_code = None
+        self.headers = dict()
+        self.content = b''
+        self.reason = None
+
+    @property
+    def resolved(self) -> bool:
+        return self.status_code is not None
+
+    def resolve(self, status_code: int, headers: dict, content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.reason = responses.get(status_code, '')
+
+    @property
+    def ok(self) -> bool:
+        return self.resolved and self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8')
+
+    def iter_content(self, chunk_size: int = 1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+    def json(self):
+        if not self.resolved:
+            raise RuntimeError(f'The batch containing {self.url} has not been sent yet')
+
+        return json.loads(self.content.decode('utf-8'))
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        return f'<BatchResponse [{self.status_code}]: {self.url}>'
+
+
+def build_batch_body(batch: list, service_root: str = None, boundary: str = None) -> tuple:
+    """
+    Build the multipart/mixed body of an OData $batch with a GET request for each response,
+    the URLs under the service root are sent relative to it.
+
+    :return: a tuple with the Content-Type header and the body
+    """
+    boundary = boundary or f'batch_{uuid.uuid4()}'
+
+    parts = list()
+    for response in batch:
+        url = response.url
+        if service_root and url.startswith(service_root):
+            url = url[len(service_root):]
+
+        part = [
+            f'--{boundary}',
+            'Content-Type: application/http',
+            'Content-Transfer-Encoding: binary',
+            '',
+            f'GET {requote_uri(url)} HTTP/1.1',
+            'Accept: application/json',
+        ]
+
+        if response.data:
+            if isinstance(response.data, dict):
+                body = json.dumps(response.data)
+            elif isinstance(response.data, bytes):
+                body = response.data.decode('utf-8')
+            else:
+                body = response.data
+
+            part += [
+                'Content-Type: application/json',
+                f'Content-Length: {len(body.encode("utf-8"))}',
+                '',
+                body,
+            ]
+        else:
+            part += ['']
+
+        parts.append('\r\n'.join(part))
+
+    body = '\r\n'.join(parts) + f'\r\n--{boundary}--\r\n'
+
+    return f'multipart/mixed; boundary={boundary}', body.encode('utf-8')
+
+
+def parse_batch_response(content_type: str, content: bytes) -> list:
+    """
+    Split the multipart/mixed response of an OData $batch.
+
+    :return: a list of tuples (status code, headers, body) in the order of the requests
+    """
+    match = re.search('boundary="?([^";]+)"?', content_type or '')
+    if not match:
+        raise ValueError(f'The $batch response is not a multipart response: {content_type}')
+
+    delimiter = b'--' + match.group(1).encode('utf-8')
+
+    results = list()
+    for part in content.split(delimiter)[1:]:
+        if part.startswith(b'--'):
+            break
+
+        # MIME headers of the part and the embedded HTTP response
+        _, _, http_response = part.lstrip(b'\r\n').partition(b'\r\n\r\n')
+        head, _, body = http_response.partition(b'\r\n\r\n')
+
+        lines = head.decode('utf-8').split('\r\n')
+        status_code = int(lines[0].split(' ')[1])
+        headers = dict()
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip()] = value.strip()
+
+        # Remove the line break that precedes the next delimiter
+        if body.endswith(b'\r\n'):
+            body = body[:-2]
+
+        results.append((status_code, headers, body))
+
+    return results
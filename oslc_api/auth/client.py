@@ -1,17 +1,29 @@
+import contextvars
 import json
 import logging
+import threading
+from contextlib import contextmanager
 from http.client import UNAUTHORIZED
 
 import requests
 from flask_restx import abort
+from requests.adapters import HTTPAdapter
 from urllib3.exceptions import MaxRetryError
-from werkzeug.exceptions import BadRequest, InternalServerError
+from werkzeug.exceptions import BadRequest, GatewayTimeout, InternalServerError
 
+from oslc_api.aras.cache import TTLCache
+from oslc_api.auth.aio import AsyncSender
+from oslc_api.auth.batch import BatchResponse, build_batch_body, parse_batch_response
 from oslc_api.auth.exceptions import OAuthError
 from oslc_api.auth.models import User
+from oslc_api.auth.resilience import CircuitBreaker, RetryPolicy
+from oslc_api.auth.tokens import TokenStore
 
 logger = logging.getLogger(__name__)
 
+# OpenID configuration of the OAuth server of Aras by the base URI of Aras, found by its discovery
+openid_configuration_cache = TTLCache('openid_configuration', maxsize=8, ttl=3600)
+
 ARAS_API_PARAMS = (
     'grant_type',
     'scope',
@@ -25,11 +37,6 @@ ARAS_API_PARAMS = (
 class ArasAPI:
     __instance = None
     __aras_base_api_uri = None
-    __aras_server_uri = None
-    __aras_discovery_api_uri = None
-    __aras_openid_configuration = None
-    __aras_token_endpoint_uri = None
-    __aras_end_session_endpoint_uri = None
 
     __grant_type = 'password'
     __scope = None
@@ -37,15 +44,42 @@ class ArasAPI:
     __username = None
     __password = None
     __database = None
+    # Token used outside of the requests of the users (command line, benchmarks)
     __token = None
     __user = None
+    # Users logged in by their access token, and the access token of the request being served
+    __tokens = TokenStore()
+    __access_token = contextvars.ContextVar('aras_access_token', default=None)
 
     __source_base_uri = None
 
+    __session = None
+    __pool_connections = 10
+    __pool_maxsize = 10
+    __pool_block = False
+    __keep_alive = True
+
+    __batch_enabled = False
+    __async_enabled = False
+    __async_max_requests = 200
+    __async_sender = None
+    # Seconds to connect to Aras and to wait for each read of a response
+    __connect_timeout = 5
+    __read_timeout = 60
+    # Retries of the requests reading Aras and the circuit breaker failing them at once while it is unhealthy
+    __retry = RetryPolicy()
+    __circuit = CircuitBreaker()
+    # Batches being collected by each thread
+    __local = threading.local()
+
     @property
     def source_base_uri(self):
         return self.__source_base_uri
 
+    @property
+    def aras_base_api_uri(self):
+        return self.__aras_base_api_uri
+
     @property
     def token(self):
         return self.__token
@@ -61,6 +95,87 @@ class ArasAPI:
     @user.setter
     def user(self, user):
         self.__user = user
+        if user is not None:
+            self.__tokens.add_user(user)
+
+    @property
+    def tokens(self) -> TokenStore:
+        return self.__tokens
+
+    @property
+    def access_token(self):
+        """The access token of the user being served, the token of the client outside of a request."""
+        access_token = self.__access_token.get()
+        if access_token is None and self.__token:
+            access_token = self.__token['access_token']
+
+        return access_token
+
+    @access_token.setter
+    def access_token(self, access_token):
+        self.__access_token.set(access_token)
+
+    @contextmanager
+    def authorization(self, access_token: str):
+        """Send the requests of the with block with the given access token."""
+        reset = self.__access_token.set(access_token)
+        try:
+            yield
+        finally:
+            self.__access_token.reset(reset)
+
+    @property
+    def batch_enabled(self) -> bool:
+        return self.__batch_enabled
+
+    @batch_enabled.setter
+    def batch_enabled(self, batch_enabled: bool):
+        self.__batch_enabled = batch_enabled
+
+    @property
+    def async_enabled(self) -> bool:
+        return self.__async_enabled
+
+    @async_enabled.setter
+    def async_enabled(self, async_enabled: bool):
+        self.__async_enabled = async_enabled
+
+    @property
+    def async_sender(self) -> AsyncSender:
+        if not self.__async_sender:
+            self.__async_sender = AsyncSender(self.__async_max_requests, self.__keep_alive, retry=self.__retry,
+                                              timeout=self.timeout)
+
+        return self.__async_sender
+
+    @property
+    def timeout(self) -> tuple:
+        """The connect and read timeouts of the requests sent to Aras."""
+        return self.__connect_timeout, self.__read_timeout
+
+    @timeout.setter
+    def timeout(self, timeout: tuple):
+        self.__connect_timeout, self.__read_timeout = timeout
+
+        # The session of the asynchronous client is opened with the timeouts, it is created again
+        if self.__async_sender:
+            self.__async_sender.close()
+            self.__async_sender = None
+
+    @property
+    def retry(self) -> RetryPolicy:
+        return self.__retry
+
+    @property
+    def circuit(self) -> CircuitBreaker:
+        return self.__circuit
+
+    @property
+    def session(self) -> requests.Session:
+        if not self.__session:
+            self.__session = self.__create_session()
+
+        return self.__session
 
     def __new__(cls, *args, **kwargs):
         if not cls.__instance:
@@ -82,26 +197,102 @@ class ArasAPI:
 
         self.__source_base_uri = self.__aras_base_api_uri.rstrip('/') + '/server/odata/'
 
-    def __get(self, url: str, headers: dict = None, data: dict = None):
-
-        try:
-            if not headers:
-                res = requests.get(url)
-            else:
-                if not data:
-                    res = requests.get(url, headers=headers)
-                else:
-                    res = requests.get(url, headers=headers, data=data)
-
-            if not res:
-                description = res.content.decode('utf-8')
+        # The tokens of the users are refreshed with the token endpoint of this server
+        self.__tokens.configure(refresh=self.__refresh_user)
+
+        if app:
+            self.__pool_connections = app.config.get('ARAS_POOL_CONNECTIONS', self.__pool_connections)
+            self.__pool_maxsize = app.config.get('ARAS_POOL_MAXSIZE', self.__pool_maxsize)
+            self.__pool_block = app.config.get('ARAS_POOL_BLOCK', self.__pool_block)
+            self.__keep_alive = app.config.get('ARAS_KEEP_ALIVE', self.__keep_alive)
+            self.__batch_enabled = app.config.get('ARAS_BATCH_ENABLED', self.__batch_enabled)
+            self.__async_enabled = app.config.get('ARAS_ASYNC_ENABLED', self.__async_enabled)
+            self.__async_max_requests = app.config.get('ARAS_ASYNC_MAX_REQUESTS', self.__async_max_requests)
+            self.__connect_timeout = app.config.get('ARAS_CONNECT_TIMEOUT', self.__connect_timeout)
+            self.__read_timeout = app.config.get('ARAS_READ_TIMEOUT', self.__read_timeout)
+            self.__tokens.configure(maxsize=app.config.get('ARAS_TOKEN_STORE_SIZE'),
+                                    refresh_margin=app.config.get('ARAS_TOKEN_REFRESH_MARGIN'))
+            openid_configuration_cache.configure(ttl=app.config.get('OPENID_CONFIGURATION_TTL'))
+            self.__retry.configure(retries=app.config.get('ARAS_RETRIES'),
+                                   backoff_factor=app.config.get('ARAS_BACKOFF_FACTOR'),
+                                   backoff_max=app.config.get('ARAS_BACKOFF_MAX'))
+            self.__circuit.configure(failures=app.config.get('ARAS_CIRCUIT_FAILURES'),
+                                     reset_timeout=app.config.get('ARAS_CIRCUIT_RESET_TIMEOUT'))
+
+        # The failures of the previous server do not open the circuit of this one
+        self.__circuit.reset()
+
+        # Replace any previous session, its pools were sized for the old configuration
+        if self.__session:
+            self.__session.close()
+        self.__session = self.__create_session()
+
+        if self.__async_sender:
+            self.__async_sender.close()
+            self.__async_sender = None
+
+    def __create_session(self) -> requests.Session:
+        # A single session is shared by all the requests sent to Aras, so the TCP/TLS
+        # connections are kept alive and reused instead of being opened on every call
+        logger.debug(f'Creating the ARAS API session: pool_connections={self.__pool_connections} '
+                     f'pool_maxsize={self.__pool_maxsize} pool_block={self.__pool_block} '
+                     f'keep_alive={self.__keep_alive}')
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.__pool_connections,
+                              pool_maxsize=self.__pool_maxsize,
+                              pool_block=self.__pool_block)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        if not self.__keep_alive:
+            session.headers['Connection'] = 'close'
+
+        return session
+
+    def __request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request reading Aras, retried with backoff on the connection errors, the timeouts
+        and the statuses of the retry policy, and fail it at once while the circuit is open.
+        """
+        self.__circuit.before_call()
+
+        attempt = 0
+        while True:
+            try:
+                res = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt < self.__retry.retries:
+                    self.__retry.wait(attempt, url, e.__class__.__name__)
+                    attempt += 1
+                    continue
+
+                self.__circuit.record_failure()
+                raise
+
+            if res.status_code not in self.__retry.statuses:
+                self.__circuit.record_success()
+                return res
+
+            if attempt < self.__retry.retries:
+                res.close()
+                self.__retry.wait(attempt, url, res.status_code)
+                attempt += 1
+                continue
+
+            self.__circuit.record_failure()
+            return res
 
-                if res.status_code == UNAUTHORIZED:
-                    abort(code=UNAUTHORIZED)
+    def __get(self, url: str, headers: dict = None, data: dict = None, stream: bool = False):
 
-                raise BadRequest(description if description else None)
+        try:
+            res = self.__request('GET', url, headers=headers, data=data, stream=stream)
+            self.__raise_for_response(res)
 
             return res
+        except requests.exceptions.Timeout as e:
+            logger.debug(f'{e.__class__.__name__} when connecting to: {url}')
+            raise GatewayTimeout(f'ARAS API did not answer in time: {e.__class__.__name__}')
         except requests.exceptions.ConnectionError as e:
             if isinstance(e.args[0], MaxRetryError):
                 logger.debug(f'MaxRetryError when connection to: {url}')
@@ -109,15 +300,27 @@ class ArasAPI:
             else:
                 raise InternalServerError(e.args[0].args[0])
 
+    @staticmethod
+    def __raise_for_response(res):
+        if not res:
+            description = res.content.decode('utf-8')
+
+            if res.status_code == UNAUTHORIZED:
+                abort(code=UNAUTHORIZED)
+
+            raise BadRequest(description if description else None)
+
     def __post(self, url: str, payload: dict = None):
 
         try:
-            res = requests.post(url, data=payload)
+            res = self.session.post(url, data=payload, timeout=self.timeout)
             if not res:
                 content = res.content.decode('utf-8')
                 raise BadRequest(json.loads(content)['error_description'] if content else None)
 
             return res
+        except requests.exceptions.Timeout as e:
+            raise GatewayTimeout(f'ARAS API did not answer in time: {e.__class__.__name__}')
         except requests.exceptions.ConnectionError as e:
             if isinstance(e.args[0], MaxRetryError):
                 raise e
@@ -125,9 +328,9 @@ class ArasAPI:
                 raise InternalServerError(e.args[0].args[0])
 
     def __get_server_url(self):
-        self.__aras_discovery_api_uri = f'{self.__aras_base_api_uri}/Server/OAuthServerDiscovery.aspx'
+        discovery_api_uri = f'{self.__aras_base_api_uri}/Server/OAuthServerDiscovery.aspx'
 
-        res = self.__get(self.__aras_discovery_api_uri)
+        res = self.__get(discovery_api_uri)
         if res:
             locations = res.json()['locations']
             if len(locations) == 1:
@@ -135,41 +338,35 @@ class ArasAPI:
             else:
                 for location in locations:
                     if self.__aras_base_api_uri in location['uri']:
-                        return location
+                        return location['uri']
 
         return None
 
-    def __get_openid_configuration(self):
-        if not self.__aras_server_uri:
-            self.__aras_server_uri = self.__get_server_url()
+    def __load_openid_configuration(self):
+        server_uri = self.__get_server_url()
+        if not server_uri:
+            return None
 
-        self.__token_endpoint_url = f'{self.__aras_server_uri}.well-known/openid-configuration'
-
-        res = self.__get(self.__token_endpoint_url)
+        res = self.__get(f'{server_uri}.well-known/openid-configuration')
         if res:
-            self.__aras_openid_configuration = res.json()
-
-            return self.__aras_openid_configuration
+            return res.json()
 
         return None
 
-    def __get_token_endpoint_uri(self):
-        if not self.__aras_openid_configuration:
-            self.__aras_openid_configuration = self.__get_openid_configuration()
+    def __get_openid_configuration(self) -> dict:
+        # The discovery is only repeated once the cached document expires, and once for concurrent logins
+        return openid_configuration_cache.get_or_load(self.__aras_base_api_uri,
+                                                      self.__load_openid_configuration) or dict()
 
-        if 'token_endpoint' in self.__aras_openid_configuration:
-            return self.__aras_openid_configuration.get('token_endpoint', None)
+    def discover(self) -> dict:
+        """Return the OpenID configuration of the OAuth server of Aras, discovered unless it is cached."""
+        return self.__get_openid_configuration()
 
-        return None
+    def __get_token_endpoint_uri(self):
+        return self.__get_openid_configuration().get('token_endpoint', None)
 
     def __get_end_session_endpoint_uri(self):
-        if not self.__aras_openid_configuration:
-            self.__aras_openid_configuration = self.__get_openid_configuration()
-
-        if 'end_session_endpoint' in self.__aras_openid_configuration:
-            return self.__aras_openid_configuration.get('end_session_endpoint', None)
-
-        return None
+        return self.__get_openid_configuration().get('end_session_endpoint', None)
 
     def __payload(self, username, password):
         return {
@@ -181,31 +378,62 @@ class ArasAPI:
             'database': self.__database,
         }
 
-    def get_token(self, username: str, password: str) -> str:
-
-        if not self.__aras_token_endpoint_uri:
-            self.__aras_token_endpoint_uri = self.__get_token_endpoint_uri()
+    def get_token(self, username: str, password: str) -> dict:
+        """Log in the user, who is kept in the token store until the token expires."""
 
         try:
             payload = self.__payload(username, password)
-            token = self.__post(self.__aras_token_endpoint_uri, payload=payload)
-            if token:
-                self.__token = token.json()
-                user = User(username=username, access_token=self.__token['access_token'])
-                self.__user = user
+            res = self.__post(self.__get_token_endpoint_uri(), payload=payload)
+            token = None
+            if res:
+                token = res.json()
+                self.__tokens.add(username, token)
 
-            return self.__token
+            return token
         except InternalServerError as e:
             raise BadRequest(e.description)
 
-    def get_resource(self, url, data: dict = None):
+    def refresh_token(self, refresh_token: str) -> dict:
+        """Request a new token with the refresh token of a user."""
+        payload = {
+            'grant_type': 'refresh_token',
+            'client_id': self.__client_id,
+            'refresh_token': refresh_token,
+        }
+        res = self.__post(self.__get_token_endpoint_uri(), payload=payload)
+
+        return res.json()
+
+    def __refresh_user(self, user) -> dict:
+        return self.refresh_token(user.refresh_token)
+
+    def __authorization(self) -> str:
+        access_token = self.access_token
+        if not access_token:
+            abort(code=UNAUTHORIZED)
+
+        return "Bearer " + access_token
+
+    def get_resource(self, url, data: dict = None, stream: bool = False):
+        """
+        Request a resource of the ARAS API, with stream the body is not read until
+        the content of the response is iterated or the response is closed.
+        """
+        batch = getattr(self.__local, 'batch', None)
+        if batch is not None:
+            # The request is sent when the batch is closed, return the response to be filled
+            logger.debug(f'Adding to the batch: {url}')
+            res = BatchResponse(url, data)
+            batch.append(res)
+            return res
+
         try:
             logger.debug(f'Requesting: {url}')
             headers = {
-                "Authorization": "Bearer " + self.__token['access_token'],
+                "Authorization": self.__authorization(),
                 "Accept": "application/json"
             }
-            res = self.__get(url, headers, data)
+            res = self.__get(url, headers, data, stream)
         except requests.exceptions.ConnectionError as e:
             raise e
         except InternalServerError as e:
@@ -213,12 +441,118 @@ class ArasAPI:
 
         return res
 
-    def end_session(self):
-        if not self.__aras_end_session_endpoint_uri:
-            self.__aras_end_session_endpoint_uri = self.__get_end_session_endpoint_uri()
+    @contextmanager
+    def collect(self):
+        """
+        Collect the get_resource calls of the with block without sending them, the
+        list of the responses to be filled is returned by the with statement.
+        """
+        previous = getattr(self.__local, 'batch', None)
+        self.__local.batch = batch = list()
+        try:
+            yield batch
+        finally:
+            self.__local.batch = previous
+
+    @contextmanager
+    def batch(self):
+        """
+        Collect the get_resource calls of the with block and send them when the block
+        ends, as a single OData $batch request or concurrently by the asynchronous
+        client, the responses returned inside the block can be read once it has been closed.
+
+        When both are disabled the requests are sent immediately.
+        """
+        enabled = self.__batch_enabled or self.__async_enabled
+        if not enabled or getattr(self.__local, 'batch', None) is not None:
+            yield
+            return
+
+        with self.collect() as batch:
+            yield
+
+        if self.__batch_enabled:
+            self.__send_batch(batch)
+        else:
+            self.__send_async(batch)
+
+    def __send_async(self, batch: list):
+        headers = {
+            "Authorization": self.__authorization(),
+            "Accept": "application/json"
+        }
+
+        self.__circuit.before_call()
+        try:
+            self.async_sender.send(batch, headers)
+        except (InternalServerError, GatewayTimeout):
+            self.__circuit.record_failure()
+            raise
+
+        if any(response.status_code in self.__retry.statuses for response in batch):
+            self.__circuit.record_failure()
+        else:
+            self.__circuit.record_success()
+
+        for response in batch:
+            self.__raise_for_response(response)
+
+    def __send_batch(self, batch: list):
+        if not batch:
+            return
+
+        content_type, body = build_batch_body(batch, self.__source_base_uri)
+        headers = {
+            "Authorization": self.__authorization(),
+            "Accept": "multipart/mixed",
+            "Content-Type": content_type
+        }
+
+        logger.debug(f'Requesting a batch of {len(batch)} requests')
+
+        # The requests of the batch only read Aras, it is retried as them
+        try:
+            res = self.__request('POST', self.__source_base_uri + '$batch', headers=headers, data=body)
+        except requests.exceptions.Timeout as e:
+            raise GatewayTimeout(f'ARAS API did not answer in time: {e.__class__.__name__}')
+        except requests.exceptions.ConnectionError as e:
+            if isinstance(e.args[0], MaxRetryError):
+                raise e
+            else:
+                raise InternalServerError(e.args[0].args[0])
 
+        if res.status_code == UNAUTHORIZED:
+            abort(code=UNAUTHORIZED)
+
+        results = None
+        if res:
+            try:
+                results = parse_batch_response(res.headers.get('Content-Type'), res.content)
+            except (ValueError, IndexError) as e:
+                logger.warning(f'Could not parse the $batch response: {e}')
+
+        if not results or len(results) != len(batch):
+            # The server does not support $batch, send the requests one by one
+            logger.warning(f'The $batch request failed with {res.status_code}, sending the requests individually')
+            for response in batch:
+                single = self.get_resource(response.url, response.data)
+                response.resolve(single.status_code, dict(single.headers), single.content)
+            return
+
+        for response, (status_code, headers, content) in zip(batch, results):
+            response.resolve(status_code, headers, content)
+            self.__raise_for_response(response)
+
+    def end_session(self, user: User = None):
+        """
+        End the session of the user being served, removed from the token store by the access token of
+        its login as the one sent to Aras changes when it is refreshed.
+        """
         try:
-            res = self.__get(self.__aras_end_session_endpoint_uri)
+            res = self.__get(self.__get_end_session_endpoint_uri())
+            token_key = user.token_key if user is not None else self.__access_token.get()
+            if res and token_key:
+                self.__tokens.remove(token_key)
             return res
         except OAuthError as e:
             raise BadRequest(e.description)
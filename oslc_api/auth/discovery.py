@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from oslc_api.auth.client import openid_configuration_cache
+
+logger = logging.getLogger(__name__)
+
+
+def read_entry(path: str, aras_base_api_uri: str, ttl: float = None):
+    """
+    Return the entry of the OAuth server of Aras written by write_configuration, with its OpenID
+    configuration and the time it was discovered_at, None if there is none or it is older than ttl seconds.
+    """
+    if not path or not os.path.isfile(path):
+        return None
+
+    try:
+        with open(path) as configuration_file:
+            entry = json.load(configuration_file).get(aras_base_api_uri)
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f'Could not read the OpenID configuration {path}: {e}')
+        return None
+
+    if not isinstance(entry, dict) or not isinstance(entry.get('configuration'), dict):
+        return None
+
+    if ttl is not None and time.time() - entry.get('discovered_at', 0) >= ttl:
+        return None
+
+    return entry
+
+
+def read_configuration(path: str, aras_base_api_uri: str, ttl: float = None):
+    """Return the OpenID configuration of the entry of the server, None if it could not be read or has expired."""
+    entry = read_entry(path, aras_base_api_uri, ttl)
+    return entry['configuration'] if entry else None
+
+
+def write_configuration(path: str, aras_base_api_uri: str, configuration: dict):
+    """Write the OpenID configuration of the server along with the others of the file, replaced at once."""
+    data = dict()
+    if os.path.isfile(path):
+        try:
+            with open(path) as configuration_file:
+                data = json.load(configuration_file)
+        except (OSError, ValueError):
+            pass
+
+    data[aras_base_api_uri] = {'discovered_at': time.time(), 'configuration': configuration}
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.openid-')
+    try:
+        with os.fdopen(fd, 'w') as configuration_file:
+            json.dump(data, configuration_file)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    logger.debug(f'OpenID configuration written to {path}')
+
+
+def configure(aras_api, path: str = None, ttl: float = None, eager: bool = True):
+    """
+    Load the OpenID configuration of the file written by another worker or discover it
+    in the background while the application starts, and write it to the file.
+
+    :return: the thread of the discovery, None if it was read from the file or it is not eager
+    """
+    base_uri = aras_api.aras_base_api_uri
+
+    if ttl is None:
+        ttl = openid_configuration_cache.ttl
+
+    entry = read_entry(path, base_uri, ttl)
+    if entry:
+        # The configuration expires with the discovery of the worker that wrote it, not when it is loaded
+        age = max(0.0, time.time() - entry.get('discovered_at', 0))
+        openid_configuration_cache.set(base_uri, entry['configuration'], ttl=ttl - age)
+        logger.info(f'Loaded the OpenID configuration of {base_uri} from {path}')
+        return None
+
+    if not eager:
+        return None
+
+    def discover():
+        try:
+            configuration = aras_api.discover()
+            if configuration and path:
+                write_configuration(path, base_uri, configuration)
+        except Exception as e:
+            # The discovery is repeated by the first login
+            logger.warning(f'Could not discover the OAuth server of {base_uri}: {e}')
+
+    thread = threading.Thread(target=discover, name='oauth-discovery', daemon=True)
+    thread.start()
+
+    return thread
@@ -8,14 +8,20 @@ class User(UserMixin):
     access_token = None
     expires_in = None
     expires_at = None
+    refresh_token = None
+    # The access token returned by the login, sent by the client in X-ARAS-ACCESS-TOKEN while the token is refreshed
+    token_key = None
 
-    def __init__(self, username, id_token=None, access_token=None, expires_in=None, expires_at=None):
+    def __init__(self, username, id_token=None, access_token=None, expires_in=None, expires_at=None,
+                 refresh_token=None, token_key=None):
         self.id = username
         self.username = username
         self.id_token = id_token
         self.access_token = access_token
+        self.token_key = token_key or access_token
         self.expires_in = expires_in
         self.expires_at = expires_at
+        self.refresh_token = refresh_token
 
     def __repr__(self):
         return f'<User: [username: {self.username}]>'
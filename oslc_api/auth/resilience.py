@@ -0,0 +1,152 @@
+import logging
+import math
+import random
+import threading
+import time
+
+from werkzeug.exceptions import ServiceUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Statuses of a gateway or of an overloaded Aras, the same request can succeed later
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    Retries of the requests reading Aras, waiting before each retry a random time up to an
+    exponential backoff (full jitter), so the retries of the workers are spread instead of
+    reaching the server at the same time.
+
+    :param retries: number of retries after the first attempt, 0 to disable them
+    :param backoff_factor: seconds of the backoff of the first retry, doubled on each retry
+    :param backoff_max: maximum seconds of the backoff
+    :param statuses: statuses of the responses that are retried, besides the connection errors
+    """
+
+    def __init__(self, retries: int = 0, backoff_factor: float = 0.5, backoff_max: float = 10,
+                 statuses=RETRY_STATUSES, sleep=time.sleep, jitter=random.random):
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.statuses = statuses
+        self.sleep = sleep
+        self.retried = 0
+
+        self.__jitter = jitter
+        self.__lock = threading.Lock()
+
+    def configure(self, retries: int = None, backoff_factor: float = None, backoff_max: float = None):
+        if retries is not None:
+            self.retries = retries
+        if backoff_factor is not None:
+            self.backoff_factor = backoff_factor
+        if backoff_max is not None:
+            self.backoff_max = backoff_max
+
+    def backoff(self, attempt: int) -> float:
+        """Return the seconds to wait before the retry following the given attempt, starting at 0."""
+        with self.__lock:
+            self.retried += 1
+
+        return self.__jitter() * min(self.backoff_max, self.backoff_factor * 2 ** attempt)
+
+    def wait(self, attempt: int, url: str, reason):
+        delay = self.backoff(attempt)
+        logger.debug(f'Retrying in {delay:.2f}s ({attempt + 1}/{self.retries}) after {reason}: {url}')
+        self.sleep(delay)
+
+
+class CircuitOpenError(ServiceUnavailable):
+    description = 'ARAS API is unavailable, the requests are not sent until it recovers.'
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker of the requests sent to Aras.
+
+    The circuit opens after the given number of consecutive failures, then the requests
+    fail at once with CircuitOpenError instead of waiting for an unhealthy server. After
+    reset_timeout seconds a single request is let through (half-open): the circuit closes
+    when it succeeds and opens again when it fails.
+
+    :param failures: consecutive failures opening the circuit, 0 to disable it
+    :param reset_timeout: seconds the circuit stays open before a request is tried again
+    :param timer: clock of the reset timeout
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failures: int = 0, reset_timeout: float = 30, timer=time.monotonic):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.opened = 0
+
+        self.__timer = timer
+        self.__lock = threading.Lock()
+        self.__state = self.CLOSED
+        self.__failed = 0
+        self.__opened_at = None
+
+    def configure(self, failures: int = None, reset_timeout: float = None):
+        with self.__lock:
+            if failures is not None:
+                self.failures = failures
+            if reset_timeout is not None:
+                self.reset_timeout = reset_timeout
+
+    @property
+    def state(self) -> str:
+        with self.__lock:
+            return self.__state
+
+    @property
+    def is_open(self) -> bool:
+        """True while the requests fail at once, including the half-open state until the trial ends."""
+        return self.state != self.CLOSED
+
+    def before_call(self):
+        """Raise CircuitOpenError if the request must not be sent."""
+        if not self.failures:
+            return
+
+        with self.__lock:
+            if self.__state == self.CLOSED:
+                return
+
+            elapsed = self.__timer() - self.__opened_at
+            if elapsed < self.reset_timeout:
+                raise CircuitOpenError(retry_after=max(1, math.ceil(self.reset_timeout - elapsed)))
+
+            # Let this request through, the others keep failing until it ends or another timeout passes
+            logger.info('Trying a request to ARAS API, the circuit is half-open')
+            self.__state = self.HALF_OPEN
+            self.__opened_at = self.__timer()
+
+    def record_success(self):
+        with self.__lock:
+            if self.__state != self.CLOSED:
+                logger.info('ARAS API has recovered, the circuit is closed')
+            self.__state = self.CLOSED
+            self.__failed = 0
+
+    def record_failure(self):
+        if not self.failures:
+            return
+
+        with self.__lock:
+            self.__failed += 1
+            if self.__state == self.HALF_OPEN or (self.__state == self.CLOSED and self.__failed >= self.failures):
+                logger.warning(f'ARAS API failed {self.__failed} times in a row, '
+                               f'the circuit is open for {self.reset_timeout}s')
+                self.__state = self.OPEN
+                self.__opened_at = self.__timer()
+                self.opened += 1
+
+    def reset(self):
+        with self.__lock:
+            self.__state = self.CLOSED
+            self.__failed = 0
+            self.__opened_at = None
@@ -1,7 +1,7 @@
 import logging
 
 from flask import make_response
-from flask_login import login_required, logout_user
+from flask_login import login_required, logout_user, current_user
 from flask_restx import Namespace, Resource, fields
 from werkzeug.exceptions import InternalServerError
 
@@ -39,7 +39,7 @@ class Logout(Resource):
 
     @login_required
     def get(self):
-        res = aras_api.end_session()
+        res = aras_api.end_session(current_user)
         if res:
             logout_user()
             return make_response({'message': 'Session ended'}, 200)
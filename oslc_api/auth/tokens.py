@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from oslc_api.auth.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStore:
+    """
+    Thread-safe store of the users logged in to Aras by their access token.
+
+    The users are kept by the access token returned by their login (their token_key), the
+    token sent to Aras is refreshed with their refresh token before it expires: in the
+    background when it is used within the refresh margin, and at once when it has already expired.
+
+    :param maxsize: maximum number of users, the least recently used is evicted first
+    :param refresh: function returning a new token (dict) for a user, None to disable the refresh
+    :param refresh_margin: seconds before the expiry of a token when it is refreshed in the background
+    :param timer: clock of the expiry of the tokens, in seconds since the epoch as expires_at
+    """
+
+    def __init__(self, maxsize: int = 1024, refresh=None, refresh_margin: float = 60, timer=time.time):
+        self.maxsize = maxsize
+        self.refresh_margin = refresh_margin
+        self.refreshes = 0
+
+        self.__refresh = refresh
+        self.__timer = timer
+        self.__users = OrderedDict()
+        self.__lock = threading.RLock()
+        self.__refreshing = dict()
+
+    def configure(self, maxsize: int = None, refresh=None, refresh_margin: float = None):
+        with self.__lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if refresh is not None:
+                self.__refresh = refresh
+            if refresh_margin is not None:
+                self.refresh_margin = refresh_margin
+
+            self.__evict()
+
+    def __evict(self):
+        while len(self.__users) > max(self.maxsize, 0):
+            _, user = self.__users.popitem(last=False)
+            logger.debug(f'Evicting the token of {user}')
+
+    def __expires_at(self, token: dict):
+        expires_at = token.get('expires_at')
+        if expires_at is None and token.get('expires_in') is not None:
+            expires_at = self.__timer() + int(token['expires_in'])
+
+        return expires_at
+
+    def add(self, username: str, token: dict) -> User:
+        """Add the user of the token returned by the token endpoint, it expires after its expires_in seconds."""
+        user = User(username=username, id_token=token.get('id_token'), access_token=token['access_token'],
+                    expires_in=token.get('expires_in'), expires_at=self.__expires_at(token),
+                    refresh_token=token.get('refresh_token'))
+        self.add_user(user)
+
+        return user
+
+    def add_user(self, user: User):
+        with self.__lock:
+            self.__users[user.token_key] = user
+            self.__users.move_to_end(user.token_key)
+            self.__evict()
+
+    def get(self, access_token: str):
+        """
+        Return the user of the access token returned by the login, None if it is unknown
+        or it has expired and could not be refreshed.
+        """
+        with self.__lock:
+            user = self.__users.get(access_token)
+            if user is None:
+                return None
+
+            self.__users.move_to_end(access_token)
+
+        if user.expires_at is None:
+            return user
+
+        remaining = float(user.expires_at) - self.__timer()
+        refreshable = self.__refresh is not None and user.refresh_token
+
+        if remaining <= 0:
+            if refreshable and self.refresh(user):
+                return user
+
+            self.remove(access_token)
+            logger.debug(f'The token of {user} has expired')
+            return None
+
+        if refreshable and remaining <= self.refresh_margin:
+            self.__refresh_in_background(user)
+
+        return user
+
+    def refresh(self, user: User) -> bool:
+        """
+        Replace the token of the user by a new one, the concurrent calls for
+        the same user wait for the first one and share its token.
+
+        :return: True if the token was refreshed
+        """
+        expires_at = user.expires_at
+
+        with self.__lock:
+            user_lock = self.__refreshing.setdefault(id(user), threading.Lock())
+
+        with user_lock:
+            try:
+                if user.expires_at != expires_at:
+                    # Refreshed by another thread in the meantime
+                    return True
+
+                logger.debug(f'Refreshing the token of {user}')
+                token = self.__refresh(user)
+
+                with self.__lock:
+                    user.access_token = token['access_token']
+                    user.id_token = token.get('id_token', user.id_token)
+                    user.refresh_token = token.get('refresh_token', user.refresh_token)
+                    user.expires_in = token.get('expires_in')
+                    user.expires_at = self.__expires_at(token)
+                    self.refreshes += 1
+
+                return True
+            except Exception as e:
+                logger.warning(f'Could not refresh the token of {user}: {e}')
+                return False
+            finally:
+                with self.__lock:
+                    self.__refreshing.pop(id(user), None)
+
+    def __refresh_in_background(self, user: User):
+        with self.__lock:
+            if id(user) in self.__refreshing:
+                return
+
+        threading.Thread(target=self.refresh, args=(user,), name='token-refresh', daemon=True).start()
+
+    def remove(self, access_token: str) -> bool:
+        """Remove the user of the access token returned by the login, the token_key of the user."""
+        with self.__lock:
+            return self.__users.pop(access_token, None) is not None
+
+    def clear(self):
+        with self.__lock:
+            self.__users.clear()
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__users)
@@ -31,6 +31,9 @@ api = Api(
 api.representations['application/rdf+xml'] = output_rdf
 api.representations['application/json-ld'] = output_rdf
 api.representations['text/turtle'] = output_rdf
+api.representations['application/n-triples'] = output_rdf
+api.representations['application/n-quads'] = output_rdf
+api.representations['application/ld+json'] = output_rdf
 
 
 @blueprint.errorhandler(HTTPException)
@@ -75,4 +78,33 @@ def init_app(app):
     from oslc_api.rest_api.config import config_ns
     api.add_namespace(config_ns)
 
+    from oslc_api.rest_api.cache import cache_ns
+    api.add_namespace(cache_ns)
+
+    from oslc_api.aras import concurrency
+    concurrency.configure(workers=app.config.get('ARAS_MAX_CONCURRENT_REQUESTS'))
+
+    from oslc_api.rest_api.aras import shape_cache, versionable_cache, version_history_cache
+    shape_cache.configure(maxsize=app.config.get('SHAPE_CACHE_SIZE'), ttl=app.config.get('SHAPE_CACHE_TTL'),
+                          negative_ttl=app.config.get('SHAPE_CACHE_NEGATIVE_TTL'))
+    versionable_cache.configure(refresh=app.config.get('VERSIONABLE_REFRESH_INTERVAL'),
+                                ttl=app.config.get('VERSIONABLE_TTL'),
+                                negative_ttl=app.config.get('VERSIONABLE_LOOKUP_TTL'))
+    version_history_cache.configure(ttl=app.config.get('VERSION_HISTORY_TTL'))
+
+    from oslc_api.aras.resources import item_types_cache, service_provider_cache
+    item_types_cache.configure(refresh=app.config.get('ITEM_TYPES_REFRESH_INTERVAL'),
+                               ttl=app.config.get('ITEM_TYPES_TTL'))
+    service_provider_cache.configure(ttl=app.config.get('ITEM_TYPES_TTL'))
+
+    # The metadata read by a previous run is served at once and loaded again in the background
+    from oslc_api.aras import snapshot
+    snapshot.configure(path=app.config.get('METADATA_SNAPSHOT'), interval=app.config.get('METADATA_SNAPSHOT_INTERVAL'))
+
+    from oslc_api.aras.cache import create_cache
+    app.extensions['response_cache'] = create_cache('responses',
+                                                    url=app.config.get('RESPONSE_CACHE_URL'),
+                                                    maxsize=app.config.get('RESPONSE_CACHE_SIZE', 1024),
+                                                    ttl=app.config.get('RESPONSE_CACHE_TTL'))
+
     app.register_blueprint(blueprint)
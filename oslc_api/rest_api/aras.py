@@ -1,7 +1,11 @@
+import functools
+import itertools
 import logging
 import os
 import re
-from urllib.parse import quote, unquote
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote, urljoin
 
 import rdflib
 from rdflib import Graph, RDF, RDFS, DCTERMS, XSD, URIRef, Literal
@@ -10,66 +14,103 @@ from rdflib.resource import Resource
 from oslc_api.aras.client import query_expanded_item, query_relation_properties, \
     query_item_types_list, query_item_instances, query_item_type_properties, query_item_type_relationships, \
     query_item_generations, get_is_versionable, get_current_item_id, get_validate_item_id, \
-    get_validate_config_id
-from oslc_api.aras.data import load_from_json_file
+    get_validate_config_id, query_item_types_versionable, query_item_version, batch, batch_enabled, \
+    query_expanded_items, query_items_relation_properties, query_next_link, chunk_relation_item_ids
+from oslc_api.aras.cache import TTLCache, normalize_item_type
+from oslc_api.aras.concurrency import fan_out, prefetch
+from oslc_api.aras.data import load_from_json_file, iter_response_values
 from oslc_api.aras.namespaces import ARAS, OSLC, OSLC_CONFIG
-from oslc_api.aras.properties import RDFProperty
+from oslc_api.aras.paging import decode_page_token
+from oslc_api.aras.properties import RDFProperty, get_property_index
 
 logger = logging.getLogger(__name__)
 
+# Fields of a version telling whether its documents changed, a version that is not the current one never changes
+VERSION_FIELDS = ('id', 'generation', 'modified_on', 'created_on', 'is_current')
+
+# Generated ResourceShape graphs by (source base URI, item type, url_sp), the ItemTypes not found are kept shortly
+shape_cache = TTLCache('shapes', maxsize=256, ttl=600, negative_ttl=30)
+
+# Index of ItemType name -> is_versionable by source base URI, reloaded in background once the refresh interval passed,
+#  and is_versionable by (source base URI, ItemType name) of the ItemTypes missing from it, kept for the negative_ttl
+versionable_cache = TTLCache('versionable', maxsize=256, ttl=3600, refresh=300, negative_ttl=60)
+
+# Versions (id and keyed_name) of the config_ids by (source base URI, item type, config_id), shared by the
+#  component, configurations and stream resources and reloaded when a newer generation is found
+version_history_cache = TTLCache('version_history', maxsize=1024, ttl=60)
+
+# Versions (source base URI, item type, config_id, item_id) found by a recent read, a version never
+#  changes its config_id, so the related items of a known one are queried along with it
+validated_versions_cache = TTLCache('validated_versions', maxsize=4096, ttl=300)
+
+
+def iter_collection_values(source_base_uri: str, response, fields=None):
+    """Yield the entries of a whole collection, following the @odata.nextLink of the pages returned by Aras."""
+    while response is not None:
+        annotations = dict()
+        yield from iter_response_values(response, fields=fields, annotations=annotations)
+
+        next_link = annotations.get('@odata.nextLink')
+        response = query_next_link(urljoin(source_base_uri, next_link), stream=True) if next_link else None
+
 
 def load_item_types(source_base_uri: str) -> dict:
     item_types = dict()
 
-    response = query_item_types_list(source_base_uri)
+    response = query_item_types_list(source_base_uri, stream=True)
 
-    if response and response.status_code == 200:
-        data = response.json()
-
-        if data:
-            for p in data['value']:
-                item_type_id = p['@odata.id'].replace('ItemType(\'', '').replace('\')', '')
-                item_types[item_type_id] = p['name']
+    for p in iter_collection_values(source_base_uri, response, fields=('@odata.id', 'name')):
+        item_type_id = p['@odata.id'].replace('ItemType(\'', '').replace('\')', '')
+        item_types[item_type_id] = p['name']
 
     return item_types
 
 
 def get_item_rdf(item_graph: Graph, item_type: str, source_base_url: str, item_id: str, config_id: str, item_url: str,
-                 url_sp: str):
+                 url_sp: str, version: dict = None):
+    """
+    Add the item to the graph with its properties and its related items.
+
+    :param version: filled with the VERSION_FIELDS of the version that was read
+    """
     # Decode the item_url and replace whitespace with dot
     item_url = unquote(item_url)
     item_url = re.sub(' ', '.', item_url)
 
     # Get the resource shape graph to extract the relationships to be queried
-    g = load_resource_shape(item_type, url_sp=url_sp,
-                            source_base_url=source_base_url)
-    if not g:
+    rs = load_resource_shape(item_type, url_sp=url_sp,
+                             source_base_url=source_base_url)
+    if not rs:
         return None
 
-    rs = get_resource_shape(item_type, url_sp, source_base_url)
-    if not rs:
-        if g:
-            rs = g
-        else:
-            return None
+    oslc_resource_shape_base = url_sp + '/' + re.sub(' ', '.', item_type) + "/resourceShape#"
 
-    oslc_base = url_sp
-    oslc_resource_shape_base = oslc_base + '/' + re.sub(' ', '.', item_type) + "/resourceShape#"
-    oslc_config_base = oslc_base + '/config'
+    # Read the properties of the resource shape from its index instead of querying the graph
+    index = get_property_index(rs)
+    rel_props = index.relationships
 
-    # Get expanded item JSON from the API by following the resource shapes file
-    item_response = query_expanded_item(source_base_url, item_type, item_id, config_id, rs)
-    if item_response:
-        item_json = item_response.json()
+    # The expanded item is also the validation of the version: it is not found or it belongs to another
+    #  config_id. The related items of a version validated by a recent read are queried along with it
+    key = (source_base_url, item_type, config_id, item_id)
+    validated = bool(item_id) and validated_versions_cache.get(key, False)
 
-    # equalize query responses to avoid having errors when the item_id was
-    # inexistent and the config_id was used as filtering
-    if 'value' in item_json.keys():
-        item_json = item_json['value'][0]
+    queries = [functools.partial(query_expanded_item, source_base_url, item_type, item_id, config_id, rs)]
+    if validated:
+        queries.extend(functools.partial(query_relation_properties, source_base_url, rel_prop.name, item_id)
+                       for rel_prop in rel_props)
+    responses = send_queries(queries)
+
+    item_json = read_expanded_item(responses[0], config_id)
+    if item_json is None:
+        validated_versions_cache.invalidate(key)
+        return None
 
     # set the item_id property if it wasn't passed in the method
     if not item_id:
         item_id = item_json['id']
+    if version is not None:
+        version.update((field, item_json.get(field)) for field in VERSION_FIELDS)
+    validated_versions_cache.set((source_base_url, item_type, config_id, item_id), True)
 
     # Build RDF Graph for an item
     item_graph.bind('rdf', RDF)
@@ -81,6 +122,65 @@ def get_item_rdf(item_graph: Graph, item_type: str, source_base_url: str, item_i
     item_graph.bind('oslc', OSLC)
     item_graph.bind('oslc_config', OSLC_CONFIG)
 
+    versionable = check_if_versionable(source_base_url, item_type)
+
+    item_node = add_item_properties(item_graph, item_type, item_json, config_id, item_url, url_sp, index, versionable)
+
+    # Query the API for the related items of all the Zero-or-many relationships at once, the results keep
+    #  the order of the properties so they are inserted into the item graph always in the same order
+    if validated:
+        rel_item_responses = responses[1:]
+    else:
+        rel_item_responses = send_queries(
+            [functools.partial(query_relation_properties, source_base_url, rel_prop.name, item_id)
+             for rel_prop in rel_props])
+
+    # Iterate through the responses and insert the list of instances into the item graph
+    for rel_prop, rel_item_response in zip(rel_props, rel_item_responses):
+        rel_item_json = None
+        if rel_item_response:
+            rel_item_json = rel_item_response.json()
+
+        if rel_item_json is not None and rel_item_json.get('value'):
+            add_item_relationships(item_node, item_type, rel_prop, rel_item_json.get('value'), url_sp)
+
+    return item_node
+
+
+def send_queries(queries: list) -> list:
+    """Send the queries at once, as a $batch, by the asynchronous client or concurrently, and return their responses in order."""
+    if batch_enabled():
+        with batch():
+            return [query() for query in queries]
+
+    return fan_out(lambda query: query(), queries)
+
+
+def read_expanded_item(response, config_id: str):
+    """Return the item of the response of query_expanded_item, None if it is not a version of the config_id."""
+    if not response or response.status_code != 200:
+        return None
+
+    item_json = response.json()
+
+    # The versions filtered by config_id are returned in the value array
+    if 'value' in item_json:
+        return item_json['value'][0] if item_json['value'] else None
+
+    item_config_id = item_json.get('config_id')
+    if isinstance(item_config_id, dict):
+        item_config_id = item_config_id.get('id')
+
+    return item_json if item_config_id == config_id else None
+
+
+def add_item_properties(item_graph: Graph, item_type: str, item_json: dict, config_id: str, item_url: str,
+                        url_sp: str, index, versionable: bool) -> Resource:
+    """Add the item node with the values of the single occurrence properties of its ResourceShape index."""
+    oslc_base = url_sp
+    oslc_resource_shape_base = oslc_base + '/' + re.sub(' ', '.', item_type) + "/resourceShape#"
+    oslc_config_base = oslc_base + '/config'
+
     # Create the RDF resource shape node for each item type
     item_node = Resource(item_graph, URIRef(item_url))
     item_node.add(RDF.type, URIRef(ARAS + re.sub(' ', '.', item_type)))
@@ -89,103 +189,123 @@ def get_item_rdf(item_graph: Graph, item_type: str, source_base_url: str, item_i
     item_node.add(OSLC.instanceShape, URIRef(oslc_resource_shape_base))
 
     # If the item is versionable, add version properties
-    if check_if_versionable(source_base_url, item_type):
+    if versionable:
         item_node.add(RDF.type, URIRef(OSLC_CONFIG.VersionResource))
         item_node.add(OSLC_CONFIG.versionId, Literal(item_json.get('id'), datatype=XSD.string))
         item_node.add(DCTERMS.isVersionOf, URIRef(item_url))
 
-    # Query and iterate through the item type properties to build the item graph
-    qres = rs.query(
-        """
-        SELECT ?prop ?type ?def
-            WHERE {
-                ?s oslc:name ?prop.
-                ?s oslc:occurs ?occurs.
-                FILTER(?occurs IN (oslc:Exactly-one, oslc:Zero-or-one))
-                OPTIONAL {
-                    ?s ?type ?def.
-                    FILTER(?type IN (oslc:valueType, oslc:propertyDefinition))
-                }
-            }
-        """
-    )
-
     # Iterate through the properties and insert them into the item graph
-    for row in qres:
-        # Extract the SPARQL results as the property name, data type, and property definitions
-        prop = row['prop']
-        data_type = row['type']
-        resource_def = row['def']
+    for item_property in index.single:
+        prop = item_property.name
 
         # iterate through the properties of the resource shapes file and get their value from the JSON response
         prop_val = None
-        if item_json.get(str(prop)):
-            prop_val = item_json.get(str(prop))
+        if item_json.get(prop):
+            prop_val = item_json.get(prop)
 
         if type(prop_val) is dict:
             prop_val = prop_val['config_id']['id']
 
         # Associate the property to the graph according to their data type/relationship
-        if data_type == OSLC.propertyDefinition:
-            prop_item_search = re.search('(.*?)api/oslc/(.*?)/resourceShape', resource_def, re.IGNORECASE)
-            if prop_item_search:
-                prop_item_type = prop_item_search.group(2)
+        if item_property.property_definition:
+            prop_item_type = item_property.target
+            if prop_item_type:
                 if prop_val:
-                    logger.debug(f'property: {str(prop)}')
+                    logger.debug(f'property: {prop}')
                     unquoted_pre = oslc_resource_shape_base + re.sub(' ', '.', prop)
                     unquoted_obj = oslc_base + '/' + re.sub(' ', '.', prop_item_type) + '/' + prop_val
                     unquoted_obj += '?oslc_config.context='
                     unquoted_obj += quote(oslc_config_base + '/' +
                                           re.sub(' ', '.', prop_item_type) +
                                           '/component/' +
-                                          prop_val + '/stream/' + item_json[str(prop)]['id'])
+                                          prop_val + '/stream/' + item_json[prop]['id'])
                     item_node.add(URIRef(unquoted_pre), URIRef(unquoted_obj))
-        elif data_type == OSLC.valueType:
+        if item_property.value_type:
             if prop_val:
                 item_node.add(URIRef(oslc_resource_shape_base + re.sub(' ', '.', prop)),
-                              Literal(prop_val, datatype=resource_def))
-
-    # Iterate through the Zero-or-many properties and query for the external relationships
-    qres = rs.query(
-        """SELECT ?prop ?def
-           WHERE {
-              ?s oslc:name ?prop.
-              ?s oslc:occurs oslc:Zero-or-many.
-              ?s oslc:propertyDefinition ?def.
-           }""")
-
-    # Iterate through the properties and query the API to create a list of instances and insert into the
-    #  item graph
-    for row in qres:
-        # Associate the SPARQL query results to variables
-        rel_prop = str(row['prop'])
-        rel_def = row['def']
-
-        if str(rel_prop) not in ('oslc_component', 'oslc_version_id', 'dcterms_is_version_of'):
-            rel_item_response = query_relation_properties(source_base_url, rel_prop, item_id)
-            rel_item_json = None
-            if rel_item_response:
-                rel_item_json = rel_item_response.json()
-
-            if rel_item_json is not None and rel_item_json.get('value'):
-                for rel_item in rel_item_json.get('value'):
-                    rel_prop_val = rel_item['config_id']['id']
-                    prop_item_search = re.search('(.*?)api/oslc/(.*?)/resourceShape', rel_def, re.IGNORECASE)
-                    if prop_item_search:
-                        prop_item_type = prop_item_search.group(2)
-                        if rel_prop_val:
-                            unquoted_pre = oslc_resource_shape_base + re.sub(' ', '.', rel_prop)
-                            unquoted_obj = oslc_base + '/' + re.sub(' ', '.', prop_item_type) + '/' + rel_prop_val
-                            unquoted_obj += '?oslc_config.context='
-                            unquoted_obj += quote(oslc_config_base + '/' +
-                                                  re.sub(' ', '.', prop_item_type) + '/component/' +
-                                                  rel_prop_val + '/stream/' + rel_item['id'])
-                            item_node.add(URIRef(unquoted_pre),
-                                          URIRef(unquoted_obj))
+                              Literal(prop_val, datatype=item_property.value_type))
 
     return item_node
 
 
+def add_item_relationships(item_node: Resource, item_type: str, rel_prop, rel_items: list, url_sp: str):
+    """Add the related items of a Zero-or-many relationship of the item."""
+    oslc_base = url_sp
+    oslc_resource_shape_base = oslc_base + '/' + re.sub(' ', '.', item_type) + "/resourceShape#"
+    oslc_config_base = oslc_base + '/config'
+
+    for rel_item in rel_items:
+        rel_prop_val = rel_item['config_id']['id']
+        prop_item_type = rel_prop.target
+        if prop_item_type:
+            if rel_prop_val:
+                unquoted_pre = oslc_resource_shape_base + re.sub(' ', '.', rel_prop.name)
+                unquoted_obj = oslc_base + '/' + re.sub(' ', '.', prop_item_type) + '/' + rel_prop_val
+                unquoted_obj += '?oslc_config.context='
+                unquoted_obj += quote(oslc_config_base + '/' +
+                                      re.sub(' ', '.', prop_item_type) + '/component/' +
+                                      rel_prop_val + '/stream/' + rel_item['id'])
+                item_node.add(URIRef(unquoted_pre),
+                              URIRef(unquoted_obj))
+
+
+def iter_export_graphs(source_base_url: str, item_type: str, url_sp: str, page_size: int = 100, workers: int = None):
+    """
+    Build the graph of every item of the ItemType, the same of its QueryResource, reading
+    the ResourceShape once and the pages of the expanded items (and their relationships)
+    concurrently with $top/$skip.
+
+    :return: an iterator of the pairs (item_url, graph) or None if the ItemType has no ResourceShape
+    """
+    rs = load_resource_shape(item_type, url_sp=url_sp, source_base_url=source_base_url)
+    if not rs:
+        return None
+
+    index = get_property_index(rs)
+    versionable = check_if_versionable(source_base_url, item_type)
+    item_base = url_sp + '/' + re.sub(' ', '.', item_type) + '/'
+
+    def load_page(page_no: int) -> tuple:
+        items = list(iter_response_values(
+            query_expanded_items(source_base_url, item_type, rs, page_size, page_no, stream=True)))
+
+        # The related items of the whole page with a single query for each relationship
+        relationships = dict()
+        item_ids = [item['id'] for item in items]
+        for rel_prop in (index.relationships if item_ids else []):
+            related = defaultdict(list)
+            # The ids are split so that each URL fits in the limits of IIS, each response can be paged by Aras
+            for ids in chunk_relation_item_ids(source_base_url, rel_prop.name, item_ids):
+                response = query_items_relation_properties(source_base_url, rel_prop.name, ids, stream=True)
+                for rel_item in iter_collection_values(source_base_url, response,
+                                                       fields=('id', 'config_id/id', 'source_id/id')):
+                    related[rel_item['source_id']['id']].append(rel_item)
+            relationships[rel_prop.name] = related
+
+        return items, relationships
+
+    def iter_graphs():
+        for items, relationships in prefetch(load_page, itertools.count(1), workers):
+            for item_json in items:
+                config_id = item_json['config_id']['id']
+                item_url = item_base + config_id
+
+                graph = Graph()
+                item_node = add_item_properties(graph, item_type, item_json, config_id, item_url, url_sp,
+                                                index, versionable)
+                for rel_prop in index.relationships:
+                    add_item_relationships(item_node, item_type, rel_prop,
+                                           relationships[rel_prop.name].get(item_json['id'], []), url_sp)
+
+                yield item_url, graph
+
+            # A short page is the last one
+            if len(items) < page_size:
+                break
+
+    return iter_graphs()
+
+
 def load_items_json(item_type: str) -> dict:
     file = os.path.join('data', item_type + '_Items.json')
     data = load_from_json_file(file_name=file)
@@ -194,25 +314,65 @@ def load_items_json(item_type: str) -> dict:
 
 
 def load_items(source_base_uri: str, item_type: str,
-               page_size: int = None, page_no: int = 0) -> dict:
-    items = dict()
-
+               page_size: int = None, page_no: int = 0, stream: bool = False,
+               page_token: str = None, annotations: dict = None):
+    """
+    Load a page of items of the ItemType by their config_id (or id).
+
+    With stream, the pairs (id, item) are returned as an iterator consumed while
+    the response is read instead of being collected in a dict.
+
+    :param page_token: the continuation token of the page, it replaces the page_no
+    :param annotations: filled with the OData annotations of the response (e.g. @odata.nextLink),
+                        the number of rows read, the last id read and, when Aras counted
+                        the rows, the total count and the rows remaining after the page
+    """
     page_no = page_no if page_no else 1
-    response = query_item_instances(source_base_uri, item_type, page_size, page_no)
+    token = decode_page_token(page_token, source_base_uri) if page_token else dict()
+
+    offset = None
+    if 'link' in token:
+        response = query_next_link(token['link'], stream=True)
+    else:
+        response = query_item_instances(source_base_uri, item_type, page_size, page_no, stream=True,
+                                        after=token.get('after'))
+        offset = page_size * (page_no - 1) if page_size else 0
+
+    items = iter_items(response, annotations, offset=offset, after='after' in token)
+
+    return items if stream else dict(items)
 
-    if response and response.status_code == 200:
-        data = response.json()
 
-        if data:
-            for item in data['value']:
-                if 'config_id' in item:
-                    item_id = item['config_id']['id']
-                else:
-                    item_id = item['id']
+def iter_items(response, annotations: dict = None, offset: int = None, after: bool = False):
+    """
+    Yield the pairs (config_id, item) of a page of items.
 
-                items[item_id] = item
+    :param offset: the number of rows of the previous pages, None if it is not known
+    :param after: whether the page was filtered by id, so that @odata.count excludes the previous pages
+    """
+    annotations = annotations if annotations is not None else dict()
+    annotations['rows'] = 0
+
+    # Only the fields used by the containers are kept from the expanded config_id
+    for item in iter_response_values(response, fields=('id', 'keyed_name', 'config_id/id'), annotations=annotations):
+        # The rows are ordered by id, the next page starts after the last one
+        annotations['rows'] += 1
+        annotations['last_id'] = item.get('id')
+
+        if 'config_id' in item:
+            item_id = item['config_id']['id']
+        else:
+            item_id = item['id']
 
-    return items
+        yield item_id, item
+
+    # The @odata.count is read once the whole page was, it counts the rows matching the query
+    count = annotations.get('@odata.count')
+    if count is not None:
+        total_count = int(count) + (offset if after and offset else 0)
+        annotations['total_count'] = total_count
+        if offset is not None:
+            annotations['remaining'] = total_count - offset - annotations['rows']
 
 
 def load_item_versions_ids(source_base_uri: str, item_type: str, config_id: str) -> dict:
@@ -225,16 +385,55 @@ def load_item_versions_ids(source_base_uri: str, item_type: str, config_id: str)
 
 def load_streams(source_base_uri: str, item_type: str, config_id: str) -> dict:
     data = load_item_versions_ids(source_base_uri, item_type, config_id)
+    if not data:
+        return dict()
 
     s = {e['id']: e for e in data['value']}
 
     return s
 
 
+def load_version_history(source_base_uri: str, item_type: str, config_id: str, version_id: str = None) -> dict:
+    """
+    Return the versions of the config_id by their id, the same of load_streams, read
+    once for the component, its configurations and its streams. The config_id does
+    not exist when no version is returned.
+
+    :param version_id: a version that must be in the history (e.g. a requested stream),
+                       the history is read again when it is missing as it may be newer
+    """
+    key = (source_base_uri, normalize_item_type(item_type), config_id)
+
+    def load():
+        return load_streams(source_base_uri, item_type, config_id)
+
+    history = version_history_cache.get_or_load(key, load)
+    if version_id and version_id not in history:
+        version_history_cache.invalidate(key)
+        history = version_history_cache.get_or_load(key, load)
+
+    # A config_id without versions is not kept, it may be created meanwhile
+    if not history:
+        version_history_cache.invalidate(key)
+
+    return history
+
+
+def check_version_history(source_base_uri: str, item_type: str, config_id: str, version_id: str):
+    """Discard the version history of the config_id when the given version, e.g. its current one, is not in it."""
+    key = (source_base_uri, normalize_item_type(item_type), config_id)
+    history = version_history_cache.get(key)
+    if history is not None and version_id not in history:
+        logger.debug(f'New version {version_id} of {item_type} {config_id}, discarding its version history')
+        version_history_cache.invalidate(key)
+
+
 def load_resource_shape(item_type: str,
                         url_sp: str = None,
                         source_base_url: str = None):
-    g = get_resource_shape(item_type, url_sp, source_base_url)
+    # The shape only changes when the ItemType is edited on Aras, reuse it until it expires
+    g = shape_cache.get_or_load((source_base_url, item_type, url_sp),
+                                lambda: get_resource_shape(item_type, url_sp, source_base_url))
 
     if g:
         if len(g):
@@ -252,28 +451,31 @@ def get_resource_shape(item_type: str, url_sp: str, source_base_url: str):
     oslc_base = url_sp
     oslc_resource_shape_base = oslc_base + '/' + re.sub(' ', '.', item_type) + "/resourceShape"
 
-    properties_response = query_item_type_properties(source_base_url, item_type)
-    if properties_response and properties_response.json()['value'] and properties_response.status_code == 200:
-        properties_json = properties_response.json()
-    else:
-        return None
+    with batch():
+        properties_response = query_item_type_properties(source_base_url, item_type, stream=True)
+        relationships_response = query_item_type_relationships(source_base_url, item_type, stream=True)
 
     # Create a list of properties associated with the Iterated ItemType
     item_type_properties = list()
 
     # For each Property returned, save its name
-    for value in properties_json['value']:
+    for value in iter_response_values(properties_response,
+                                      fields=('name', 'data_type', 'data_source@aras.name', 'is_required')):
         # Register the property instance
         item_type_properties.append(
             RDFProperty(value['name'], value['data_type'],
                         value.get('data_source@aras.name', ''), value['is_required']))
 
-    relationships_json = query_item_type_relationships(source_base_url, item_type).json()
+    if not item_type_properties:
+        if relationships_response is not None:
+            relationships_response.close()
+        return None
+
     # Create a list of relationships associated with the Iterated ItemType
     item_type_relationships = list()
 
     # For each Relationship returned, save its name
-    for value in relationships_json['value']:
+    for value in iter_response_values(relationships_response, fields=('name',)):
         # Register the relationship instance
         item_type_relationships.append(value['name'])
 
@@ -387,17 +589,35 @@ def get_resource_shape(item_type: str, url_sp: str, source_base_url: str):
     return graph
 
 
+def load_versionable_index(source_base_url: str) -> dict:
+    versionable = dict()
+
+    response = query_item_types_versionable(source_base_url, stream=True)
+
+    for item in iter_collection_values(source_base_url, response, fields=('name', 'is_versionable')):
+        versionable[item['name']] = item.get('is_versionable') == '1'
+
+    return versionable
+
+
 def check_if_versionable(source_base_url: str, item_type: str):
-    request = get_is_versionable(source_base_url, item_type)
+    index = versionable_cache.get_or_load(source_base_url, lambda: load_versionable_index(source_base_url) or None)
 
-    data = request.json()
-    for item in data['value']:
-        is_versionable = item['is_versionable']
+    item_type_name = unquote(re.sub('\\.', ' ', item_type))
+    if index and item_type_name in index:
+        return index[item_type_name]
 
-        if is_versionable == '1':
-            return True
-        else:
-            return False
+    # The ItemType was created after the index was loaded (or it does not exist), ask for it directly
+    #  and keep the answer until the index is reloaded, both negative_ttl and refresh being shorter than its ttl
+    def load():
+        request = get_is_versionable(source_base_url, item_type)
+
+        for item in request.json()['value']:
+            return item['is_versionable'] == '1'
+
+        return None
+
+    return versionable_cache.get_or_load((source_base_url, item_type_name), load, ttl=versionable_cache.negative_ttl)
 
 
 def query_current_item_id(source_base_url: str, item_type: str, config_id: str):
@@ -431,3 +651,37 @@ def validate_config_id(source_base_url: str, item_type: str, config_id: str):
         return data
     else:
         return False
+
+
+def load_item_version(source_base_url: str, item_type: str, item_id: str = None, config_id: str = None):
+    """
+    Return the id, generation and modified_on of the given version of an item,
+    or of its current version when only the config_id is passed.
+    """
+    response = query_item_version(source_base_url, item_type, item_id=item_id, config_id=config_id)
+
+    if response and response.status_code == 200:
+        data = response.json()
+
+        # The item is returned directly when requested by id and in the value array when filtered
+        if 'value' in data:
+            data = data['value'][0] if data['value'] else None
+
+        # The current version probed by config_id tells whether a newer generation was created
+        if data and config_id and not item_id:
+            check_version_history(source_base_url, item_type, config_id, data.get('id'))
+
+        return data
+
+    return None
+
+
+def parse_aras_date(value: str):
+    # Dates are returned by Aras without the time zone, they are read as UTC
+    if not value:
+        return None
+
+    try:
+        return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
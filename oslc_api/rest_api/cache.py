@@ -0,0 +1,48 @@
+from flask import make_response
+from flask_login import login_required
+from flask_restx import Namespace, Resource
+
+from oslc_api.aras.cache import caches, matches_item_type
+from oslc_api.rest_api import api, authorizations
+from oslc_api.rest_api.parsers import cache_parser
+
+cache_ns = Namespace('cache', description='OSLC Adaptor Caches',
+                     path='/api/oslc/cache', authorizations=authorizations)
+
+
+@cache_ns.route('')
+class Caches(Resource):
+
+    @login_required
+    @api.doc(security='apikey')
+    def get(self):
+        return make_response({'caches': [cache.stats() for cache in caches.values()]}, 200)
+
+
+@cache_ns.route('/<name>')
+class Cache(Resource):
+
+    @login_required
+    @api.doc(security='apikey')
+    def get(self, name: str):
+        if name not in caches:
+            return make_response({'message': f'The cache {name} does not exist'}, 404)
+
+        return make_response(caches[name].stats(), 200)
+
+    @login_required
+    @api.doc(parser=cache_parser)
+    @api.doc(security='apikey')
+    def delete(self, name: str):
+        if name not in caches:
+            return make_response({'message': f'The cache {name} does not exist'}, 404)
+
+        args = cache_parser.parse_args()
+        item_type: str = args['item_type']
+
+        if item_type:
+            invalidated = caches[name].invalidate(predicate=matches_item_type(item_type))
+        else:
+            invalidated = caches[name].invalidate()
+
+        return make_response({'name': name, 'invalidated': invalidated}, 200)
@@ -5,7 +5,10 @@ from flask_restx import Namespace, Resource
 from oslc_api.aras.resources import OSLCResource
 from oslc_api.rest_api import api, authorizations
 from oslc_api.rest_api.parsers import paging_parser
-from oslc_api.rest_api.routes import create_response
+from oslc_api.rest_api.representations import get_content_type
+from oslc_api.rest_api.routes import create_response, get_streaming_representation, create_stream_response, \
+    get_cached_response, cache_version_response, get_cache_key, get_item_validators, get_not_modified_response, \
+    get_version_validators, has_cached_response, set_validators
 
 config_ns = Namespace('config', description='OSLC Configuration',
                       path='/api/oslc/config', authorizations=authorizations)
@@ -22,14 +25,34 @@ class Components(Resource):
         paging: bool = args['oslc.paging']
         page_size: int = args['oslc.pageSize']
         page_no: int = args['oslc.pageNo']
+        page_token: str = args['pageToken']
 
         oslc_resource = OSLCResource(current_app.config['SOURCE_BASE_URI'], current_user.access_token)
+
+        representation = get_streaming_representation()
+        if representation:
+            chunks = oslc_resource.stream_components(
+                item_type=item_type,
+                url=request.base_url,
+                representation=representation,
+                paging=paging,
+                page_size=page_size,
+                page_no=page_no,
+                page_token=page_token
+            )
+            if chunks:
+                return create_stream_response(chunks, representation)
+            else:
+                return make_response(
+                    f'The Item Type {item_type} does not exist or an error occurred during the RDF translation', 400)
+
         oslc_resource.get_components(
             item_type=item_type,
             url=request.base_url,
             paging=paging,
             page_size=page_size,
-            page_no=page_no
+            page_no=page_no,
+            page_token=page_token
         )
 
         response = create_response(oslc_resource)
@@ -46,12 +69,18 @@ class Component(Resource):
     @login_required
     @api.doc(security='apikey')
     def get(self, item_type: str, config_id: str):
+        # The component changes with each new version of the item, its validators are the ones of the current version
+        validators = get_item_validators(item_type, config_id=config_id)
+        response = get_not_modified_response(validators)
+        if response:
+            return response
+
         oslc_resource = OSLCResource(current_app.config['SOURCE_BASE_URI'], current_user.access_token)
         oslc_resource.get_component(item_type, config_id, request.base_url)
 
         response = create_response(oslc_resource)
         if response.status_code != 204:
-            return response
+            return set_validators(response, validators or get_version_validators(item_type, oslc_resource.version))
         else:
             return make_response(
                 f'The Item {item_type} with the ID: {config_id} does not exist or an error occurred during the RDF translation',
@@ -64,12 +93,30 @@ class Configurations(Resource):
     @login_required
     @api.doc(security='apikey')
     def get(self, item_type: str, config_id: str):
+        # The list of configurations changes when a new version of the item is created
+        validators = get_item_validators(item_type, config_id=config_id)
+        response = get_not_modified_response(validators)
+        if response:
+            return response
+
         oslc_resource = OSLCResource(current_app.config['SOURCE_BASE_URI'], current_user.access_token)
+
+        representation = get_streaming_representation()
+        if representation:
+            chunks = oslc_resource.stream_configurations(item_type, config_id, request.base_url, representation)
+            if chunks:
+                validators = validators or get_version_validators(item_type, oslc_resource.version)
+                return set_validators(create_stream_response(chunks, representation), validators)
+            else:
+                return make_response(
+                    f'The Item {item_type} with the ID: {config_id} does not exist or an error occurred during the '
+                    f'RDF translation', 400)
+
         oslc_resource.get_configurations(item_type, config_id, request.base_url)
 
         response = create_response(oslc_resource)
         if response.status_code != 204:
-            return response
+            return set_validators(response, validators or get_version_validators(item_type, oslc_resource.version))
         else:
             return make_response(
                 f'The Item {item_type} with the ID: {config_id} does not exist or an error occurred during the RDF translation',
@@ -82,11 +129,30 @@ class Stream(Resource):
     @login_required
     @api.doc(security='apikey')
     def get(self, item_type: str, config_id: str, stream_id: str):
+        # The stream of a frozen version is served from the cache at once, the others while their probed ETag is the same,
+        # the stream is only probed when a document of it is cached or for a conditional request
+        version_key = get_cache_key(item_type, config_id, stream_id, get_content_type(request.headers.get('accept')))
+        response = get_cached_response(version_key)
+        if response:
+            return response
+
+        validators = get_item_validators(item_type, item_id=stream_id, cached=has_cached_response(version_key))
+        response = get_not_modified_response(validators)
+        if response:
+            return response
+
+        response = get_cached_response(version_key[:-1] + (validators[0],)) if validators else None
+        if response:
+            return response
+
         oslc_resource = OSLCResource(current_app.config['SOURCE_BASE_URI'], current_user.access_token)
         oslc_resource.get_stream(item_type, config_id, stream_id, request.base_url)
 
         response = create_response(oslc_resource)
         if response.status_code != 204:
+            validators = validators or get_version_validators(item_type, oslc_resource.version)
+            set_validators(response, validators)
+            cache_version_response(version_key, oslc_resource.version, validators, response)
             return response
         else:
             return make_response(
@@ -26,6 +26,14 @@ paging_parser.add_argument(
     help="The number of the page to get",
     location="args"
 )
+paging_parser.add_argument(
+    name="pageToken",
+    type=str,
+    required=False,
+    default=None,
+    help="The continuation token of the page, given in the oslc:nextPage of the previous page",
+    location="args"
+)
 
 
 config_parser = reqparse.RequestParser()
@@ -53,3 +61,24 @@ config_parser.add_argument(
 #     help="The Item ID for the Item Type",
 #     location="args"
 # )
+
+
+cache_parser = reqparse.RequestParser()
+cache_parser.add_argument(
+    name="item_type",
+    type=str,
+    required=False,
+    help="Only invalidate the entries of the given Item Type",
+    location="args"
+)
+
+
+export_parser = reqparse.RequestParser()
+export_parser.add_argument(
+    name="oslc.pageSize",
+    type=int,
+    required=False,
+    default=0,
+    help="The number of items read from Aras on each request",
+    location="args"
+)
@@ -3,34 +3,73 @@ from http.client import OK
 from flask import make_response, request
 from rdflib import Graph, Literal, URIRef, RDF
 from rdflib.resource import Resource
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
 
 from oslc_api.aras.namespaces import OSLC
+from oslc_api.rest_api.writers import serialize
 
 representations = {
-    'json-ld': ['application/json', 'application/json+ld'],
+    'json-ld': ['application/json', 'application/ld+json', 'application/json+ld'],
     'turtle': ['text/turtle'],
-    'pretty-xml': ['*/*', 'application/xml', 'application/rdf+xml']
+    'nt': ['application/n-triples'],
+    'nquads': ['application/n-quads'],
+    'pretty-xml': ['*/*', 'application/rdf+xml', 'application/xml']
 }
 
+DEFAULT_REPRESENTATION = 'json-ld'
 
-def get_content_type(accept: str) -> str:
-    content_type = 'json-ld'
-    for key in representations.keys():
-        if accept in representations[key]:
-            content_type = key
-            break
 
-    return content_type
+def negotiate(accept: str, supported: tuple = None) -> tuple:
+    """
+    Select the representation of the response from the Accept header, the media ranges are
+    tried by quality and then by specificity, the ranges with q=0 exclude the media type.
+
+    :param supported: the representations the response can be written in, all of them by default
+    :return: a tuple (representation, content type of the response)
+    """
+    supported = supported or tuple(representations)
+
+    ranges = list()
+    excluded = set()
+    for value, quality in parse_accept_header(accept, MIMEAccept):
+        mimetype = value.split(';', 1)[0].strip().lower()
+        if quality <= 0:
+            excluded.add(mimetype)
+        else:
+            ranges.append((-quality, mimetype.count('*'), mimetype))
+
+    for _, _, mimetype in sorted(ranges):
+        if mimetype == '*/*':
+            # Keep RDF/XML as the representation of the clients accepting anything
+            candidates = [('pretty-xml', 'application/rdf+xml')] + [
+                (key, representations[key][0]) for key in supported]
+        elif mimetype.endswith('/*'):
+            major = mimetype[:-1]
+            candidates = [(key, media) for key, values in representations.items()
+                          for media in values if media.startswith(major)]
+        else:
+            candidates = [(key, mimetype) for key, values in representations.items() if mimetype in values]
+
+        for representation, media in candidates:
+            if representation in supported and media not in excluded:
+                return representation, media
+
+    default = DEFAULT_REPRESENTATION if DEFAULT_REPRESENTATION in supported else supported[0]
+    return default, representations[default][0]
+
+
+def get_content_type(accept: str) -> str:
+    return negotiate(accept)[0]
 
 
 def output_rdf(data, code, headers=None):
     """Makes a Flask response with a JSON encoded body"""
 
-    content_type = request.headers.get('accept')
-    representation = get_content_type(content_type)
+    representation, content_type = negotiate(request.headers.get('accept'))
 
     if code == OK:
-        data = data.to_rdf(representation)
+        data = data.to_rdf(representation, graph=request.base_url)
     else:
         g = Graph()
         g.bind('oslc', OSLC)
@@ -42,9 +81,14 @@ def output_rdf(data, code, headers=None):
             for attr in data:
                 rsrc.add(OSLC.term(attr), Literal(data[attr]))
 
-        data = g.serialize(format=representation)
+        if representation == 'nquads':
+            # rdflib only writes N-Quads from a context aware store
+            data = ''.join(serialize(g, representation, graph=request.base_url))
+        else:
+            data = g.serialize(format=representation)
 
     resp = make_response(data, code)
     resp.headers.extend(headers or {})
+    resp.headers['Content-Type'] = content_type
 
     return resp
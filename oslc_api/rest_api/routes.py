@@ -1,15 +1,21 @@
+import hashlib
 import logging
-from http.client import UNAUTHORIZED
+from http.client import UNAUTHORIZED, NOT_MODIFIED
+from urllib.parse import urlparse
 
-from flask import request, make_response, url_for, current_app
+from flask import request, make_response, url_for, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
 from flask_restx import Resource, Namespace
-from werkzeug.exceptions import Unauthorized
+from requests import RequestException
+from werkzeug.exceptions import Unauthorized, HTTPException
 
 from oslc_api.aras.resources import OSLCResource
+from oslc_api.auth.resilience import CircuitOpenError
 from oslc_api.rest_api import api, authorizations
-from oslc_api.rest_api.parsers import paging_parser, config_parser
-from oslc_api.rest_api.representations import get_content_type
+from oslc_api.rest_api.aras import load_item_version, parse_aras_date
+from oslc_api.rest_api.parsers import paging_parser, config_parser, export_parser
+from oslc_api.rest_api.representations import get_content_type, negotiate
+from oslc_api.rest_api.writers import STREAMING_REPRESENTATIONS, EXPORT_REPRESENTATIONS
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +34,8 @@ def handle_unauthorized_request(e):
 
 
 def create_response(oslc_resource):
-    content_type = request.headers.get('accept')
-    representation = get_content_type(content_type)
-    data = oslc_resource.to_rdf(representation)
+    representation, content_type = negotiate(request.headers.get('accept'))
+    data = oslc_resource.to_rdf(representation, graph=request.base_url)
 
     logger.debug(f'Generating response with: Content-Type {content_type} '
                  f'RDF representation {representation} ')
@@ -44,20 +49,189 @@ def create_response(oslc_resource):
     return response
 
 
+def get_version_validators(item_type: str, version: dict):
+    """
+    Return the validators of the document of a version of an item in the requested representation,
+    from its id, generation and modified_on.
+
+    :return: a tuple (etag, last_modified) or None without a version
+    """
+    if not version or not current_app.config.get('CONDITIONAL_REQUESTS', True):
+        return None
+
+    representation = get_content_type(request.headers.get('accept'))
+    etag = hashlib.sha1(repr((request.base_url, item_type, version.get('id'), version.get('generation'),
+                              version.get('modified_on'), representation)).encode('utf-8')).hexdigest()
+
+    return etag, parse_aras_date(version.get('modified_on') or version.get('created_on'))
+
+
+def get_item_validators(item_type: str, config_id: str = None, item_id: str = None, cached: bool = False):
+    """
+    Probe the generation and modified_on of a version of an item (or of its current version)
+    and return the validators of its document in the requested representation.
+
+    The item is only probed for the conditional requests and to validate a cached document,
+    the validators of the other responses are read from the item fetched to build them.
+
+    :param cached: True if a document of the version is cached
+    :return: a tuple (etag, last_modified) or None if the item was not probed
+    """
+    if not current_app.config.get('CONDITIONAL_REQUESTS', True):
+        return None
+
+    if not (cached or request.if_none_match or request.if_modified_since):
+        return None
+
+    try:
+        version = load_item_version(current_app.config['SOURCE_BASE_URI'], item_type,
+                                    item_id=item_id, config_id=config_id)
+    except (HTTPException, RequestException) as e:
+        # The response is still built without validators, the errors are reported by the query of the item
+        logger.debug(f'Could not probe the version of {item_type} {config_id or item_id}: {e}')
+        return None
+
+    return get_version_validators(item_type, version)
+
+
+def set_validators(response, validators: tuple):
+    if validators:
+        etag, last_modified = validators
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+
+    return response
+
+
+def get_not_modified_response(validators: tuple):
+    """Return a 304 Not Modified response if the client has the current document, otherwise None."""
+    if not validators or not (request.if_none_match or request.if_modified_since):
+        return None
+
+    response = set_validators(Response(status=200), validators).make_conditional(request)
+    if response.status_code == NOT_MODIFIED:
+        return response
+
+    return None
+
+
+def get_cache_key(*parts) -> tuple:
+    """Key of a document of the response cache, scoped to the user as Aras answers with the items they can read."""
+    return (current_user.username, request.base_url) + parts
+
+
+def is_frozen(version: dict) -> bool:
+    # A version that is not the current one of its item is never edited
+    return bool(version) and version.get('is_current') == '0'
+
+
+def has_cached_response(version_key: tuple) -> bool:
+    """True if a document of a version that is not frozen is cached, to be validated by its ETag."""
+    response_cache = current_app.extensions.get('response_cache')
+    return response_cache is not None and response_cache.get(version_key + ('latest',)) is not None
+
+
+def get_cached_response(key: tuple):
+    """Return the response with the serialized document stored for the key, or None."""
+    response_cache = current_app.extensions.get('response_cache')
+    data = response_cache.get(key) if response_cache is not None else None
+    if data is None:
+        return None
+
+    logger.debug(f'Serving cached response: {key}')
+
+    # The validators of the document are stored on its first line
+    header, _, data = data.partition(b'\n')
+    etag, _, last_modified = header.decode('utf-8').partition('\t')
+
+    response = make_response(data, 200)
+    response.headers['Content-Type'] = negotiate(request.headers.get('accept'))[1]
+    if etag:
+        response.set_etag(etag)
+    if last_modified:
+        response.headers['Last-Modified'] = last_modified
+
+    return response.make_conditional(request)
+
+
+def cache_response(key: tuple, response, latest_key: tuple = None):
+    """Store the document of the response for the key, and the key as the latest one of latest_key."""
+    response_cache = current_app.extensions.get('response_cache')
+    if response_cache is not None and response.status_code == 200:
+        etag, _ = response.get_etag()
+        header = f'{etag or ""}\t{response.headers.get("Last-Modified", "")}\n'
+        response_cache.set(key, header.encode('utf-8') + response.get_data())
+        if latest_key:
+            response_cache.set(latest_key, key[-1].encode('utf-8'))
+
+
+def cache_version_response(version_key: tuple, version: dict, validators: tuple, response):
+    """
+    Store the document of a version: by the version_key alone when the version is frozen,
+    otherwise by its ETag, the latest one being kept to be served while Aras is unavailable.
+    """
+    if is_frozen(version):
+        cache_response(version_key, response)
+    elif validators:
+        cache_response(version_key[:-1] + (validators[0],), response, latest_key=version_key + ('latest',))
+
+
+def get_stale_response(version_key: tuple):
+    """Return the response with the latest document cached for a version, marked as stale, or None."""
+    response = get_cached_response(version_key)
+    if response is None:
+        response_cache = current_app.extensions.get('response_cache')
+        validator = response_cache.get(version_key + ('latest',)) if response_cache is not None else None
+        if validator is None:
+            return None
+
+        response = get_cached_response(version_key[:-1] + (validator.decode('utf-8'),))
+
+    if response is not None:
+        logger.info(f'ARAS API is unavailable, serving a stale response: {version_key}')
+        response.headers['Warning'] = '110 - "Response is Stale"'
+
+    return response
+
+
+def get_streaming_representation():
+    """Return the representation requested if the response can be streamed, otherwise None."""
+    representation = get_content_type(request.headers.get('accept'))
+    if current_app.config.get('STREAMING_RESPONSES', True) and representation in STREAMING_REPRESENTATIONS:
+        return representation
+
+    return None
+
+
+def create_stream_response(chunks, representation: str):
+    logger.debug(f'Generating streamed response with: RDF representation {representation}')
+
+    response = Response(stream_with_context(chunks), 200)
+    response.headers['Content-Type'] = negotiate(request.headers.get('accept'))[1]
+    return response
+
+
 @oslc_ns.route('')
 class ServiceProvider(Resource):
 
     @login_required
     @api.doc(security='apikey')
     def get(self):
-        oslc_resource = OSLCResource(current_app.config['SOURCE_BASE_URI'], current_user.access_token)
-        oslc_resource.get_service_provider(request.base_url)
+        representation, content_type = negotiate(request.headers.get('accept'))
 
-        if oslc_resource:
-            response = create_response(oslc_resource)
-            return response
+        oslc_resource = OSLCResource(current_app.config['SOURCE_BASE_URI'], current_user.access_token)
+        document = oslc_resource.get_service_provider_document(request.base_url, representation)
+
+        if document:
+            etag, data = document
+            response = make_response(data.decode('utf-8'), 200)
+            response.headers['Content-Type'] = content_type
+            response.set_etag(etag)
+            # Answer with 304 Not Modified when the client already has this version of the document
+            return response.make_conditional(request)
         else:
-            return make_response('Could not connect with the data source.', 404)
+            return create_response(oslc_resource)
 
 
 @oslc_ns.route('/<item_type>')
@@ -71,18 +245,39 @@ class QueryCapability(Resource):
         paging: bool = args['oslc.paging']
         page_size: int = args['oslc.pageSize']
         page_no: int = args['oslc.pageNo']
+        page_token: str = args['pageToken']
 
         url_sp = url_for('api.oslc_service_provider', _external=True)
         logger.debug(f'{page_no}-{page_size}-{paging}')
 
         oslc_resource = OSLCResource(current_app.config['SOURCE_BASE_URI'], current_user.access_token)
+
+        representation = get_streaming_representation()
+        if representation:
+            chunks = oslc_resource.stream_query_capabilities(
+                item_type=item_type,
+                url=request.base_url,
+                url_sp=url_sp,
+                representation=representation,
+                paging=paging,
+                page_size=page_size,
+                page_no=page_no,
+                page_token=page_token
+            )
+            if chunks:
+                return create_stream_response(chunks, representation)
+            else:
+                return make_response(
+                    f'The Item Type {item_type} does not exist or an error occurred during the RDF translation', 400)
+
         oslc_resource.get_query_capabilities(
             item_type=item_type,
             url=request.base_url,
             url_sp=url_sp,
             paging=paging,
             page_size=page_size,
-            page_no=page_no
+            page_no=page_no,
+            page_token=page_token
         )
         response = create_response(oslc_resource)
 
@@ -111,13 +306,48 @@ class QueryResource(Resource):
         elif config_context_header is not (None and ' ' and ''):
             config_context = config_context_header
 
+        item_id = urlparse(config_context).path.split('/')[-1] if config_context else None
+
+        # The document of a version given by the configuration context is served from the cache, at once when
+        # the version is frozen, otherwise while its probed generation and modified_on, hashed in its ETag, are the same
+        version_key = None
+        if config_context:
+            version_key = get_cache_key(item_type, config_id, item_id, get_content_type(request.headers.get('accept')))
+
+            response = get_cached_response(version_key)
+            if response:
+                return response
+
+        # Answer the conditional requests without building the graph when the version did not change
+        validators = get_item_validators(item_type, config_id=config_id, item_id=item_id,
+                                         cached=bool(version_key) and has_cached_response(version_key))
+        response = get_not_modified_response(validators)
+        if response:
+            return response
+
+        if version_key and validators:
+            response = get_cached_response(version_key[:-1] + (validators[0],))
+            if response:
+                return response
+
         url_sp = url_for('api.oslc_service_provider', _external=True)
         oslc_resource = OSLCResource(current_app.config['SOURCE_BASE_URI'], current_user.access_token)
-        resource = oslc_resource.get_query_resource(item_type, config_id,
-                                                    url=request.base_url, url_sp=url_sp,
-                                                    config_context=config_context)
+        try:
+            resource = oslc_resource.get_query_resource(item_type, config_id,
+                                                        url=request.base_url, url_sp=url_sp,
+                                                        config_context=config_context)
+        except CircuitOpenError:
+            # The latest document of the version is served while the circuit of ARAS API is open
+            response = get_stale_response(version_key) if version_key else None
+            if response is None:
+                raise
+            return response
+
         if resource:
-            response = create_response(oslc_resource)
+            validators = validators or get_version_validators(item_type, oslc_resource.version)
+            response = set_validators(create_response(oslc_resource), validators)
+            if version_key:
+                cache_version_response(version_key, oslc_resource.version, validators, response)
             return response
         else:
             return make_response(
@@ -142,3 +372,35 @@ class ResourceShape(Resource):
         else:
             return make_response(
                 f'The Item Type {item_type} does not exist or an error occurred during the RDF translation', 400)
+
+
+@oslc_ns.route('/<item_type>/export')
+class Export(Resource):
+
+    @login_required
+    @api.doc(parser=export_parser)
+    @api.doc(security='apikey')
+    def get(self, item_type: str):
+        args = export_parser.parse_args()
+        page_size: int = args['oslc.pageSize'] or current_app.config.get('EXPORT_PAGE_SIZE', 100)
+
+        representation, content_type = negotiate(request.headers.get('accept'), supported=EXPORT_REPRESENTATIONS)
+        compress = 'gzip' in request.accept_encodings
+
+        url_sp = url_for('api.oslc_service_provider', _external=True)
+        oslc_resource = OSLCResource(current_app.config['SOURCE_BASE_URI'], current_user.access_token)
+        chunks = oslc_resource.stream_export(item_type, url_sp, representation, page_size=page_size,
+                                             workers=current_app.config.get('EXPORT_CONCURRENT_PAGES'),
+                                             compress=compress)
+        if not chunks:
+            return make_response(
+                f'The Item Type {item_type} does not exist or an error occurred during the RDF translation', 400)
+
+        logger.debug(f'Exporting {item_type} with: RDF representation {representation} gzip {compress}')
+
+        response = Response(stream_with_context(chunks), 200)
+        response.headers['Content-Type'] = content_type
+        if compress:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept, Accept-Encoding'
+        return response
@@ -0,0 +1,198 @@
+import json
+import re
+import zlib
+from collections import OrderedDict
+
+from rdflib import RDF, RDFS, DCTERMS, XSD, URIRef, Literal, BNode
+
+from oslc_api.aras.namespaces import OSLC, OSLC_CONFIG, LDP, ARAS
+
+# Representations that can be written triple by triple while the data is read from Aras
+STREAMING_REPRESENTATIONS = ('turtle', 'nt', 'nquads', 'json-ld')
+
+# Representations of the export of all the items of an ItemType, the graphs are concatenated line by line
+EXPORT_REPRESENTATIONS = ('nquads', 'nt')
+
+PREFIXES = OrderedDict([
+    ('rdf', str(RDF)),
+    ('rdfs', str(RDFS)),
+    ('dcterms', str(DCTERMS)),
+    ('xsd', str(XSD)),
+    ('oslc', str(OSLC)),
+    ('oslc_config', str(OSLC_CONFIG)),
+    ('ldp', str(LDP)),
+    ('aras', str(ARAS)),
+])
+
+LOCAL_NAME = re.compile('^[A-Za-z_][A-Za-z0-9_-]*$')
+
+ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '"': '\\"',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+})
+
+
+def quote_literal(literal: Literal, datatype: str = None) -> str:
+    value = '"' + str(literal).translate(ESCAPES) + '"'
+    if literal.language:
+        return value + '@' + literal.language
+    if literal.datatype:
+        return value + '^^' + (datatype or f'<{literal.datatype}>')
+
+    return value
+
+
+def nt_term(term) -> str:
+    if isinstance(term, Literal):
+        return quote_literal(term)
+    if isinstance(term, BNode):
+        return f'_:{term}'
+
+    return f'<{term}>'
+
+
+def prefixes_pattern(prefixes: OrderedDict):
+    # A single regular expression matching the IRIs in any of the namespaces, the longest first
+    namespaces = sorted(prefixes.values(), key=len, reverse=True)
+    return re.compile('^(' + '|'.join(re.escape(namespace) for namespace in namespaces) + ')([A-Za-z_][A-Za-z0-9_-]*)$')
+
+
+PREFIXES_PATTERN = prefixes_pattern(PREFIXES)
+
+
+def compact_iri(term, prefixes: OrderedDict = PREFIXES) -> str:
+    """Return the IRI as prefix:name, or None when it is not in the namespace of any prefix."""
+    pattern = PREFIXES_PATTERN if prefixes is PREFIXES else prefixes_pattern(prefixes)
+    match = pattern.match(term)
+    if match:
+        namespace, name = match.groups()
+        for prefix, value in prefixes.items():
+            if value == namespace:
+                return f'{prefix}:{name}'
+
+    return None
+
+
+def turtle_term(term, prefixes: OrderedDict = PREFIXES) -> str:
+    if isinstance(term, Literal):
+        return quote_literal(term, turtle_term(term.datatype, prefixes) if term.datatype else None)
+    if isinstance(term, URIRef):
+        iri = compact_iri(term, prefixes)
+        if iri:
+            return iri
+
+    return nt_term(term)
+
+
+def serialize_ntriples(triples) -> iter:
+    for s, p, o in triples:
+        yield f'{nt_term(s)} {nt_term(p)} {nt_term(o)} .\n'
+
+
+def serialize_nquads(triples, graph: str = None) -> iter:
+    """Write the triples as N-Quads in the named graph, or in the default graph when it is not given."""
+    if not graph:
+        return serialize_ntriples(triples)
+
+    context = f' <{graph}> .\n'
+    return (f'{nt_term(s)} {nt_term(p)} {nt_term(o)}{context}' for s, p, o in triples)
+
+
+def serialize_turtle(triples, prefixes: OrderedDict = PREFIXES) -> iter:
+    for prefix, namespace in prefixes.items():
+        yield f'@prefix {prefix}: <{namespace}> .\n'
+    yield '\n'
+
+    for s, p, o in triples:
+        predicate = 'a' if p == RDF.type else turtle_term(p, prefixes)
+        yield f'{turtle_term(s, prefixes)} {predicate} {turtle_term(o, prefixes)} .\n'
+
+
+def jsonld_value(term, prefixes: OrderedDict = PREFIXES) -> dict:
+    if isinstance(term, Literal):
+        value = {'@value': str(term)}
+        if term.language:
+            value['@language'] = term.language
+        elif term.datatype:
+            value['@type'] = compact_iri(term.datatype, prefixes) or str(term.datatype)
+        return value
+    if isinstance(term, BNode):
+        return {'@id': f'_:{term}'}
+
+    return {'@id': str(term)}
+
+
+def serialize_jsonld(triples, prefixes: OrderedDict = PREFIXES) -> iter:
+    """
+    Write the triples as a flattened JSON-LD document, the consecutive triples of
+    the same subject are written as a single node object of the @graph array.
+    """
+    yield '{"@context": ' + json.dumps(prefixes) + ', "@graph": ['
+
+    separator = ''
+    subject, node = None, None
+    for s, p, o in triples:
+        if s != subject:
+            if node is not None:
+                yield separator + json.dumps(node)
+                separator = ', '
+            subject = s
+            node = OrderedDict([('@id', f'_:{s}' if isinstance(s, BNode) else str(s))])
+
+        if p == RDF.type and not isinstance(o, Literal):
+            node.setdefault('@type', []).append(f'_:{o}' if isinstance(o, BNode) else compact_iri(o, prefixes) or str(o))
+        else:
+            node.setdefault(compact_iri(p, prefixes) or str(p), []).append(jsonld_value(o, prefixes))
+
+    if node is not None:
+        yield separator + json.dumps(node)
+
+    yield ']}\n'
+
+
+def serialize(triples, representation: str, graph: str = None) -> iter:
+    """
+    Serialize the triples one by one in the given representation (turtle, nt, nquads or json-ld),
+    the name of the graph is only written in the N-Quads.
+    """
+    if representation == 'nt':
+        return serialize_ntriples(triples)
+    elif representation == 'nquads':
+        return serialize_nquads(triples, graph)
+    elif representation == 'turtle':
+        return serialize_turtle(triples)
+    elif representation == 'json-ld':
+        return serialize_jsonld(triples)
+
+    raise ValueError(f'The representation {representation} can not be streamed')
+
+
+def chunked(lines, size: int = 64 * 1024) -> iter:
+    """Group the serialized lines in chunks of bytes to reduce the number of writes on the socket."""
+    buffer = list()
+    length = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        length += len(data)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer = list()
+            length = 0
+
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzipped(chunks, level: int = 6) -> iter:
+    """Compress the chunks of bytes as a single gzip member while they are produced."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.flush()
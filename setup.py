@@ -40,7 +40,7 @@ setup(
     author="Fabio",
     author_email="fabio.ribeiro@koneksys.com",
     keywords=['aras', 'plm', 'oslc', 'rdf', 'json-ld'],
-    packages=fp(exclude=["*.tests", "*.tests.*", "tests.*"]),
+    packages=fp(exclude=["*.tests", "*.tests.*", "tests.*", "benchmarks", "benchmarks.*"]),
     install_requires=[
         "python-dotenv",
         "RDFLib",
@@ -53,7 +53,11 @@ setup(
         "requests",
         "blinker",
     ],
-    extras_require={},
+    extras_require={
+        "redis": ["redis"],
+        "async": ["aiohttp"],
+        "asgi": ["aiohttp", "a2wsgi", "uvicorn"],
+    },
     python_requires=">=3.6.0",
     include_package_data=True,
     license=None,
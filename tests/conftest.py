@@ -13,6 +13,7 @@ from oslc_api import create_app
 from oslc_api.auth import ArasAPI
 from oslc_api.auth.models import User
 from tests.functional.rest import OSLCAPI
+from tests.stub_server import StubODataServer
 
 
 @pytest.fixture(scope='session')
@@ -109,6 +110,8 @@ def load_resource_shape_test():
 
 
 class Data(object):
+    status_code = 200
+
     def __init__(self, data):
         self.data = data
 
@@ -143,7 +146,7 @@ def aras_api():
     utc_dt = datetime.now(timezone.utc)
 
     try:
-        aras_api.get_token('admin', '607920b64fe136f9ab2389e371852af2')
+        aras_api.token = aras_api.get_token('admin', '607920b64fe136f9ab2389e371852af2')
     except requests.exceptions.ConnectionError as e:
         if isinstance(e.args[0], MaxRetryError):
             token = {
@@ -181,3 +184,18 @@ def item_values(aras_api):
         item_id = '61AB2C31D053445FB7C655E956C80AC9'
 
     return item_type, config_id, item_id
+
+
+@pytest.fixture
+def stub_aras_api(aras_api):
+    """The ARAS API client pointing to a local stub server of the OData API."""
+    # The tests set the token of the session client, it is restored for the next ones
+    token = aras_api.token
+    with StubODataServer() as stub:
+        aras_api.init_app(None, stub.base_api_uri, 'Innovator', 'IOMApp', 'InnovatorSample')
+        try:
+            yield aras_api, stub
+        finally:
+            aras_api.token = token
+
+    aras_api.init_app(None, os.environ.get('SOURCE_BASE_API_URI'), 'Innovator', 'IOMApp', 'InnovatorSample')
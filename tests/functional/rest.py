@@ -22,10 +22,23 @@ class OSLCAPI:
             headers=self.headers
         )
 
-    def get_query_resource(self, item_type_name, item_type_id):
+    def get_query_resource(self, item_type_name, item_type_id, config_context=None, header=None):
+        headers = dict(self.headers)
+        headers.update(header or {})
+
         return self._client.get(
             '/api/oslc/' + item_type_name + '/' + item_type_id,
-            headers=self.headers
+            query_string={'oslc_config.context': config_context} if config_context else None,
+            headers=headers
+        )
+
+    def export(self, item_type_name, header=None):
+        headers = dict(self.headers)
+        headers.update(header or {})
+
+        return self._client.get(
+            '/api/oslc/' + item_type_name + '/export',
+            headers=headers
         )
 
     def get_components(self, item_type_name):
@@ -45,3 +58,16 @@ class OSLCAPI:
             '/api/oslc/config/' + item_type_name + '/component/' + config_id + '/configurations',
             headers=self.headers
         )
+
+    def get_caches(self):
+        return self._client.get(
+            '/api/oslc/cache',
+            headers=self.headers
+        )
+
+    def invalidate_cache(self, name, item_type=None):
+        query = f'?item_type={item_type}' if item_type else ''
+        return self._client.delete(
+            '/api/oslc/cache/' + name + query,
+            headers=self.headers
+        )
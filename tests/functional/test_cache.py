@@ -0,0 +1,35 @@
+import logging
+
+from oslc_api.auth import login
+from oslc_api.auth.models import User
+from oslc_api.rest_api.aras import shape_cache
+
+log = logging.getLogger(__name__)
+
+
+def test_cache_stats(oslc_api, access_token):
+    @login.request_loader
+    def load_user_from_request(request):
+        return User(username='admin', access_token=access_token)
+
+    res = oslc_api.get_caches()
+    assert res.status_code == 200, 'The request was not successful'
+    assert 'shapes' in [cache['name'] for cache in res.json['caches']]
+
+
+def test_invalidate_shapes_cache(oslc_api, access_token, load_resource_shape_test):
+    @login.request_loader
+    def load_user_from_request(request):
+        return User(username='admin', access_token=access_token)
+
+    shape_cache.set(('http://aras/', 'Part', 'http://oslc'), load_resource_shape_test)
+    shape_cache.set(('http://aras/', 'CAD', 'http://oslc'), load_resource_shape_test)
+
+    res = oslc_api.invalidate_cache('shapes', 'Part')
+    assert res.status_code == 200, 'The request was not successful'
+    assert res.json['invalidated'] == 1
+    assert ('http://aras/', 'CAD', 'http://oslc') in shape_cache
+
+    res = oslc_api.invalidate_cache('unknown')
+    assert res.status_code == 404
+    shape_cache.clear()
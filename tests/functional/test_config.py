@@ -53,15 +53,19 @@ def test_component(oslc_api, source_base_uri, access_token, item_values,
         )
 
         mocker.patch(
-            'oslc_api.aras.resources.validate_config_id',
-            return_value=load_validate_configs_test
+            'oslc_api.aras.resources.load_version_history',
+            return_value={e['id']: e for e in load_validate_configs_test['value']}
         )
 
+        # The validators are the ones of the current version in the history, the item is not probed
+        mocker.patch('oslc_api.rest_api.routes.load_item_version', side_effect=AssertionError)
+
     res = oslc_api.get_component(item_type, config_id)
     assert res is not None
     assert res.status_code == 200, 'The request was not successful'
     assert config_id.encode('ascii') in res.data, 'The response does not contain the config id'
     assert b'oslc_config:configurations' in res.data
+    assert res.headers.get('ETag'), 'The ETag header is missing'
 
 
 def test_configurations(oslc_api, source_base_uri, access_token, item_values,
@@ -86,13 +90,8 @@ def test_configurations(oslc_api, source_base_uri, access_token, item_values,
         )
 
         mocker.patch(
-            'oslc_api.aras.resources.validate_config_id',
-            return_value=load_resource_shape_test
-        )
-
-        mocker.patch(
-            'oslc_api.aras.resources.load_streams',
-            return_value=load_validate_configs_test
+            'oslc_api.aras.resources.load_version_history',
+            return_value={e['id']: e for e in load_validate_configs_test['value']}
         )
 
     res = oslc_api.get_configurations(item_type, config_id)
@@ -1,6 +1,11 @@
+import gzip
 import logging
 
+from rdflib import URIRef, DCTERMS, Literal, ConjunctiveGraph, Graph
+
+from oslc_api.aras.resources import item_types_cache, service_provider_cache
 from oslc_api.auth import login
+from oslc_api.auth.resilience import CircuitOpenError
 from oslc_api.auth.models import User
 
 log = logging.getLogger(__name__)
@@ -90,11 +95,6 @@ def test_oslc_item_by_item_type(oslc_api, source_base_uri, access_token, item_va
             return_value=load_items_test
         )
 
-        mocker.patch(
-            'oslc_api.aras.resources.validate_config_id',
-            return_value={e['id']: e for e in load_validate_configs_test['value']}
-        )
-
         mocker.patch(
             'oslc_api.rest_api.aras.load_resource_shape',
             return_value=load_resource_shape_test
@@ -124,3 +124,307 @@ def test_oslc_item_by_item_type(oslc_api, source_base_uri, access_token, item_va
     assert res is not None
     assert res.status_code == 200, 'The request was not successful'
     assert config_id.encode('ascii') in res.data, 'The response does not contain the config id'
+
+
+def test_oslc_service_provider_etag(oslc_api, access_token, mocker, load_item_types_test):
+    """
+    GIVEN the ServiceProvider document cached with its ETag
+    WHEN the document is requested again with If-None-Match
+    THEN check that the catalogue is loaded once and a 304 is returned without content
+    """
+    @login.request_loader
+    def load_user_from_request(request):
+        return User(username='admin', access_token=access_token)
+
+    item_types_cache.clear()
+    service_provider_cache.clear()
+    load = mocker.patch('oslc_api.aras.resources.load_item_types', return_value=load_item_types_test)
+
+    res = oslc_api.get_service_provider()
+    assert res.status_code == 200, 'The request was not successful'
+    etag = res.headers.get('ETag')
+    assert etag, 'The ETag header is missing'
+
+    res = oslc_api.get_service_provider(header={'If-None-Match': etag})
+    assert res.status_code == 304
+    assert res.data == b''
+
+    res = oslc_api.get_service_provider(header={'If-None-Match': '"outdated"'})
+    assert res.status_code == 200
+    assert res.headers.get('ETag') == etag
+    assert load.call_count == 1, 'The ItemTypes catalogue was loaded more than once'
+
+    # A reload of the catalogue with a new ItemType changes the document
+    item_types_cache.clear()
+    load.return_value = dict(load_item_types_test, NEW='New Item Type')
+    res = oslc_api.get_service_provider(header={'If-None-Match': etag})
+    assert res.status_code == 200
+    assert res.headers.get('ETag') != etag
+    assert b'New.Item.Type' in res.data
+
+    item_types_cache.clear()
+    service_provider_cache.clear()
+
+
+def test_oslc_versioned_item_is_cached(oslc_api, access_token, mocker):
+    """
+    GIVEN a version of an item requested with its configuration context
+    WHEN the same version is requested again
+    THEN check that the cached document is returned without building it again until the version is modified
+    """
+    @login.request_loader
+    def load_user_from_request(request):
+        return User(username='admin', access_token=access_token)
+
+    def get_item_rdf(item_graph, item_type, source_base_url, item_id, config_id, item_url, url_sp, version=None):
+        item_graph.add((URIRef(item_url), DCTERMS.identifier, Literal(item_id)))
+        version.update(probe.return_value, is_current='1')
+        return True
+
+    config_id = 'A1B2C3'
+    config_context = f'http://127.0.0.1:5000/api/oslc/config/Part/component/{config_id}/stream/D4E5F6'
+
+    version = {'id': 'D4E5F6', 'generation': 1, 'modified_on': '2016-02-11T16:12:00'}
+    probe = mocker.patch('oslc_api.rest_api.routes.load_item_version', return_value=version)
+    build = mocker.patch('oslc_api.aras.resources.get_item_rdf', side_effect=get_item_rdf)
+
+    response_cache = oslc_api._client.application.extensions['response_cache']
+    response_cache.clear()
+
+    res = oslc_api.get_query_resource('Part', config_id, config_context)
+    assert res.status_code == 200, 'The request was not successful'
+    assert b'D4E5F6' in res.data
+
+    cached = oslc_api.get_query_resource('Part', config_id, config_context)
+    assert cached.status_code == 200
+    assert cached.data == res.data
+    assert cached.headers['Content-Type'] == res.headers['Content-Type']
+    assert cached.headers.get('ETag') == res.headers.get('ETag')
+    assert build.call_count == 1, 'The cached version was built again'
+
+    oslc_api.get_query_resource('Part', config_id)
+    assert build.call_count == 2, 'The current version of the item must not be cached'
+
+    probe.return_value = dict(version, modified_on='2016-03-01T10:00:00')
+    res = oslc_api.get_query_resource('Part', config_id, config_context)
+    assert res.status_code == 200
+    assert res.headers.get('ETag') != cached.headers.get('ETag')
+    assert build.call_count == 3, 'The cached document of a modified version was served'
+    response_cache.clear()
+
+
+def test_oslc_frozen_version_is_cached_without_probe(oslc_api, access_token, mocker):
+    """
+    GIVEN a version of an item that is not the current one
+    WHEN it is requested again, with or without If-None-Match
+    THEN check that the cached document is returned without asking Aras for its version
+    """
+    @login.request_loader
+    def load_user_from_request(request):
+        return User(username='admin', access_token=access_token)
+
+    def get_item_rdf(item_graph, item_type, source_base_url, item_id, config_id, item_url, url_sp, version=None):
+        item_graph.add((URIRef(item_url), DCTERMS.identifier, Literal(item_id)))
+        version.update(id=item_id, generation='1', modified_on='2016-02-11T16:12:00', is_current='0')
+        return True
+
+    config_id = 'A1B2C3'
+    config_context = f'http://127.0.0.1:5000/api/oslc/config/Part/component/{config_id}/stream/D4E5F6'
+
+    probe = mocker.patch('oslc_api.rest_api.routes.load_item_version', return_value=None)
+    build = mocker.patch('oslc_api.aras.resources.get_item_rdf', side_effect=get_item_rdf)
+
+    response_cache = oslc_api._client.application.extensions['response_cache']
+    response_cache.clear()
+
+    res = oslc_api.get_query_resource('Part', config_id, config_context)
+    assert res.status_code == 200, 'The request was not successful'
+    probe.reset_mock()
+
+    for header in (None, {'If-None-Match': res.headers.get('ETag') or '*'}):
+        cached = oslc_api.get_query_resource('Part', config_id, config_context, header=header)
+        assert cached.status_code in (200, 304)
+    assert build.call_count == 1, 'The frozen version was built again'
+    assert probe.call_count == 0, 'The version of a frozen document was probed'
+    response_cache.clear()
+
+
+def test_oslc_versioned_item_is_served_stale_while_aras_is_down(oslc_api, access_token, mocker):
+    """
+    GIVEN a version of an item whose document was cached
+    WHEN the circuit breaker of ARAS API is open
+    THEN check that the cached document is served marked as stale, and a 503 is returned for the others
+    """
+    @login.request_loader
+    def load_user_from_request(request):
+        return User(username='admin', access_token=access_token)
+
+    def get_item_rdf(item_graph, item_type, source_base_url, item_id, config_id, item_url, url_sp, version=None):
+        item_graph.add((URIRef(item_url), DCTERMS.identifier, Literal(item_id)))
+        version.update(probe.return_value, is_current='1')
+        return True
+
+    config_id = 'A1B2C3'
+    config_context = f'http://127.0.0.1:5000/api/oslc/config/Part/component/{config_id}/stream/D4E5F6'
+
+    version = {'id': 'D4E5F6', 'generation': 1, 'modified_on': '2016-02-11T16:12:00'}
+    probe = mocker.patch('oslc_api.rest_api.routes.load_item_version', return_value=version)
+    build = mocker.patch('oslc_api.aras.resources.get_item_rdf', side_effect=get_item_rdf)
+
+    response_cache = oslc_api._client.application.extensions['response_cache']
+    response_cache.clear()
+
+    res = oslc_api.get_query_resource('Part', config_id, config_context)
+    assert res.status_code == 200, 'The request was not successful'
+
+    probe.side_effect = CircuitOpenError(retry_after=30)
+    build.side_effect = CircuitOpenError(retry_after=30)
+
+    stale = oslc_api.get_query_resource('Part', config_id, config_context)
+    assert stale.status_code == 200
+    assert stale.data == res.data
+    assert stale.headers.get('ETag') == res.headers.get('ETag')
+    assert stale.headers.get('Warning') == '110 - "Response is Stale"'
+
+    unavailable = oslc_api.get_query_resource('Part', 'X9Y8Z7', config_context)
+    assert unavailable.status_code == 503
+    assert unavailable.headers.get('Retry-After') == '30'
+
+    # The documents read by a user are never served to another one
+    @login.request_loader
+    def load_other_user_from_request(request):
+        return User(username='reader', access_token=access_token)
+
+    res = oslc_api.get_query_resource('Part', config_id, config_context)
+    assert res.status_code == 503, 'The document of another user was served'
+    response_cache.clear()
+
+
+def test_oslc_item_conditional_requests(oslc_api, access_token, mocker):
+    """
+    GIVEN the current version of an item answered with the ETag and Last-Modified of the item fetched
+    WHEN the item is requested again with If-None-Match or If-Modified-Since
+    THEN check that the version is probed and a 304 is returned without building the graph until a new version
+         is created
+    """
+    @login.request_loader
+    def load_user_from_request(request):
+        return User(username='admin', access_token=access_token)
+
+    def get_item_rdf(item_graph, item_type, source_base_url, item_id, config_id, item_url, url_sp, version=None):
+        item_graph.add((URIRef(item_url), DCTERMS.identifier, Literal(config_id)))
+        version.update(probe.return_value)
+        return True
+
+    config_id = 'A1B2C3'
+    version = {'id': 'D4E5F6', 'generation': 1, 'modified_on': '2016-02-11T16:12:00'}
+    probe = mocker.patch('oslc_api.rest_api.routes.load_item_version', return_value=version)
+    build = mocker.patch('oslc_api.aras.resources.get_item_rdf', side_effect=get_item_rdf)
+
+    res = oslc_api.get_query_resource('Part', config_id)
+    assert res.status_code == 200, 'The request was not successful'
+    etag = res.headers.get('ETag')
+    assert etag, 'The ETag header is missing'
+    assert res.headers.get('Last-Modified') == 'Thu, 11 Feb 2016 16:12:00 GMT'
+    assert not probe.called, 'The version was probed for a request that is not conditional'
+
+    res = oslc_api.get_query_resource('Part', config_id, header={'If-None-Match': etag})
+    assert res.status_code == 304
+    assert build.call_count == 1, 'The graph was built for a conditional request'
+
+    res = oslc_api.get_query_resource('Part', config_id,
+                                      header={'If-Modified-Since': 'Fri, 12 Feb 2016 00:00:00 GMT'})
+    assert res.status_code == 304
+    assert build.call_count == 1
+
+    probe.return_value = dict(version, id='G7H8I9', generation=2, modified_on='2016-03-01T10:00:00')
+    res = oslc_api.get_query_resource('Part', config_id, header={'If-None-Match': etag})
+    assert res.status_code == 200, 'The new version of the item was not returned'
+    assert res.headers.get('ETag') != etag
+    assert build.call_count == 2
+
+
+def test_oslc_item_content_negotiation(oslc_api, access_token, mocker):
+    """
+    GIVEN an item requested with the q-values of the representations in the Accept header
+    WHEN the preferred representation is N-Quads or Turtle
+    THEN check that the document is written in it with its content type
+    """
+    @login.request_loader
+    def load_user_from_request(request):
+        return User(username='admin', access_token=access_token)
+
+    def get_item_rdf(item_graph, item_type, source_base_url, item_id, config_id, item_url, url_sp, version=None):
+        item_graph.add((URIRef(item_url), DCTERMS.identifier, Literal(config_id)))
+        return True
+
+    config_id = 'A1B2C3'
+    mocker.patch('oslc_api.rest_api.routes.load_item_version', return_value=None)
+    mocker.patch('oslc_api.aras.resources.get_item_rdf', side_effect=get_item_rdf)
+
+    res = oslc_api.get_query_resource('Part', config_id, header={
+        'Accept': 'text/turtle;q=0.5, application/n-quads, application/rdf+xml;q=0.1'})
+    assert res.status_code == 200, 'The request was not successful'
+    assert res.headers['Content-Type'] == 'application/n-quads'
+
+    url = f'http://localhost/api/oslc/Part/{config_id}'
+    g = ConjunctiveGraph()
+    g.parse(data=res.data.decode('utf-8'), format='nquads')
+    assert (URIRef(url), DCTERMS.identifier, Literal(config_id)) in g.get_context(URIRef(url))
+
+    res = oslc_api.get_query_resource('Part', config_id, header={'Accept': 'application/rdf+xml;q=0.5, text/*'})
+    assert res.status_code == 200
+    assert res.headers['Content-Type'].startswith('text/turtle')
+    assert b'dcterms:identifier "A1B2C3"' in res.data
+
+
+def test_oslc_export_item_type(oslc_api, access_token, mocker, load_item_types_test):
+    """
+    GIVEN the items of an ItemType
+    WHEN exporting them as N-Triples or as gzip compressed N-Quads
+    THEN check that each item is written in the graph named with its URL
+    """
+    @login.request_loader
+    def load_user_from_request(request):
+        return User(username='admin', access_token=access_token)
+
+    def iter_export_graphs(source_base_url, item_type, url_sp, page_size=100, workers=None):
+        assert page_size == 2
+
+        def iter_graphs():
+            for config_id in ('A1', 'B2', 'C3'):
+                item_url = f'{url_sp}/{item_type}/{config_id}'
+                graph = Graph()
+                graph.add((URIRef(item_url), DCTERMS.identifier, Literal(config_id)))
+                yield item_url, graph
+
+        return iter_graphs()
+
+    item_types_cache.clear()
+    mocker.patch('oslc_api.aras.resources.load_item_types', return_value=load_item_types_test)
+    mocker.patch('oslc_api.aras.resources.iter_export_graphs', side_effect=iter_export_graphs)
+    oslc_api._client.application.config['EXPORT_PAGE_SIZE'] = 2
+
+    res = oslc_api.export('Part', header={'Accept': 'application/n-quads', 'Accept-Encoding': 'gzip'})
+    assert res.status_code == 200, 'The request was not successful'
+    assert res.headers['Content-Type'] == 'application/n-quads'
+    assert res.headers['Content-Encoding'] == 'gzip'
+
+    g = ConjunctiveGraph()
+    g.parse(data=gzip.decompress(res.data).decode('utf-8'), format='nquads')
+    assert len(g) == 3
+    for config_id in ('A1', 'B2', 'C3'):
+        item_url = URIRef(f'http://localhost/api/oslc/Part/{config_id}')
+        assert list(g.get_context(item_url)) == [(item_url, DCTERMS.identifier, Literal(config_id))]
+
+    res = oslc_api.export('Part', header={'Accept': 'application/n-triples'})
+    assert res.status_code == 200
+    assert res.headers['Content-Type'] == 'application/n-triples'
+    assert 'Content-Encoding' not in res.headers
+    assert len(Graph().parse(data=res.data.decode('utf-8'), format='nt')) == 3
+
+    res = oslc_api.export('Unknown')
+    assert res.status_code == 400
+
+    oslc_api._client.application.config['EXPORT_PAGE_SIZE'] = 100
+    item_types_cache.clear()
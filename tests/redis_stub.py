@@ -0,0 +1,53 @@
+import fnmatch
+import threading
+import time
+
+
+class StubRedis:
+    """
+    In-process stand-in of a Redis server with the subset of the redis.Redis
+    client used by the adaptor (get, set with expiry, delete and scan_iter).
+    """
+
+    def __init__(self, timer=time.monotonic):
+        self.__timer = timer
+        self.__data = dict()
+        self.__lock = threading.Lock()
+
+    def __alive(self, key) -> bool:
+        entry = self.__data.get(key)
+        if entry is None:
+            return False
+        if entry[1] is not None and self.__timer() >= entry[1]:
+            del self.__data[key]
+            return False
+
+        return True
+
+    def get(self, key):
+        with self.__lock:
+            return self.__data[key][0] if self.__alive(key) else None
+
+    def set(self, key, value, ex=None):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+
+        with self.__lock:
+            self.__data[key] = (value, self.__timer() + ex if ex else None)
+
+        return True
+
+    def delete(self, *keys) -> int:
+        with self.__lock:
+            deleted = [key for key in keys if self.__alive(key)]
+            for key in deleted:
+                del self.__data[key]
+
+        return len(deleted)
+
+    def scan_iter(self, match: str = '*'):
+        with self.__lock:
+            keys = [key for key in list(self.__data) if self.__alive(key) and fnmatch.fnmatchcase(key, match)]
+
+        for key in keys:
+            yield key.encode('utf-8')
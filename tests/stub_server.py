@@ -0,0 +1,388 @@
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, unquote, parse_qs, parse_qsl
+
+base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # Accept the connections opened at the same time by the concurrent clients, 5 by default
+    request_queue_size = 128
+
+
+class StubODataHandler(BaseHTTPRequestHandler):
+    """Answer OData requests with the JSON fixtures from the data folder."""
+
+    # HTTP/1.1 is required to keep the connections alive between requests
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, avoid the delayed ACK stall on kept alive connections
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super(StubODataHandler, self).setup()
+        # A new TCP connection has been accepted, emulate the handshake cost (TCP + TLS) of a remote server
+        self.server.stub.count_connection()
+        if self.server.stub.connect_delay:
+            time.sleep(self.server.stub.connect_delay)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count_request(self.path, self.headers.get('Authorization'))
+
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        # Aras filters the versions of an item by the config_id sent in the body of the GET
+        length = int(self.headers.get('Content-Length') or 0)
+        content = json.loads(self.rfile.read(length) or b'{}') if length else dict()
+
+        url = urlparse(self.path)
+        if 'OAuthServer' in url.path:
+            status, body = stub.resolve_oauth(unquote(url.path))
+        elif stub.take_failure():
+            self.send_failure(stub.failure_status)
+            return
+        else:
+            status, body = stub.resolve(unquote(url.path), url.query, content.get('config_id'))
+        self.send_json(status, body)
+
+    def do_POST(self):
+        stub = self.server.stub
+        stub.count_request()
+
+        length = int(self.headers.get('Content-Length') or 0)
+        content = self.rfile.read(length) if length else b''
+
+        path = unquote(urlparse(self.path).path)
+        if 'OAuthServer' in path:
+            self.send_json(*stub.resolve_oauth(path, dict(parse_qsl(content.decode('utf-8')))))
+            return
+
+        if not path.endswith('/$batch') or not stub.batch_supported:
+            self.send_json(404, {'error': {'code': 'NotFound', 'message': path}})
+            return
+
+        if stub.take_failure():
+            self.send_failure(stub.failure_status)
+            return
+
+        stub.count_batch()
+        boundary = re.search('boundary=([^;]+)', self.headers.get('Content-Type')).group(1)
+        response_boundary = 'batchresponse_' + boundary
+
+        parts = list()
+        for part in content.split(b'--' + boundary.encode('utf-8'))[1:]:
+            if part.startswith(b'--'):
+                break
+
+            request_line = re.search(b'GET (\\S+) HTTP/1.1', part).group(1).decode('utf-8')
+            url = urlparse(request_line)
+            status, body = stub.resolve(unquote(url.path), url.query, relative=True)
+            parts.append('\r\n'.join([
+                f'--{response_boundary}',
+                'Content-Type: application/http',
+                'Content-Transfer-Encoding: binary',
+                '',
+                f'HTTP/1.1 {status} {self.responses[status][0]}',
+                'Content-Type: application/json',
+                '',
+                json.dumps(body),
+            ]))
+
+        body = ('\r\n'.join(parts) + f'\r\n--{response_boundary}--\r\n').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/mixed; boundary={response_boundary}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_failure(self, status: int = None):
+        if self.server.stub.hang:
+            # A server that does not answer in time
+            time.sleep(self.server.stub.hang)
+
+        if status:
+            self.send_json(status, {'error': {'code': 'ServiceUnavailable', 'message': 'The server is unavailable'}})
+        else:
+            # Close the connection without answering, as a server that went down
+            self.close_connection = True
+
+    def send_json(self, status: int, body: dict):
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def write_item_type_fixtures(data_dir: str, item_type: str = 'Part', count: int = 100,
+                             relationship: str = 'Part BOM') -> list:
+    """
+    Write the fixtures of an ItemType with count items for the stub server: its metadata
+    (ItemType, Property and RelationshipType entity sets), the items and their relationship,
+    each item referencing the next one through an item property and the relationship.
+
+    :return: the list of the items written
+    """
+    def item_id(number: int) -> str:
+        return f'{number:032X}'
+
+    def reference(number: int) -> dict:
+        return {'id': item_id(number), 'config_id': {'id': item_id(number)}}
+
+    fixtures = {
+        'sourceItemTypes.json': [
+            {'@odata.id': f"ItemType('{item_id(0)}')", 'name': item_type, 'is_versionable': '1'}],
+        'Property_Items.json': [
+            {'name': 'item_number', 'data_type': 'string', 'is_required': '1'},
+            {'name': 'name', 'data_type': 'string', 'is_required': '0'},
+            {'name': 'cost', 'data_type': 'decimal', 'is_required': '0'},
+            {'name': 'next_item', 'data_type': 'item', 'data_source@aras.name': item_type, 'is_required': '0'},
+        ],
+        'RelationshipType_Items.json': [{'name': relationship}],
+        f'{item_type}_Items.json': [
+            {'id': item_id(number), 'config_id': {'id': item_id(number)}, 'keyed_name': f'P-{number:06d}',
+             'generation': '1', 'is_current': '1', 'created_on': '2021-01-04T09:00:00',
+             'modified_on': '2021-01-04T09:00:00', 'item_number': f'P-{number:06d}',
+             'name': f'{item_type} {number}', 'cost': f'{number}.5', 'next_item': reference(number + 1)}
+            for number in range(1, count + 1)],
+        f'{relationship}_Items.json': [
+            {'id': item_id(count + number), 'source_id': {'id': item_id(number)},
+             'config_id': reference(number + 1)['config_id']}
+            for number in range(1, count + 1)],
+    }
+
+    for file_name, values in fixtures.items():
+        with open(os.path.join(data_dir, file_name), 'w') as json_file:
+            json.dump({'value': values}, json_file)
+
+    return fixtures[f'{item_type}_Items.json']
+
+
+class StubODataServer:
+    """
+    Local stand-in of the Aras OData API used by tests and benchmarks.
+
+    The entity sets are loaded from the fixtures in the data folder
+    (ItemType -> sourceItemTypes.json, <ItemType> -> <ItemType>_Items.json),
+    any other entity set answers with an empty collection. The entities are found
+    by their id, and only $top, $skip, $skiptoken, $count, $orderby=id and the
+    filters on source_id/id, config_id and id gt of the query options are applied.
+
+    With server_page_size, the collections are returned in pages of that size
+    followed by an @odata.nextLink, as Aras does with its server-driven paging.
+
+    The OAuth server discovery, its OpenID configuration and the token endpoint
+    issue tokens expiring after expires_in seconds for the password and the
+    refresh_token grants.
+
+    The next `failures` requests to the OData API fail, answered with `failure_status`
+    or with the connection closed when it is None, as an unhealthy Aras does.
+    """
+
+    def __init__(self, latency: float = 0.0, connect_delay: float = 0.0, data_dir: str = None,
+                 batch_supported: bool = True, server_page_size: int = None):
+        self.latency = latency
+        self.connect_delay = connect_delay
+        self.data_dir = data_dir or os.path.join(base_dir, 'data')
+        self.batch_supported = batch_supported
+        self.server_page_size = server_page_size
+        self.requests = 0
+        self.connections = 0
+        self.batches = 0
+        self.longest_url = 0
+        # Authorization headers of the requests received
+        self.authorizations = set()
+        self.expires_in = 3600
+        self.oauth_requests = 0
+        self.refresh_tokens = dict()
+        self.failures = 0
+        self.failure_status = 503
+        # Seconds the failed requests hang before the failure is sent
+        self.hang = 0.0
+        self.failed = 0
+
+        self.__lock = threading.Lock()
+        self.__fixtures = dict()
+        self.__issued = itertools.count(1)
+        self.__server = None
+        self.__thread = None
+
+    @property
+    def base_api_uri(self) -> str:
+        host, port = self.__server.server_address[:2]
+        return f'http://{host}:{port}/InnovatorServer'
+
+    @property
+    def source_base_uri(self) -> str:
+        return self.base_api_uri + '/server/odata/'
+
+    def count_request(self, path: str = '', authorization: str = None):
+        with self.__lock:
+            self.requests += 1
+            self.longest_url = max(self.longest_url, len(self.base_api_uri) + len(path))
+            if authorization:
+                self.authorizations.add(authorization)
+
+    def count_connection(self):
+        with self.__lock:
+            self.connections += 1
+
+    def take_failure(self) -> bool:
+        with self.__lock:
+            if self.failures <= 0:
+                return False
+
+            self.failures -= 1
+            self.failed += 1
+            return True
+
+    def count_batch(self):
+        with self.__lock:
+            self.batches += 1
+
+    def reset_counters(self):
+        with self.__lock:
+            self.requests = 0
+            self.connections = 0
+            self.batches = 0
+            self.longest_url = 0
+            self.authorizations = set()
+            self.oauth_requests = 0
+            self.failed = 0
+
+    def resolve(self, path: str, query: str = '', config_id: str = None, relative: bool = False) -> tuple:
+        if relative and '/server/odata/' not in path:
+            path = '/InnovatorServer/server/odata/' + path.lstrip('/')
+
+        match = re.search('/server/odata/([^(?/]+)', path)
+        if not match:
+            return 404, {'error': {'code': 'NotFound', 'message': path}}
+
+        entity_set = match.group(1)
+        file_name = 'sourceItemTypes.json' if entity_set == 'ItemType' else entity_set + '_Items.json'
+
+        data = self.__load_fixture(file_name)
+
+        key = re.search("/server/odata/[^(?/]+\\('([^']*)'\\)", path)
+        if key and 'value' in data:
+            # A single entity requested by its id
+            entity = next((value for value in data['value'] if value.get('id') == key.group(1)), None)
+            if entity is None:
+                return 404, {'error': {'code': 'NotFound', 'message': path}}
+            return 200, entity
+
+        options = {name: values[0] for name, values in parse_qs(query).items()}
+        if 'value' not in data or not (self.server_page_size or config_id or
+                                       options.keys() & {'$top', '$skip', '$skiptoken', '$filter', '$orderby', '$count'}):
+            return 200, data
+
+        values = data['value']
+        if config_id:
+            values = [value for value in values if value.get('config_id', {}).get('id') == config_id]
+
+        source_ids = re.findall("source_id/id eq '([^']*)'", options.get('$filter', ''))
+        if source_ids:
+            values = [value for value in values if value.get('source_id', {}).get('id') in source_ids]
+
+        config_id = re.search("config_id eq '([^']*)'", options.get('$filter', ''))
+        if config_id:
+            values = [value for value in values if value.get('config_id', {}).get('id') == config_id.group(1)]
+
+        after = re.search("(?:^|\\s)id gt '([^']*)'", options.get('$filter', ''))
+        if options.get('$orderby') == 'id' or after:
+            values = sorted(values, key=lambda value: value['id'])
+        if after:
+            values = [value for value in values if value['id'] > after.group(1)]
+
+        skip = int(options.get('$skip', 0)) + int(options.get('$skiptoken', 0))
+        top = int(options['$top']) if '$top' in options else len(values)
+
+        page = dict(data, value=values[skip:skip + top])
+        if options.get('$count') == 'true':
+            page = {'@odata.count': len(values), **page}
+        if self.server_page_size and '$top' not in options and len(values) > skip + self.server_page_size:
+            page['value'] = values[skip:skip + self.server_page_size]
+            page['@odata.nextLink'] = self.source_base_uri + match.group(1) + \
+                '?' + re.sub('&?\\$skiptoken=\\d+', '', query).lstrip('&') + \
+                f'&$skiptoken={skip + self.server_page_size}'
+
+        return 200, page
+
+    def resolve_oauth(self, path: str, form: dict = None) -> tuple:
+        with self.__lock:
+            self.oauth_requests += 1
+
+            if path.endswith('/Server/OAuthServerDiscovery.aspx'):
+                return 200, {'locations': [{'uri': self.base_api_uri + '/OAuthServer/'}]}
+            elif path.endswith('/OAuthServer/.well-known/openid-configuration'):
+                return 200, {'issuer': 'OAuthServer',
+                             'token_endpoint': self.base_api_uri + '/OAuthServer/connect/token',
+                             'end_session_endpoint': self.base_api_uri + '/OAuthServer/connect/endsession'}
+            elif path.endswith('/OAuthServer/connect/token') and form is not None:
+                grant_type = form.get('grant_type')
+                if grant_type == 'refresh_token':
+                    username = self.refresh_tokens.pop(form.get('refresh_token'), None)
+                else:
+                    username = form.get('username') if grant_type == 'password' and form.get('password') else None
+                if not username:
+                    return 400, {'error': 'invalid_grant', 'error_description': 'invalid_username_or_password'}
+
+                number = next(self.__issued)
+                refresh_token = f'refresh-{username}-{number}'
+                self.refresh_tokens[refresh_token] = username
+                return 200, {'access_token': f'token-{username}-{number}', 'expires_in': self.expires_in,
+                             'token_type': 'Bearer', 'refresh_token': refresh_token, 'scope': form.get('scope')}
+            elif path.endswith('/OAuthServer/connect/endsession'):
+                return 200, {}
+
+            return 404, {'error': {'code': 'NotFound', 'message': path}}
+
+    def clear_fixtures(self):
+        """Read the fixtures again from the data folder, e.g. after a new version of an item was written."""
+        with self.__lock:
+            self.__fixtures.clear()
+
+    def __load_fixture(self, file_name: str) -> dict:
+        if file_name not in self.__fixtures:
+            data = {'value': []}
+            file_path = os.path.join(self.data_dir, file_name)
+            if os.path.isfile(file_path):
+                with open(file_path) as json_file:
+                    data = json.load(json_file)
+
+            self.__fixtures[file_name] = data
+
+        return self.__fixtures[file_name]
+
+    def start(self):
+        self.__server = ThreadingHTTPServer(('127.0.0.1', 0), StubODataHandler)
+        self.__server.stub = self
+
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+        return self
+
+    def stop(self):
+        if self.__server:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,77 @@
+import functools
+import logging
+import time
+
+import pytest
+
+from oslc_api.aras.client import batch, query_item_types_list, query_item_instances, query_relation_properties
+from oslc_api.rest_api.aras import send_queries
+
+pytest.importorskip('aiohttp')
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def async_aras_api(stub_aras_api):
+    """The ARAS API client pointing to a local stub server with the asynchronous client enabled."""
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+    aras_api.async_enabled = True
+    try:
+        yield aras_api, stub
+    finally:
+        aras_api.async_enabled = False
+        aras_api.async_sender.close()
+
+
+def test_batch_is_sent_concurrently(async_aras_api):
+    aras_api, stub = async_aras_api
+    source_base_uri = aras_api.source_base_uri
+    # Open the client and load the fixtures of the stub before measuring
+    with batch():
+        query_item_types_list(source_base_uri)
+        query_item_instances(source_base_uri, 'Part', 10, 1)
+    stub.reset_counters()
+    stub.latency = 0.2
+
+    start = time.perf_counter()
+    with batch():
+        item_types = query_item_types_list(source_base_uri)
+        items = query_item_instances(source_base_uri, 'Part', 10, 1)
+        relations = [query_relation_properties(source_base_uri, 'Part BOM', str(i)) for i in range(8)]
+    elapsed = time.perf_counter() - start
+
+    assert stub.requests == 10
+    assert stub.batches == 0
+    assert elapsed < 1.0, 'The requests of the batch were not sent at the same time'
+    assert 'Part' in [item_type['name'] for item_type in item_types.json()['value']]
+    assert items.json()['value'][0]['config_id']['id'] == '367C9E1C2DF54EE980E5B6B9BDBA9C31'
+    assert all(relation.json()['value'] == [] for relation in relations)
+
+
+def test_queries_are_sent_by_the_async_client(async_aras_api):
+    """
+    GIVEN the asynchronous client enabled without the $batch requests
+    WHEN the relationships of an item are sent by send_queries
+    THEN check that they are awaited at the same time and the responses are in the order of the queries
+    """
+    aras_api, stub = async_aras_api
+    source_base_uri = aras_api.source_base_uri
+    send_queries([functools.partial(query_item_types_list, source_base_uri)])
+    stub.reset_counters()
+    stub.latency = 0.2
+
+    start = time.perf_counter()
+    pages = send_queries([functools.partial(query_item_instances, source_base_uri, 'Part', 5, page_no)
+                          for page_no in (1, 2)] +
+                         [functools.partial(query_relation_properties, source_base_uri, 'Part BOM', str(i))
+                          for i in range(6)])
+    elapsed = time.perf_counter() - start
+
+    assert stub.requests == 8
+    assert stub.batches == 0
+    assert elapsed < 1.0, 'The queries were not sent at the same time'
+    first, second = [[item['id'] for item in page.json()['value']] for page in pages[:2]]
+    assert len(first) == 5
+    assert first[-1] < second[0], 'The responses are not in the order of the queries'
@@ -1,6 +1,17 @@
+import json
 import logging
+import threading
+import time
 
-from oslc_api.rest_api.aras import load_item_types, load_items, load_resource_shape
+from rdflib import Graph, URIRef
+from rdflib.compare import isomorphic
+
+from oslc_api.aras import concurrency
+from oslc_api.aras.client import MAX_URL_LENGTH
+from oslc_api.aras.namespaces import OSLC
+from oslc_api.rest_api.aras import load_item_types, load_items, load_resource_shape, check_if_versionable, \
+    versionable_cache, get_item_rdf, iter_export_graphs, shape_cache
+from tests.stub_server import write_item_type_fixtures
 
 logger = logging.getLogger(__name__)
 
@@ -62,3 +73,158 @@ def test_load_resource_shape(source_base_uri, access_token, item_values, mocker,
     assert data is not None
     assert len(data) >= 0
     assert b'<rdf:type rdf:resource="http://open-services.net/ns/core#ResourceShape"/>' in data.serialize()
+
+
+def test_check_if_versionable_uses_index(mocker):
+    """
+    GIVEN the versionable flag of all the ItemTypes loaded in a single request
+    WHEN checking several ItemTypes
+    THEN check that Aras is only queried once and unknown ItemTypes are queried directly
+    """
+    versionable_cache.clear()
+    response = mocker.Mock(status_code=200)
+    response.iter_content.return_value = [json.dumps({'value': [
+        {'name': 'Part', 'is_versionable': '1'},
+        {'name': 'Part BOM', 'is_versionable': '0'},
+    ]}).encode('utf-8')]
+    query_all = mocker.patch('oslc_api.rest_api.aras.query_item_types_versionable', return_value=response)
+
+    single = mocker.Mock()
+    single.json.return_value = {'value': [{'name': 'CAD', 'is_versionable': '1'}]}
+    query_single = mocker.patch('oslc_api.rest_api.aras.get_is_versionable', return_value=single)
+
+    source_base_url = 'http://aras/server/odata/'
+    assert check_if_versionable(source_base_url, 'Part') is True
+    assert check_if_versionable(source_base_url, 'Part.BOM') is False
+    assert check_if_versionable(source_base_url, 'Part') is True
+    assert query_all.call_count == 1, 'The versionable index was loaded more than once'
+    assert query_single.call_count == 0
+
+    assert check_if_versionable(source_base_url, 'CAD') is True
+    assert check_if_versionable(source_base_url, 'CAD') is True
+    assert query_single.call_count == 1, 'The ItemType missing from the index was queried again'
+
+    single.json.return_value = {'value': []}
+    assert check_if_versionable(source_base_url, 'Prt') is None
+    assert check_if_versionable(source_base_url, 'Prt') is None
+    assert query_single.call_count == 2, 'The unknown ItemType was queried again'
+    versionable_cache.clear()
+
+
+def test_get_item_rdf_queries_relationships_concurrently(mocker, load_resource_shape_test,
+                                                         load_query_expanded_item_test):
+    """
+    GIVEN an ItemType with several Zero-or-many relationships
+    WHEN building the RDF of an item
+    THEN check that the relationships are queried concurrently and all of them are added to the graph
+    """
+    lock = threading.Lock()
+    in_flight = {'current': 0, 'max': 0}
+    queried = list()
+
+    def query_relation(source_base_url, prop, item_id):
+        with lock:
+            in_flight['current'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['current'])
+            queried.append(prop)
+        time.sleep(0.05)
+        with lock:
+            in_flight['current'] -= 1
+
+        return None
+
+    mocker.patch('oslc_api.rest_api.aras.load_resource_shape', return_value=load_resource_shape_test)
+    mocker.patch('oslc_api.rest_api.aras.query_expanded_item', return_value=load_query_expanded_item_test)
+    mocker.patch('oslc_api.rest_api.aras.check_if_versionable', return_value=True)
+    mocker.patch('oslc_api.rest_api.aras.query_relation_properties', side_effect=query_relation)
+
+    config_id = '2491803C211A435F8E96B4EC534B3F81'
+    item_node = get_item_rdf(Graph(), 'Part', 'http://aras/server/odata/', None, config_id,
+                             f'http://127.0.0.1:5000/api/oslc/Part/{config_id}', 'http://127.0.0.1:5000/api/oslc')
+
+    relationships = [str(load_resource_shape_test.value(s, OSLC.name))
+                     for s in load_resource_shape_test.subjects(OSLC.occurs, OSLC['Zero-or-many'])
+                     if (s, OSLC.propertyDefinition, None) in load_resource_shape_test]
+
+    assert item_node is not None
+    assert sorted(queried) == sorted(relationships), 'Not all the relationships were queried'
+    assert 1 < in_flight['max'] <= concurrency.max_workers, 'The relationships were not queried concurrently'
+
+
+def test_loaders_parse_the_responses_incrementally(stub_aras_api, load_item_types_test, load_items_test):
+    """
+    GIVEN the OData responses of the ItemTypes and of the Part items
+    WHEN loading them with the incremental parser
+    THEN check that the result is the same of the whole documents and only the used fields are kept
+    """
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+
+    assert load_item_types(aras_api.source_base_uri) == load_item_types_test
+
+    items = load_items(aras_api.source_base_uri, 'Part')
+    assert list(items) == list(load_items_test)
+    for item_id, item in items.items():
+        assert item['config_id'] == {'id': item_id}
+        assert item['keyed_name'] == load_items_test[item_id]['keyed_name']
+
+
+def test_export_reads_the_pages_concurrently(stub_aras_api, tmp_path):
+    """
+    GIVEN an ItemType with more items than a page
+    WHEN exporting all its items
+    THEN check that every item is exported once with the graph of its QueryResource and
+         that the items and relationships are queried by page instead of by item
+    """
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+    stub.data_dir = str(tmp_path)
+    items = write_item_type_fixtures(stub.data_dir, count=25)
+
+    url_sp = 'http://127.0.0.1:5000/api/oslc'
+    source_base_uri = aras_api.source_base_uri
+    shape_cache.clear()
+    versionable_cache.clear()
+
+    graphs = list(iter_export_graphs(source_base_uri, 'Part', url_sp, page_size=10, workers=4))
+
+    assert [item_url for item_url, _ in graphs] == [f'{url_sp}/Part/{item["id"]}' for item in items]
+    # ItemType metadata and shape, then 3 pages (and up to 3 prefetched empty ones) with a relationship query each
+    assert stub.requests <= 4 + 2 * 3 + 3, 'The items were not queried by page'
+
+    item_url, graph = graphs[0]
+    expected = Graph()
+    get_item_rdf(expected, 'Part', source_base_uri, None, items[0]['id'], item_url, url_sp)
+    assert len(graph) == 11
+    assert isomorphic(graph, expected), 'The exported item differs from its QueryResource'
+
+    shape_cache.clear()
+    versionable_cache.clear()
+
+
+def test_export_splits_the_relationship_queries(stub_aras_api, tmp_path):
+    """
+    GIVEN a page of items whose ids do not fit in a single URL and a server paging its results
+    WHEN exporting all the items
+    THEN check that every URL fits in the limits of IIS and every relationship is exported
+    """
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+    stub.data_dir = str(tmp_path)
+    stub.server_page_size = 20
+    write_item_type_fixtures(stub.data_dir, count=120)
+
+    url_sp = 'http://127.0.0.1:5000/api/oslc'
+    shape_cache.clear()
+    versionable_cache.clear()
+    stub.reset_counters()
+
+    graphs = list(iter_export_graphs(aras_api.source_base_uri, 'Part', url_sp, page_size=100, workers=2))
+
+    assert len(graphs) == 120
+    assert stub.longest_url <= MAX_URL_LENGTH
+    bom = URIRef(f'{url_sp}/Part/resourceShape#Part.BOM')
+    assert all((None, bom, None) in graph for _, graph in graphs), 'A relationship was not exported'
+
+    shape_cache.clear()
+    versionable_cache.clear()
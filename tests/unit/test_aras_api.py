@@ -0,0 +1,186 @@
+import logging
+import time
+from types import SimpleNamespace
+
+from oslc_api.aras.client import query_item_instances, query_item_types_list
+from oslc_api.aras.concurrency import fan_out
+from oslc_api.auth import ArasAPI, load_user_from_request
+from oslc_api.auth.tokens import TokenStore
+from tests.stub_server import StubODataServer
+
+logger = logging.getLogger(__name__)
+
+
+def test_session_reuses_connections():
+    """
+    GIVEN the pooled session of the ARAS API client
+    WHEN sending several requests to the same host
+    THEN check that a single connection is opened and kept alive
+    """
+    aras_api = ArasAPI()
+
+    with StubODataServer() as stub:
+        for _ in range(5):
+            res = aras_api.session.get(stub.source_base_uri + 'ItemType?$select=name')
+            assert res.status_code == 200
+            assert 'value' in res.json()
+
+        assert stub.requests == 5
+        assert stub.connections == 1, 'The connections to the server are not being reused'
+
+
+def test_token_store_expires_and_evicts_the_users():
+    """
+    GIVEN a store of two users
+    WHEN their tokens expire or more users log in
+    THEN check that the expired and the least recently used users are removed
+    """
+    now = [1000.0]
+    tokens = TokenStore(maxsize=2, timer=lambda: now[0])
+
+    user = tokens.add('admin', {'access_token': 'a', 'expires_in': 3600, 'token_type': 'Bearer'})
+    tokens.add('reader', {'access_token': 'b', 'expires_in': '60'})
+
+    assert user.expires_at == 4600
+    assert tokens.get('a') is user
+    assert tokens.get('b').username == 'reader'
+
+    now[0] += 60
+    assert tokens.get('b') is None, 'The expired token was not removed'
+    assert tokens.get('a') is user
+
+    tokens.add('editor', {'access_token': 'c', 'expires_in': 3600})
+    tokens.add('viewer', {'access_token': 'd', 'expires_in': 3600})
+    assert tokens.get('a') is None, 'The least recently used user was not evicted'
+    assert len(tokens) == 2
+
+
+def test_requests_use_the_token_of_their_user(stub_aras_api):
+    """
+    GIVEN two users logged in
+    WHEN their requests send queries to Aras at the same time from the threads of a fan-out
+    THEN check that each query is sent with the token of its user
+    """
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'client'}
+
+    def read(access_token: str):
+        with aras_api.authorization(access_token):
+            return fan_out(lambda item_type: query_item_instances(aras_api.source_base_uri, item_type, 5, 1),
+                           ['Part', 'Document'])
+
+    results = fan_out(read, ['user-a', 'user-b'])
+
+    assert all(res.status_code == 200 for responses in results for res in responses)
+    assert stub.authorizations == {'Bearer user-a', 'Bearer user-b'}
+
+    # Without the token of a user the token of the client is used
+    stub.reset_counters()
+    with aras_api.authorization(None):
+        query_item_types_list(aras_api.source_base_uri)
+    assert stub.authorizations == {'Bearer client'}
+
+
+def test_users_are_loaded_by_their_token(aras_api):
+    """
+    GIVEN two users logged in one after the other
+    WHEN each of them sends a request with its token
+    THEN check that both are authenticated
+    """
+    first = aras_api.tokens.add('admin', {'access_token': 'token-a', 'expires_in': 3600})
+    second = aras_api.tokens.add('reader', {'access_token': 'token-b', 'expires_in': 3600})
+
+    try:
+        for user in (first, second):
+            request = SimpleNamespace(headers={'X-ARAS-ACCESS-TOKEN': user.access_token})
+            assert load_user_from_request(request) is user
+
+        assert load_user_from_request(SimpleNamespace(headers={'X-ARAS-ACCESS-TOKEN': 'unknown'})) is None
+    finally:
+        aras_api.tokens.remove('token-a')
+        aras_api.tokens.remove('token-b')
+
+
+def test_token_store_refreshes_the_tokens_once():
+    """
+    GIVEN a user whose token expires
+    WHEN it is used within the refresh margin and after it expired by several threads
+    THEN check that the token is refreshed in the background and then once for all the threads
+    """
+    now = [1000.0]
+    calls = list()
+
+    def refresh(user):
+        calls.append(user.refresh_token)
+        time.sleep(0.05)
+        return {'access_token': f'new-{len(calls)}', 'expires_in': 600, 'refresh_token': f'r{len(calls)}'}
+
+    tokens = TokenStore(refresh=refresh, refresh_margin=60, timer=lambda: now[0])
+    user = tokens.add('admin', {'access_token': 'a', 'expires_in': 600, 'refresh_token': 'r0'})
+
+    # Within the margin the current token is served while it is refreshed
+    now[0] += 550
+    assert tokens.get('a').access_token == 'a'
+    for _ in range(50):
+        if user.access_token != 'a':
+            break
+        time.sleep(0.01)
+    assert user.access_token == 'new-1'
+    assert user.expires_at == 2150
+
+    # Once expired, the concurrent requests wait for a single refresh
+    now[0] += 700
+    users = fan_out(lambda _: tokens.get('a'), range(8))
+
+    assert calls == ['r0', 'r1']
+    assert all(u is user for u in users)
+    assert user.access_token == 'new-2'
+    assert tokens.refreshes == 2
+
+
+def test_login_discovers_the_oauth_server_once(stub_aras_api):
+    """
+    GIVEN the OAuth server of the stub
+    WHEN two users log in and the token of one of them expires
+    THEN check that the discovery is done once and that the expired token is refreshed
+    """
+    aras_api, stub = stub_aras_api
+    stub.expires_in = 1
+
+    first = aras_api.get_token('admin', 'password')
+    second = aras_api.get_token('reader', 'password')
+    assert stub.oauth_requests == 4, 'The OpenID configuration was not reused by the second login'
+
+    time.sleep(1.1)
+    user = aras_api.tokens.get(first['access_token'])
+    assert user.username == 'admin'
+    assert user.access_token != first['access_token'], 'The expired token was not refreshed'
+    assert stub.oauth_requests == 5
+
+    with aras_api.authorization(user.access_token):
+        query_item_types_list(aras_api.source_base_uri)
+    assert stub.authorizations == {'Bearer ' + user.access_token}
+
+    aras_api.tokens.remove(first['access_token'])
+    aras_api.tokens.remove(second['access_token'])
+
+
+def test_logout_after_the_token_is_refreshed(stub_aras_api):
+    """
+    GIVEN a user whose token was refreshed
+    WHEN the user logs out
+    THEN check that the user is removed from the token store by the token of its login
+    """
+    aras_api, stub = stub_aras_api
+    stub.expires_in = 1
+
+    token = aras_api.get_token('admin', 'password')
+    time.sleep(1.1)
+    user = aras_api.tokens.get(token['access_token'])
+    assert user.access_token != token['access_token'], 'The expired token was not refreshed'
+    assert user.token_key == token['access_token']
+
+    with aras_api.authorization(user.access_token):
+        assert aras_api.end_session(user)
+
+    assert aras_api.tokens.get(token['access_token']) is None, 'The user was not logged out'
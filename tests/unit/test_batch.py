@@ -0,0 +1,80 @@
+import logging
+
+import pytest
+
+from oslc_api.aras.client import batch, query_item_types_list, query_item_instances, query_relation_properties
+from oslc_api.auth.batch import BatchResponse, build_batch_body, parse_batch_response
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def batch_aras_api(stub_aras_api):
+    """The ARAS API client pointing to a local stub server with the batches enabled."""
+    aras_api, stub = stub_aras_api
+    aras_api.batch_enabled = True
+    yield aras_api, stub
+
+    aras_api.batch_enabled = False
+
+
+def test_build_and_parse_batch():
+    responses = [BatchResponse('http://aras/server/odata/Part?$select=keyed_name, id'),
+                 BatchResponse('http://aras/server/odata/Part', data='{ "config_id" : "A" }')]
+
+    content_type, body = build_batch_body(responses, 'http://aras/server/odata/', boundary='batch_1')
+
+    assert content_type == 'multipart/mixed; boundary=batch_1'
+    assert b'GET Part?$select=keyed_name,%20id HTTP/1.1' in body
+    assert b'{ "config_id" : "A" }' in body
+
+    content = (b'--batchresponse_1\r\nContent-Type: application/http\r\n\r\n'
+               b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{"value": [1]}\r\n'
+               b'--batchresponse_1\r\nContent-Type: application/http\r\n\r\n'
+               b'HTTP/1.1 404 Not Found\r\n\r\n\r\n'
+               b'--batchresponse_1--\r\n')
+    results = parse_batch_response('multipart/mixed; boundary=batchresponse_1', content)
+
+    assert results[0] == (200, {'Content-Type': 'application/json'}, b'{"value": [1]}')
+    assert results[1][0] == 404
+
+
+def test_queries_are_sent_in_a_single_batch(batch_aras_api):
+    aras_api, stub = batch_aras_api
+    source_base_uri = aras_api.source_base_uri
+
+    with batch():
+        item_types = query_item_types_list(source_base_uri)
+        items = query_item_instances(source_base_uri, 'Part', 10, 1)
+        relations = query_relation_properties(source_base_uri, 'Part BOM', '2491803C211A435F8E96B4EC534B3F81')
+
+    assert stub.requests == 1, 'The queries were not sent in a single request'
+    assert stub.batches == 1
+    assert 'Part' in [item_type['name'] for item_type in item_types.json()['value']]
+    # The pages are ordered by id
+    assert items.json()['value'][0]['config_id']['id'] == '367C9E1C2DF54EE980E5B6B9BDBA9C31'
+    assert relations.status_code == 200
+    assert relations.json()['value'] == []
+
+
+def test_batch_falls_back_to_single_requests(batch_aras_api):
+    aras_api, stub = batch_aras_api
+    stub.batch_supported = False
+
+    with batch():
+        item_types = query_item_types_list(aras_api.source_base_uri)
+        items = query_item_instances(aras_api.source_base_uri, 'Part', 10, 1)
+
+    assert stub.requests == 3, 'The queries were not sent individually after the failed batch'
+    assert item_types.json()['value']
+    assert items.json()['value']
+
+
+def test_batch_disabled_sends_requests_immediately(batch_aras_api):
+    aras_api, stub = batch_aras_api
+    aras_api.batch_enabled = False
+
+    with batch():
+        item_types = query_item_types_list(aras_api.source_base_uri)
+        assert stub.requests == 1
+        assert item_types.json()['value']
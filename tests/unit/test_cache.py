@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from oslc_api.aras.cache import TTLCache, DiskCache, RedisCache, create_cache, matches_item_type
+from oslc_api.rest_api.aras import load_resource_shape, shape_cache
+from tests.redis_stub import StubRedis
+
+logger = logging.getLogger(__name__)
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_entries_expire():
+    timer = FakeTimer()
+    cache = TTLCache('test_expire', maxsize=10, ttl=5, timer=timer)
+    cache.set('key', 'value')
+
+    assert cache.get('key') == 'value'
+
+    timer.now = 6
+    assert cache.get('key') is None, 'The entry did not expire'
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_cache_entries_expire_with_their_own_ttl():
+    timer = FakeTimer()
+    cache = TTLCache('test_entry_ttl', maxsize=10, ttl=60, timer=timer)
+    cache.set('short', 'value', ttl=5)
+    cache.set('long', 'value', ttl=600)
+
+    timer.now = 5
+    assert cache.get('short') is None, 'The entry did not expire with its own ttl'
+    assert cache.get('long') == 'value'
+
+    timer.now = 60
+    assert cache.get('long') is None, 'The entry outlived the ttl of the cache'
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache('test_lru', maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert 'a' in cache
+    assert 'b' not in cache, 'The least recently used entry was not evicted'
+    assert 'c' in cache
+
+
+def test_cache_invalidate_by_item_type():
+    cache = TTLCache('test_invalidate', maxsize=10, ttl=60)
+    cache.set(('http://aras/odata/', 'Part', 'http://oslc'), 1)
+    cache.set(('http://aras/odata/', 'Part BOM', 'http://oslc'), 2)
+    cache.set(('http://aras/odata/', 'Document', 'http://oslc'), 3)
+
+    assert cache.invalidate(predicate=matches_item_type('Part.BOM')) == 1
+    assert len(cache) == 2
+    assert cache.invalidate() == 2
+
+
+def test_load_resource_shape_is_cached(mocker, load_resource_shape_test):
+    shape_cache.clear()
+    get_resource_shape = mocker.patch(
+        'oslc_api.rest_api.aras.get_resource_shape',
+        return_value=load_resource_shape_test
+    )
+
+    for _ in range(3):
+        g = load_resource_shape('Part', url_sp='http://127.0.0.1:5000/api/oslc', source_base_url='http://aras/')
+        assert g is load_resource_shape_test
+
+    assert get_resource_shape.call_count == 1, 'The resource shape was built more than once'
+    assert shape_cache.stats()['hits'] == 2
+    assert shape_cache.stats()['misses'] == 1
+    shape_cache.clear()
+
+
+def test_missing_entries_are_cached_shortly():
+    """
+    GIVEN a cache keeping the keys not found for 5 seconds
+    WHEN a key that does not exist is loaded several times
+    THEN check that it is looked up once until its negative TTL passes
+    """
+    timer = FakeTimer()
+    cache = TTLCache('test_negative', maxsize=10, ttl=60, negative_ttl=5, timer=timer)
+    calls = list()
+
+    def loader():
+        calls.append(timer.now)
+        return None
+
+    for _ in range(3):
+        assert cache.get_or_load('Unknown', loader) is None
+    assert len(calls) == 1, 'The missing key was looked up again'
+    assert 'Unknown' not in cache
+    assert cache.get('Unknown', 'default') == 'default'
+    assert cache.items() == []
+
+    timer.now = 5
+    assert cache.get_or_load('Unknown', lambda: 'created') == 'created'
+    assert cache.get('Unknown') == 'created'
+
+
+def test_load_resource_shape_of_a_missing_item_type_is_cached(mocker):
+    shape_cache.clear()
+    get_resource_shape = mocker.patch('oslc_api.rest_api.aras.get_resource_shape', return_value=None)
+
+    for _ in range(3):
+        assert load_resource_shape('Prt', url_sp='http://127.0.0.1:5000/api/oslc', source_base_url='http://aras/') is None
+
+    assert get_resource_shape.call_count == 1, 'The missing ItemType was queried on every request'
+    shape_cache.clear()
+
+
+def test_cache_refreshes_in_background():
+    timer = FakeTimer()
+    cache = TTLCache('test_refresh', maxsize=10, ttl=60, refresh=10, timer=timer)
+    values = iter(['first', 'second'])
+    loaded = threading.Event()
+
+    def loader():
+        value = next(values)
+        if value == 'second':
+            loaded.set()
+        return value
+
+    assert cache.get_or_load('key', loader) == 'first'
+
+    timer.now = 11
+    assert cache.get_or_load('key', loader) == 'first', 'The cached value was not served while refreshing'
+    assert loaded.wait(5)
+
+    for _ in range(50):
+        if cache.get('key') == 'second':
+            break
+        time.sleep(0.01)
+
+    assert cache.get('key') == 'second', 'The entry was not refreshed'
+
+
+def test_preloaded_entries_are_refreshed_on_first_access():
+    cache = TTLCache('test_preload', maxsize=10, ttl=60)
+    cache.set('cached', 'loaded')
+    cache.preload('cached', 'snapshot')
+    cache.preload('key', 'snapshot')
+    loaded = threading.Event()
+
+    def loader():
+        loaded.set()
+        return 'loaded'
+
+    assert cache.get_or_load('cached', loader) == 'loaded', 'A cached entry was replaced by a preloaded one'
+    assert not loaded.is_set()
+
+    assert cache.get_or_load('key', loader) == 'snapshot', 'The preloaded value was not served'
+    assert loaded.wait(5)
+
+    for _ in range(50):
+        if cache.get('key') == 'loaded':
+            break
+        time.sleep(0.01)
+
+    assert cache.get('key') == 'loaded', 'The preloaded entry was not loaded again'
+    assert cache.stats()['refreshes'] == 1
+    assert dict(cache.items()) == {'cached': 'loaded', 'key': 'loaded'}
+
+
+@pytest.fixture(params=['disk', 'redis'])
+def shared_cache(request, tmp_path):
+    timer = FakeTimer()
+    if request.param == 'disk':
+        timer.now = time.time()
+        yield DiskCache('test_shared', str(tmp_path), ttl=5, timer=timer), timer
+    else:
+        yield RedisCache('test_shared', StubRedis(timer=timer), ttl=5), timer
+
+
+def test_shared_cache_backends(shared_cache):
+    """
+    GIVEN the disk and the Redis backends of the response cache
+    WHEN storing, expiring and invalidating documents
+    THEN check that they behave as the in-process cache
+    """
+    cache, timer = shared_cache
+    part_key = ('http://oslc/api/oslc/Part/A', 'Part', 'A', '1', 'turtle')
+    cad_key = ('http://oslc/api/oslc/CAD/B', 'CAD', 'B', '2', 'turtle')
+
+    assert cache.get(part_key) is None
+    cache.set(part_key, b'<a> <b> <c> .\n')
+    cache.set(cad_key, b'<d> <e> <f> .\n')
+
+    assert cache.get(part_key) == b'<a> <b> <c> .\n'
+    assert cache.stats()['size'] == 2
+    assert cache.invalidate(predicate=matches_item_type('Part')) == 1
+    assert cache.get(part_key) is None
+    assert cache.get(cad_key) == b'<d> <e> <f> .\n'
+
+    timer.now += 6
+    assert cache.get(cad_key) is None, 'The entry did not expire'
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 3
+
+
+def test_create_cache(tmp_path):
+    assert isinstance(create_cache('test_memory'), TTLCache)
+    assert isinstance(create_cache('test_disk', f'file://{tmp_path}'), DiskCache)
+
+    with pytest.raises(ValueError):
+        create_cache('test_unknown', 'memcached://localhost')
@@ -1,6 +1,8 @@
 import os
 
-from oslc_api.aras.data import load_from_json_file
+import pytest
+
+from oslc_api.aras.data import load_from_json_file, iter_values
 
 
 def test_load_from_json_invalid_file():
@@ -31,3 +33,49 @@ def test_load_from_json_file():
     assert data is not None
     assert '@odata.context' in data
     assert 'value' in data
+
+
+def chunks_of(file_name: str, size: int):
+    with open(file_name, 'rb') as json_file:
+        content = json_file.read()
+
+    return [content[i:i + size] for i in range(0, len(content), size)]
+
+
+@pytest.mark.parametrize('file_name', ['sourceItemTypes.json', 'Part_Items.json'])
+@pytest.mark.parametrize('size', [1, 7, 4096])
+def test_iter_values(file_name, size):
+    """
+    GIVEN an OData response received in chunks of different sizes
+    WHEN parsing it incrementally
+    THEN check that the entries and the annotations are the same of the whole document
+    """
+    file = os.path.join('data', file_name)
+    data = load_from_json_file(file)
+
+    annotations = dict()
+    values = list(iter_values(chunks_of(file, size), annotations=annotations))
+
+    assert values == data['value']
+    assert annotations == {'@odata.context': data['@odata.context']}
+
+
+def test_iter_values_selects_fields():
+    content = [b'{"@odata.count": 12', b'3, "value": [{"id": "A", "keyed_name": "a", ',
+               b'"config_id": {"id": "B", "description": "\\u00e9"}}], "@odata.nextLink": "Part?$skip=1"}']
+
+    annotations = dict()
+    values = list(iter_values(content, fields=('id', 'config_id/id', 'missing'), annotations=annotations))
+
+    assert values == [{'id': 'A', 'config_id': {'id': 'B'}}]
+    assert annotations == {'@odata.count': 123, '@odata.nextLink': 'Part?$skip=1'}
+    assert list(iter_values([b'{"value": []}'])) == []
+    assert list(iter_values([b' {} '])) == []
+
+
+def test_iter_values_invalid_document():
+    with pytest.raises(ValueError):
+        list(iter_values([b'{"value": [{"id": "A"}, {"id": ']))
+
+    with pytest.raises(ValueError):
+        list(iter_values([b'["value"]']))
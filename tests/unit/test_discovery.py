@@ -0,0 +1,82 @@
+import json
+import time
+
+from oslc_api.auth import discovery
+from oslc_api.auth.client import openid_configuration_cache
+
+
+def test_discovery_is_shared_by_the_workers(stub_aras_api, tmp_path):
+    """
+    GIVEN the OAuth server of the stub
+    WHEN the application starts and then another worker starts
+    THEN check that the server is only discovered by the first one and the first login is a single request
+    """
+    aras_api, stub = stub_aras_api
+    path = str(tmp_path / 'openid_configuration.json')
+    openid_configuration_cache.clear()
+
+    thread = discovery.configure(aras_api, path=path, ttl=3600)
+    thread.join(timeout=5)
+
+    assert stub.oauth_requests == 2
+    with open(path) as configuration_file:
+        entry = json.load(configuration_file)[aras_api.aras_base_api_uri]
+    assert entry['configuration']['token_endpoint'].endswith('/OAuthServer/connect/token')
+
+    # Another worker reads the configuration of the file
+    openid_configuration_cache.clear()
+    stub.reset_counters()
+    assert discovery.configure(aras_api, path=path, ttl=3600) is None
+    assert stub.oauth_requests == 0
+
+    token = aras_api.get_token('admin', 'password')
+    assert token['access_token']
+    assert stub.oauth_requests == 1, 'The first login was not a single request'
+
+    aras_api.tokens.remove(token['access_token'])
+
+
+def test_expired_discovery_is_repeated(tmp_path):
+    path = str(tmp_path / 'openid_configuration.json')
+    discovery.write_configuration(path, 'http://aras/InnovatorServer', {'token_endpoint': 'http://aras/token'})
+    discovery.write_configuration(path, 'http://other/InnovatorServer', {'token_endpoint': 'http://other/token'})
+
+    assert discovery.read_configuration(path, 'http://aras/InnovatorServer', ttl=3600) == \
+        {'token_endpoint': 'http://aras/token'}
+    assert discovery.read_configuration(path, 'http://other/InnovatorServer', ttl=3600) == \
+        {'token_endpoint': 'http://other/token'}
+
+    # Written an hour ago
+    with open(path) as configuration_file:
+        data = json.load(configuration_file)
+    data['http://aras/InnovatorServer']['discovered_at'] -= 3600
+    with open(path, 'w') as configuration_file:
+        json.dump(data, configuration_file)
+
+    assert discovery.read_configuration(path, 'http://aras/InnovatorServer', ttl=3600) is None
+    assert discovery.read_configuration(path, 'http://unknown/InnovatorServer') is None
+
+
+def test_loaded_discovery_expires_with_the_file(stub_aras_api, tmp_path):
+    """
+    GIVEN an OpenID configuration discovered by another worker almost an hour ago
+    WHEN a worker loads it with a ttl of an hour
+    THEN check that it expires an hour after its discovery instead of an hour after it was loaded
+    """
+    aras_api, stub = stub_aras_api
+    path = str(tmp_path / 'openid_configuration.json')
+    openid_configuration_cache.clear()
+
+    discovery.write_configuration(path, aras_api.aras_base_api_uri, {'token_endpoint': 'http://aras/token'})
+    with open(path) as configuration_file:
+        data = json.load(configuration_file)
+    data[aras_api.aras_base_api_uri]['discovered_at'] -= 3599.8
+    with open(path, 'w') as configuration_file:
+        json.dump(data, configuration_file)
+
+    assert discovery.configure(aras_api, path=path, ttl=3600) is None
+    assert openid_configuration_cache.get(aras_api.aras_base_api_uri) == {'token_endpoint': 'http://aras/token'}
+
+    time.sleep(0.3)
+    assert openid_configuration_cache.get(aras_api.aras_base_api_uri) is None, \
+        'The configuration was kept for the ttl from the time it was loaded'
@@ -1,19 +1,64 @@
+import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
 
-from oslc_api.aras.resources import OSLCResource
+import pytest
+from rdflib import URIRef, DCTERMS, Literal, Graph, RDFS
+from rdflib.compare import isomorphic
+from werkzeug.exceptions import BadRequest
+
+from oslc_api.aras.namespaces import OSLC
+from oslc_api.aras.paging import encode_page_token, decode_page_token
+from oslc_api.aras.resources import OSLCResource, item_types_cache, service_provider_cache
+from oslc_api.rest_api.aras import shape_cache, versionable_cache, validated_versions_cache, \
+    version_history_cache, check_version_history
+from tests.stub_server import write_item_type_fixtures
 
 
 logger = logging.getLogger(__name__)
 
 
-def test_singleton_instance():
+def test_request_scoped_instances():
     ins1 = OSLCResource()
     ins2 = OSLCResource()
 
     logger.debug(f'instance 1: {ins1}')
     logger.debug(f'instance 2: {ins2}')
 
-    assert ins1 == ins2, 'The singleton is creating different instances'
+    assert ins1 is not ins2, 'The resources are sharing the same instance'
+    assert ins1.graph is not ins2.graph, 'The resources are sharing the same graph'
+
+
+def test_concurrent_resources_are_isolated(mocker, load_validate_configs_test):
+    """
+    GIVEN many requests building streams at the same time
+    WHEN each one is built on its own resource
+    THEN check that every graph only contains the triples of its own stream
+    """
+    streams = {e['id']: e for e in load_validate_configs_test['value']}
+
+    mocker.patch(
+        'oslc_api.aras.resources.load_version_history',
+        return_value=streams
+    )
+
+    def build(stream_id):
+        url = f'http://127.0.0.1:5000/api/oslc/config/Part/component/{streams[stream_id]["config_id"]["id"]}' \
+              f'/stream/{stream_id}'
+        resource = OSLCResource('http://localhost/InnovatorServer/server/odata/', 'a')
+        stream = resource.get_stream('Part', streams[stream_id]['config_id']['id'], stream_id, url)
+        return stream_id, url, resource.to_rdf('nt'), stream
+
+    stream_ids = list(streams.keys()) * 20
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(build, stream_ids))
+
+    for stream_id, url, data, stream in results:
+        assert len(stream.graph) == 3, 'The graph contains triples from other requests'
+        assert (URIRef(url), DCTERMS.identifier, Literal(stream_id)) in stream.graph
+        assert data.count(b' .\n') == 3
 
 
 def test_get_service_provider(source_base_uri, access_token,
@@ -76,11 +121,6 @@ def test_get_query_resource(source_base_uri, access_token, item_values,
     url = f'http://127.0.0.1:5000/api/oslc/{item_type}/{config_id}'
 
     if 'localhost' in source_base_uri:
-        mocker.patch(
-            'oslc_api.aras.resources.validate_config_id',
-            return_value=load_validate_configs_test
-        )
-
         mocker.patch(
             'oslc_api.rest_api.aras.load_resource_shape',
             return_value=load_resource_shape_test
@@ -147,8 +187,8 @@ def test_get_component(source_base_uri, access_token, item_values,
 
     if 'localhost' in source_base_uri:
         mocker.patch(
-            'oslc_api.aras.resources.validate_config_id',
-            return_value=load_validate_configs_test
+            'oslc_api.aras.resources.load_version_history',
+            return_value={e['id']: e for e in load_validate_configs_test['value']}
         )
 
     resource = OSLCResource(source_base_uri=source_base_uri, access_token=access_token)
@@ -171,13 +211,8 @@ def test_get_configurations(source_base_uri, access_token, item_values,
 
     if 'localhost' in source_base_uri:
         mocker.patch(
-            'oslc_api.aras.resources.validate_config_id',
-            return_value=load_validate_configs_test
-        )
-
-        mocker.patch(
-            'oslc_api.aras.resources.load_streams',
-            return_value=load_validate_configs_test
+            'oslc_api.aras.resources.load_version_history',
+            return_value={e['id']: e for e in load_validate_configs_test['value']}
         )
 
     resource = OSLCResource(source_base_uri=source_base_uri, access_token=access_token)
@@ -198,12 +233,7 @@ def test_get_streams(source_base_uri, access_token, item_values, mocker, load_va
 
     if 'localhost' in source_base_uri:
         mocker.patch(
-            'oslc_api.aras.resources.validate_config_id',
-            return_value=load_validate_configs_test
-        )
-
-        mocker.patch(
-            'oslc_api.aras.resources.load_streams',
+            'oslc_api.aras.resources.load_version_history',
             return_value={e['id']: e for e in load_validate_configs_test['value']}
         )
 
@@ -219,3 +249,273 @@ def test_get_streams(source_base_uri, access_token, item_values, mocker, load_va
     assert item_type.encode('ascii') in g, 'The response does not contain the item type'
     assert config_id.encode('ascii') in g, 'The response does not contain the component'
     assert stream_id.encode('ascii') in g, 'The response does not contain the stream'
+
+
+def test_stream_query_capabilities(mocker, load_item_types_test, load_items_test):
+    """
+    GIVEN a page of items of an ItemType
+    WHEN streaming the QueryCapability as Turtle and N-Triples
+    THEN check that the streamed triples are the same of the graph built for the other representations
+    """
+    item_type = 'Part'
+    url = f'http://127.0.0.1:5000/api/oslc/{item_type}'
+    url_sp = 'http://127.0.0.1:5000/api/oslc'
+
+    def load_items(*args, stream=False, annotations=None, **kwargs):
+        # A full page of items, followed by a next page
+        annotations.update(rows=10, last_id='A1B2C3')
+        return iter(load_items_test.items()) if stream else load_items_test
+
+    mocker.patch('oslc_api.aras.resources.load_item_types', return_value=load_item_types_test)
+    mocker.patch('oslc_api.aras.resources.load_items', side_effect=load_items)
+
+    expected = OSLCResource('http://aras/', 'a')
+    expected.get_query_capabilities(item_type, url, url_sp, paging=True, page_size=10, page_no=2)
+
+    for representation in ('turtle', 'nt', 'json-ld'):
+        resource = OSLCResource('http://aras/', 'a')
+        chunks = resource.stream_query_capabilities(item_type, url, url_sp, representation,
+                                                    paging=True, page_size=10, page_no=2)
+
+        g = Graph()
+        g.parse(data=b''.join(chunks).decode('utf-8'), format=representation)
+
+        assert len(g) == len(load_items_test) + 4
+        assert isomorphic(g, expected.graph), f'The streamed {representation} differs from the graph'
+
+
+def test_stream_components(mocker, load_item_types_test, load_items_test):
+    item_type = 'Part'
+    url = f'http://127.0.0.1:5000/api/oslc/config/{item_type}/components'
+
+    mocker.patch('oslc_api.aras.resources.load_item_types', return_value=load_item_types_test)
+    mocker.patch('oslc_api.aras.resources.load_items', return_value=load_items_test)
+
+    expected = OSLCResource('http://aras/', 'a')
+    expected.get_components(item_type, url)
+
+    for representation in ('turtle', 'nt', 'json-ld'):
+        chunks = OSLCResource('http://aras/', 'a').stream_components(item_type, url, representation)
+
+        g = Graph()
+        g.parse(data=b''.join(chunks).decode('utf-8'), format=representation)
+
+        assert isomorphic(g, expected.graph), f'The streamed {representation} components differ from the graph'
+    assert OSLCResource('http://aras/', 'a').stream_components('Unknown', url, 'turtle') is False
+
+
+def test_service_provider_document_kept_on_unchanged_reload(mocker, load_item_types_test):
+    item_types_cache.clear()
+    service_provider_cache.clear()
+    mocker.patch('oslc_api.aras.resources.load_item_types', side_effect=lambda uri: dict(load_item_types_test))
+
+    url = 'http://127.0.0.1:5000/api/oslc'
+    etag, data = OSLCResource('http://aras/', 'a').get_service_provider_document(url, 'turtle')
+
+    item_types_cache.clear()
+    reloaded_etag, reloaded_data = OSLCResource('http://aras/', 'a').get_service_provider_document(url, 'turtle')
+
+    assert reloaded_etag == etag
+    assert reloaded_data is data, 'The document was serialized again for the same catalogue'
+    assert OSLCResource('http://aras/', 'a').get_service_provider_document(url, 'nt')[0] != etag
+
+    item_types_cache.clear()
+    service_provider_cache.clear()
+
+
+def test_stream_configurations(mocker, load_validate_configs_test):
+    item_type = 'Part'
+    config_id = load_validate_configs_test['value'][0]['id']
+    url = f'http://127.0.0.1:5000/api/oslc/config/{item_type}/component/{config_id}/configurations'
+
+    mocker.patch('oslc_api.aras.resources.load_version_history',
+                 return_value={e['id']: e for e in load_validate_configs_test['value']})
+
+    expected = OSLCResource('http://aras/', 'a')
+    expected.get_configurations(item_type, config_id, url)
+
+    for representation in ('turtle', 'nt', 'json-ld'):
+        chunks = OSLCResource('http://aras/', 'a').stream_configurations(item_type, config_id, url, representation)
+
+        g = Graph()
+        g.parse(data=b''.join(chunks).decode('utf-8'), format=representation)
+
+        assert len(g) == len(load_validate_configs_test['value'])
+        assert isomorphic(g, expected.graph), f'The streamed {representation} configurations differ from the graph'
+
+
+def crawl_query_capability(source_base_uri: str, url: str, page_size: int = 0) -> tuple:
+    members = list()
+    totals = list()
+    pages = 0
+    page_token = None
+    while True:
+        resource = OSLCResource(source_base_uri, 'a')
+        resource.get_query_capabilities('Part', url, 'http://127.0.0.1:5000/api/oslc', paging=True,
+                                        page_size=page_size, page_no=pages + 1, page_token=page_token)
+        members.extend(str(member) for member in resource.graph.objects(URIRef(url), RDFS.member))
+        totals.extend(total.toPython() for total in resource.graph.objects(None, OSLC.totalCount))
+        pages += 1
+
+        next_page = next(resource.graph.objects(None, OSLC.nextPage), None)
+        if next_page is None:
+            return members, pages, totals
+
+        page_token = parse_qs(urlparse(str(next_page)).query)['pageToken'][0]
+
+
+def test_query_capability_pages_with_continuation_tokens(stub_aras_api, mocker, load_items_test):
+    """
+    GIVEN the items of an ItemType read by pages
+    WHEN following the oslc:nextPage of each page
+    THEN check that every item is read once and the pages after the first one are found by id instead of skipped
+    """
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+    item_types_cache.clear()
+    get_resource = mocker.spy(aras_api, 'get_resource')
+
+    url = 'http://127.0.0.1:5000/api/oslc/Part'
+    members, pages, _ = crawl_query_capability(aras_api.source_base_uri, url, page_size=10)
+
+    assert set(members) == {f"{url}/{config_id}" for config_id in load_items_test}
+    assert pages == 6, 'The pages after the last full one were not all read'
+
+    queries = [call.args[0] for call in get_resource.call_args_list if '/Part?' in call.args[0]]
+    assert '$skip=0' in queries[0]
+    assert all("$filter=id gt '" in query and '$skip' not in query for query in queries[1:])
+    item_types_cache.clear()
+
+
+def test_query_capability_follows_the_server_driven_paging(stub_aras_api, load_items_test):
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+    stub.server_page_size = 20
+    item_types_cache.clear()
+
+    url = 'http://127.0.0.1:5000/api/oslc/Part'
+    members, pages, _ = crawl_query_capability(aras_api.source_base_uri, url)
+
+    assert set(members) == {f"{url}/{config_id}" for config_id in load_items_test}
+    assert pages == 3
+    item_types_cache.clear()
+
+
+def test_query_capability_counts_the_items(stub_aras_api, mocker, load_items_test):
+    """
+    GIVEN the items of an ItemType read by pages whose size divides their number
+    WHEN following the oslc:nextPage of each page
+    THEN check that the total count is on every page and the last full page has no oslc:nextPage
+    """
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+    item_types_cache.clear()
+    get_resource = mocker.spy(aras_api, 'get_resource')
+
+    url = 'http://127.0.0.1:5000/api/oslc/Part'
+    members, pages, totals = crawl_query_capability(aras_api.source_base_uri, url, page_size=8)
+
+    # The 56 versions of the 18 parts of the fixtures
+    assert set(members) == {f"{url}/{config_id}" for config_id in load_items_test}
+    assert pages == 7, 'An empty page was requested after the last one'
+    assert totals == [56] * 7
+
+    queries = [call.args[0] for call in get_resource.call_args_list if '/Part?' in call.args[0]]
+    assert len(queries) == 7
+    assert all('$count=true' in query for query in queries)
+    item_types_cache.clear()
+
+
+def test_page_tokens():
+    source_base_uri = 'http://aras/server/odata/'
+
+    assert decode_page_token(encode_page_token(after='A1B2'), source_base_uri) == {'after': 'A1B2'}
+    link = source_base_uri + 'Part?$skiptoken=20'
+    assert decode_page_token(encode_page_token(link=link), source_base_uri) == {'link': link}
+
+    for token in ('not a token', encode_page_token(link='http://elsewhere/Part?$skiptoken=20'),
+                  encode_page_token(after="A' or id ne '")):
+        with pytest.raises(BadRequest):
+            decode_page_token(token, source_base_uri)
+
+
+def test_query_resource_is_validated_by_its_query(stub_aras_api, tmp_path):
+    """
+    GIVEN the versions of the items of an ItemType
+    WHEN reading a version by its config_id and item_id twice, and a version of another config_id
+    THEN check that no validation query is sent and that the version of another config_id is not found
+    """
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+    stub.data_dir = str(tmp_path)
+    items = write_item_type_fixtures(stub.data_dir, count=3)
+    for cache in (shape_cache, versionable_cache, validated_versions_cache):
+        cache.clear()
+
+    url_sp = 'http://127.0.0.1:5000/api/oslc'
+    config_id = item_id = items[0]['id']
+    url = f'{url_sp}/Part/{config_id}'
+    config_context = f'{url_sp}/config/Part/component/{config_id}/stream/{item_id}'
+
+    def read(config_id: str, config_context: str = None):
+        resource = OSLCResource(aras_api.source_base_uri, 'test')
+        return resource.get_query_resource('Part', config_id, url, url_sp, config_context=config_context)
+
+    assert read(config_id, config_context)
+
+    # The expanded item and its relationship, sent together once the version is known
+    stub.reset_counters()
+    assert read(config_id, config_context)
+    assert stub.requests == 2
+
+    assert read(items[1]['id'], config_context) is False, 'The version of another config_id was found'
+    assert read('0' * 32) is False
+
+    for cache in (shape_cache, versionable_cache, validated_versions_cache):
+        cache.clear()
+
+
+def test_version_history_is_shared(stub_aras_api, tmp_path):
+    """
+    GIVEN a component walked through its configurations to one of its streams
+    WHEN a new version of the item is created
+    THEN check that the versions are read once for the three resources and read again for the new version
+    """
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+    stub.data_dir = str(tmp_path)
+    items = write_item_type_fixtures(stub.data_dir, count=2)
+    version_history_cache.clear()
+
+    source_base_uri = aras_api.source_base_uri
+    config_id = items[0]['id']
+    url = f'http://127.0.0.1:5000/api/oslc/config/Part/component/{config_id}'
+
+    def walk(stream_id: str) -> tuple:
+        return (OSLCResource(source_base_uri, 'test').get_component('Part', config_id, url),
+                OSLCResource(source_base_uri, 'test').get_configurations('Part', config_id, url + '/configurations'),
+                OSLCResource(source_base_uri, 'test').get_stream('Part', config_id, stream_id,
+                                                                 url + f'/stream/{stream_id}'))
+
+    stub.reset_counters()
+    assert all(walk(config_id))
+    assert stub.requests == 1, 'The versions were read by each resource'
+    assert OSLCResource(source_base_uri, 'test').get_component('Part', items[1]['id'], url)
+    assert OSLCResource(source_base_uri, 'test').get_component('Part', '0' * 32, url) is False
+
+    # A new generation of the item
+    new_version = dict(items[0], id='F' * 32, keyed_name='P-000001 B')
+    with open(os.path.join(stub.data_dir, 'Part_Items.json'), 'w') as json_file:
+        json.dump({'value': items + [new_version]}, json_file)
+    stub.clear_fixtures()
+
+    stub.reset_counters()
+    assert all(walk(new_version['id'])), 'The new stream was not found'
+    assert stub.requests == 1
+
+    check_version_history(source_base_uri, 'Part', config_id, '0' * 32)
+    configurations = OSLCResource(source_base_uri, 'test').get_configurations('Part', config_id,
+                                                                              url + '/configurations')
+    assert len(list(configurations.objects(RDFS.member))) == 2
+    assert stub.requests == 2, 'The history was not read again for a newer current version'
+    version_history_cache.clear()
@@ -0,0 +1,47 @@
+from rdflib import Graph
+
+from oslc_api.aras.client import query_expanded_item
+from oslc_api.aras.namespaces import OSLC
+from oslc_api.aras.properties import get_property_index
+
+
+def test_property_index_matches_the_shape(load_resource_shape_test):
+    """
+    GIVEN the ResourceShape graph of the Part ItemType
+    WHEN building its property index
+    THEN check that it contains the same properties returned by querying the graph
+    """
+    index = get_property_index(load_resource_shape_test)
+
+    qres = load_resource_shape_test.query(
+        """SELECT ?prop ?def
+           WHERE {
+              ?s oslc:name ?prop.
+              ?s oslc:occurs ?occurs.
+              ?s oslc:propertyDefinition ?def.
+              FILTER(?occurs IN (oslc:Exactly-one, oslc:Zero-or-one))
+           }""")
+    assert set(index.expandable) == {str(row['prop']) for row in qres} - {'oslc_component'}
+
+    qres = load_resource_shape_test.query(
+        """SELECT ?prop ?def
+           WHERE {
+              ?s oslc:name ?prop.
+              ?s oslc:occurs oslc:Zero-or-many.
+              ?s oslc:propertyDefinition ?def.
+           }""")
+    assert {p.name: p.property_definition for p in index.relationships} == \
+           {str(row['prop']): row['def'] for row in qres if str(row['prop']) != 'oslc_version_id'}
+
+    assert index.get('Part+BOM').target == 'Part+BOM'
+    assert index.get('name').value_type is not None
+    assert index.get('name').occurs in (OSLC['Exactly-one'], OSLC['Zero-or-one'])
+    assert get_property_index(load_resource_shape_test) is index, 'The index was built again for the same graph'
+
+
+def test_query_expanded_item_without_relationships(mocker):
+    get_resource = mocker.patch('oslc_api.aras.client.aras_api.get_resource')
+
+    query_expanded_item('http://aras/server/odata/', 'Part', None, 'A', Graph())
+
+    get_resource.assert_called_once_with('http://aras/server/odata/Part?$filter=config_id eq \'A\'')
@@ -0,0 +1,39 @@
+import pytest
+
+from oslc_api.rest_api.representations import negotiate, get_content_type
+
+
+@pytest.mark.parametrize('accept, expected', [
+    (None, ('json-ld', 'application/json')),
+    ('', ('json-ld', 'application/json')),
+    ('text/turtle', ('turtle', 'text/turtle')),
+    ('application/n-triples', ('nt', 'application/n-triples')),
+    ('application/n-quads', ('nquads', 'application/n-quads')),
+    ('application/ld+json', ('json-ld', 'application/ld+json')),
+    ('*/*', ('pretty-xml', 'application/rdf+xml')),
+    ('text/turtle;charset=utf-8', ('turtle', 'text/turtle')),
+    ('application/rdf+xml;q=0.5, text/turtle', ('turtle', 'text/turtle')),
+    ('text/turtle;q=0.2, application/n-quads;q=0.8, */*;q=0.1', ('nquads', 'application/n-quads')),
+    ('text/html, text/*;q=0.9', ('turtle', 'text/turtle')),
+    ('text/html, */*;q=0.8', ('pretty-xml', 'application/rdf+xml')),
+    ('*/*, application/rdf+xml;q=0', ('json-ld', 'application/json')),
+    ('application/n-triples;q=0', ('json-ld', 'application/json')),
+    ('image/png', ('json-ld', 'application/json')),
+])
+def test_negotiate(accept, expected):
+    """
+    GIVEN an Accept header with media ranges, parameters and q-values
+    WHEN negotiating the representation of the response
+    THEN check that the preferred representation and its content type are selected
+    """
+    assert negotiate(accept) == expected
+    assert get_content_type(accept) == expected[0]
+
+
+def test_negotiate_supported_representations():
+    supported = ('nquads', 'nt')
+
+    assert negotiate('application/n-triples', supported) == ('nt', 'application/n-triples')
+    assert negotiate('text/turtle, */*;q=0.1', supported) == ('nquads', 'application/n-quads')
+    assert negotiate('text/turtle', supported) == ('nquads', 'application/n-quads')
+    assert negotiate('application/n-quads;q=0, */*', supported) == ('nt', 'application/n-triples')
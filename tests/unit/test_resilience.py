@@ -0,0 +1,175 @@
+import time
+
+import pytest
+from werkzeug.exceptions import GatewayTimeout, InternalServerError
+
+from oslc_api.aras.client import batch, query_item_types_list
+from oslc_api.auth.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+
+@pytest.fixture
+def resilient_aras_api(stub_aras_api):
+    """The ARAS API client pointing to a flaky stub server, with the retries and the circuit breaker enabled."""
+    aras_api, stub = stub_aras_api
+    aras_api.token = {'access_token': 'test'}
+    retry, circuit = aras_api.retry, aras_api.circuit
+    configuration = (retry.retries, retry.backoff_factor, retry.sleep, circuit.failures, circuit.reset_timeout)
+    timeout = aras_api.timeout
+
+    delays = list()
+    retry.configure(retries=3, backoff_factor=0.01, backoff_max=0.02)
+    retry.sleep = delays.append
+    try:
+        yield aras_api, stub, delays
+    finally:
+        retry.retries, retry.backoff_factor, retry.sleep, circuit.failures, circuit.reset_timeout = configuration
+        circuit.reset()
+        aras_api.timeout = timeout
+
+
+def test_retry_backoff_is_jittered_and_capped():
+    jitter = iter([1.0, 0.5, 1.0, 1.0])
+    retry = RetryPolicy(retries=5, backoff_factor=0.5, backoff_max=3, jitter=lambda: next(jitter))
+
+    assert [retry.backoff(attempt) for attempt in range(4)] == [0.5, 0.5, 2.0, 3.0]
+    assert retry.retried == 4
+
+
+def test_circuit_opens_after_consecutive_failures():
+    """
+    GIVEN a circuit breaker opening after 3 consecutive failures
+    WHEN the calls keep failing, the reset timeout passes and a trial call ends
+    THEN check that the calls fail at once while it is open and only one call is tried when it is half-open
+    """
+    now = [0.0]
+    circuit = CircuitBreaker(failures=3, reset_timeout=30, timer=lambda: now[0])
+
+    circuit.record_failure()
+    circuit.record_failure()
+    circuit.record_success()
+    circuit.record_failure()
+    circuit.record_failure()
+    assert circuit.state == CircuitBreaker.CLOSED, 'The failures were not consecutive'
+
+    circuit.record_failure()
+    assert circuit.state == CircuitBreaker.OPEN
+    now[0] += 10
+    with pytest.raises(CircuitOpenError) as e:
+        circuit.before_call()
+    assert e.value.retry_after == 20
+
+    now[0] += 20
+    circuit.before_call()
+    assert circuit.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        circuit.before_call()
+
+    circuit.record_failure()
+    assert circuit.state == CircuitBreaker.OPEN, 'The failed trial did not open the circuit again'
+    assert circuit.opened == 2
+
+    now[0] += 30
+    circuit.before_call()
+    circuit.record_success()
+    assert circuit.state == CircuitBreaker.CLOSED
+    circuit.before_call()
+
+
+def test_disabled_circuit_never_opens():
+    circuit = CircuitBreaker(failures=0)
+    for _ in range(10):
+        circuit.record_failure()
+
+    circuit.before_call()
+    assert not circuit.is_open
+
+
+def test_failed_requests_are_retried(resilient_aras_api):
+    """
+    GIVEN a stub server failing the next requests with a 503 or by closing the connection
+    WHEN requesting Aras with 3 retries
+    THEN check that the requests succeed after waiting a backoff before each retry
+    """
+    aras_api, stub, delays = resilient_aras_api
+
+    stub.failures = 2
+    res = query_item_types_list(aras_api.source_base_uri)
+    assert res.status_code == 200
+    assert stub.failed == 2
+    assert len(delays) == 2
+    assert 0 <= delays[0] <= 0.01 and 0 <= delays[1] <= 0.02
+
+    stub.reset_counters()
+    stub.failure_status = None
+    stub.failures = 3
+    res = query_item_types_list(aras_api.source_base_uri)
+    assert res.status_code == 200
+    assert stub.failed == 3
+    assert aras_api.circuit.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_fails_fast_while_aras_is_down(resilient_aras_api):
+    """
+    GIVEN a stub server failing every request
+    WHEN the requests fail twice in a row after their retries
+    THEN check that the next requests fail at once without reaching the server until it recovers
+    """
+    aras_api, stub, delays = resilient_aras_api
+    aras_api.retry.configure(retries=1)
+    aras_api.circuit.configure(failures=2, reset_timeout=0.2)
+    stub.failure_status = None
+    stub.failures = 1000
+
+    for _ in range(2):
+        with pytest.raises(InternalServerError):
+            query_item_types_list(aras_api.source_base_uri)
+    assert stub.failed == 4
+    assert aras_api.circuit.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        query_item_types_list(aras_api.source_base_uri)
+    assert stub.failed == 4, 'A request was sent while the circuit was open'
+
+    # Aras recovers, the first request after the reset timeout closes the circuit
+    stub.failures = 0
+    time.sleep(0.2)
+    res = query_item_types_list(aras_api.source_base_uri)
+    assert res.status_code == 200
+    assert aras_api.circuit.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_opens_when_aras_hangs(resilient_aras_api):
+    """
+    GIVEN a stub server hanging longer than the read timeout on every request
+    WHEN the requests time out after their retries, sent one by one or by the asynchronous client
+    THEN check that they fail with a 504 and open the circuit instead of holding the threads
+    """
+    aras_api, stub, delays = resilient_aras_api
+    aras_api.timeout = (1, 0.1)
+    aras_api.retry.configure(retries=1)
+    aras_api.circuit.configure(failures=2, reset_timeout=60)
+    stub.hang = 0.5
+    stub.failures = 1000
+
+    start = time.perf_counter()
+    with pytest.raises(GatewayTimeout):
+        query_item_types_list(aras_api.source_base_uri)
+    assert time.perf_counter() - start < 0.5, 'The request waited for the server instead of timing out'
+    assert stub.failed == 2
+    assert aras_api.circuit.state == CircuitBreaker.CLOSED
+
+    pytest.importorskip('aiohttp')
+    aras_api.async_enabled = True
+    try:
+        with pytest.raises(GatewayTimeout):
+            with batch():
+                query_item_types_list(aras_api.source_base_uri)
+    finally:
+        aras_api.async_enabled = False
+        aras_api.async_sender.close()
+    assert stub.failed == 4
+    assert aras_api.circuit.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        query_item_types_list(aras_api.source_base_uri)
+    assert stub.failed == 4, 'A request was sent while the circuit was open'
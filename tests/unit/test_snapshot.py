@@ -0,0 +1,72 @@
+import gzip
+import json
+import time
+from types import MappingProxyType
+
+from rdflib.compare import isomorphic
+
+from oslc_api.aras import snapshot
+from oslc_api.aras.resources import item_types_cache
+from oslc_api.rest_api.aras import shape_cache, versionable_cache, load_resource_shape, check_if_versionable
+
+
+def clear_caches():
+    for cache in (item_types_cache, shape_cache, versionable_cache):
+        cache.clear()
+
+
+def test_snapshot_round_trip(tmp_path, mocker, load_resource_shape_test):
+    """
+    GIVEN the metadata read from Aras by a process
+    WHEN a new process loads the snapshot it wrote
+    THEN check that the metadata is served from the snapshot and loaded again from Aras in the background
+    """
+    clear_caches()
+    path = str(tmp_path / 'metadata_snapshot.json.gz')
+    source_base_uri = 'http://aras/server/odata/'
+    url_sp = 'http://127.0.0.1:5000/api/oslc'
+    shape_key = (source_base_uri, 'Part', url_sp)
+
+    item_types_cache.set(source_base_uri, MappingProxyType({'4F1AC04A2B484F3ABA4E20DB63808A88': 'Part'}))
+    versionable_cache.set(source_base_uri, {'Part': True, 'Document': False})
+    shape_cache.set(shape_key, load_resource_shape_test)
+
+    assert snapshot.write_snapshot(path)
+    assert not snapshot.write_snapshot(path), 'The same snapshot was written again'
+
+    with gzip.open(path) as snapshot_file:
+        assert json.load(snapshot_file)['version'] == snapshot.SNAPSHOT_VERSION
+
+    # A new process, nothing is read from Aras until the preloaded entries are requested
+    clear_caches()
+    get_resource_shape = mocker.patch('oslc_api.rest_api.aras.get_resource_shape',
+                                      return_value=load_resource_shape_test)
+    load_versionable_index = mocker.patch('oslc_api.rest_api.aras.load_versionable_index',
+                                          return_value={'Part': True, 'Document': False})
+    assert snapshot.load_snapshot(path) == 3
+    assert isinstance(item_types_cache.get(source_base_uri), MappingProxyType)
+
+    shape = load_resource_shape('Part', url_sp=url_sp, source_base_url=source_base_uri)
+    assert isomorphic(shape, load_resource_shape_test)
+    assert check_if_versionable(source_base_uri, 'Part') is True
+    assert check_if_versionable(source_base_uri, 'Document') is False
+
+    for _ in range(100):
+        if get_resource_shape.called and load_versionable_index.called:
+            break
+        time.sleep(0.01)
+
+    assert get_resource_shape.called, 'The shape of the snapshot was not loaded again'
+    assert load_versionable_index.called
+    clear_caches()
+
+
+def test_missing_or_corrupt_snapshot(tmp_path):
+    path = tmp_path / 'metadata_snapshot.json.gz'
+    assert snapshot.load_snapshot(str(path)) == 0
+
+    path.write_bytes(b'not a snapshot')
+    assert snapshot.load_snapshot(str(path)) == 0
+
+    path.write_bytes(gzip.compress(json.dumps({'version': 0, 'shapes': [['a', '']]}).encode('utf-8')))
+    assert snapshot.load_snapshot(str(path)) == 0
@@ -0,0 +1,56 @@
+from rdflib import Graph, ConjunctiveGraph, URIRef, Literal, BNode, RDF, XSD, DCTERMS
+from rdflib.compare import isomorphic
+
+from oslc_api.aras.namespaces import OSLC
+from oslc_api.rest_api.writers import serialize
+
+
+def test_serialize_terms():
+    """
+    GIVEN triples with IRIs outside of the prefixes, blank nodes and literals that need escaping
+    WHEN serializing them with the writers
+    THEN check that rdflib parses the same graph
+    """
+    node = BNode()
+    triples = [
+        (URIRef('http://127.0.0.1:5000/api/oslc/Part'), RDF.type, OSLC.QueryCapability),
+        (URIRef('http://127.0.0.1:5000/api/oslc/Part'), OSLC.responseInfo, node),
+        (node, DCTERMS.title, Literal('Quoted "title"\nwith \\ and tab\t and ü')),
+        (node, OSLC.totalCount, Literal('10', datatype=XSD.integer)),
+        (node, DCTERMS.description, Literal('Beschreibung', lang='de')),
+        (URIRef('http://example.com/a#b'), URIRef('http://example.com/p/1'), URIRef('http://example.com/c?d=e')),
+    ]
+
+    expected = Graph()
+    for triple in triples:
+        expected.add(triple)
+
+    for representation in ('turtle', 'nt', 'json-ld'):
+        data = b''.join(line.encode('utf-8') for line in serialize(iter(triples), representation))
+
+        g = Graph()
+        g.parse(data=data.decode('utf-8'), format=representation)
+
+        assert isomorphic(g, expected), f'The {representation} document differs from the triples'
+
+
+def test_serialize_nquads_in_named_graph():
+    """
+    GIVEN the triples of a document
+    WHEN serializing them as N-Quads with the URL of the document
+    THEN check that the triples are written in the named graph of the document
+    """
+    url = 'http://127.0.0.1:5000/api/oslc/Part'
+    triples = [
+        (URIRef(url), RDF.type, OSLC.QueryCapability),
+        (URIRef(url), DCTERMS.title, Literal('Part "A"\n')),
+    ]
+
+    g = ConjunctiveGraph()
+    g.parse(data=''.join(serialize(iter(triples), 'nquads', graph=url)), format='nquads')
+
+    assert len(g) == 2
+    assert set(g.get_context(URIRef(url))) == set(triples)
+
+    default = ''.join(serialize(iter(triples), 'nquads'))
+    assert default == ''.join(serialize(iter(triples), 'nt'))